@@ -25,7 +25,13 @@ from werkzeug.wrappers import Response as WsgiResponse
 
 from app import create_app, db
 from config import Config
-from app.models import User, Order
+from app.models import User, Order, OrderStatus, StatCounter, InvalidTransition
+from app.utils.order_status import change_status
+from app.utils.idempotency import idempotent
+from sqlalchemy.orm.exc import StaleDataError
+
+# Orders listed on the admin page; totals come from StatCounter
+ADMIN_RECENT_ORDERS = 100
 
 # Create application instance
 app = create_app(Config)
@@ -116,6 +122,8 @@ def login() -> Union[Response, str]:
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            # Persist a password hash upgraded by check_password
+            db.session.commit()
             session['user_id'] = user.id
             session['is_admin'] = user.is_admin
             flash('Logged in successfully!', 'success')
@@ -153,11 +161,13 @@ def profile() -> str:
 
 @app.route('/order', methods=['GET', 'POST'])
 @login_required
+@idempotent(scope=lambda: session['user_id'])
 def place_order() -> Union[Response, str]:
     """Handle order placement.
     
     GET: Display the order form.
-    POST: Process the order form and create a new order.
+    POST: Process the order form and create a new order. A retried POST
+    carrying the same idempotency key gets the first response back.
     
     Returns:
         Union[Response, str]:
@@ -196,16 +206,19 @@ def place_order() -> Union[Response, str]:
 @app.route('/admin')
 @admin_required
 def admin() -> str:
-    """Display the admin dashboard with all orders and users.
+    """Display the admin dashboard with the most recent orders.
+    
+    Totals come from the flush-maintained dashboard counters rather than
+    loading every order and user.
     
     This route is protected and requires admin privileges.
     
     Returns:
-        str: Rendered admin template with all orders and users.
+        str: Rendered admin template with recent orders and totals.
     """
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    users = User.query.all()
-    return render_template('admin.html', orders=orders, users=users)
+    orders = Order.query.order_by(Order.created_at.desc()).limit(ADMIN_RECENT_ORDERS).all()
+    stats = StatCounter.dashboard()
+    return render_template('admin.html', orders=orders, stats=stats, statuses=OrderStatus)
 
 @app.route('/admin/order/<int:order_id>/update', methods=['POST'])
 @admin_required
@@ -224,21 +237,22 @@ def update_order(order_id: int) -> Response:
     Note:
         This route is protected and requires admin privileges.
     """
-    order = Order.query.get_or_404(order_id)
     new_status = request.form.get('status')
+    version = request.form.get('version', type=int)
     
     if not new_status:
         flash('Status is required.', 'danger')
         return redirect(url_for('admin'))
     
     try:
-        order.status = new_status
-        db.session.commit()
+        # One conditional UPDATE; fails if the order changed since the page was loaded
+        if change_status(order_id, new_status, version=version) is None:
+            abort(404)
         flash('Order status updated successfully!', 'success')
-    except Exception as e:
-        db.session.rollback()
-        app.logger.error(f"Error updating order status: {str(e)}")
-        flash('Failed to update order status.', 'danger')
+    except InvalidTransition as e:
+        flash(f'Cannot update order status: {e}.', 'danger')
+    except StaleDataError:
+        flash('The order was changed by someone else. Reload and try again.', 'warning')
     
     return redirect(url_for('admin'))
 
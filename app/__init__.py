@@ -1,7 +1,7 @@
 import os
 from flask import Flask, current_app, request, session, g
 from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
+from flask_login import LoginManager, current_user
 from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_limiter import Limiter
@@ -30,8 +30,7 @@ csrf = CSRFProtect()
 # Rate limiting
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    default_limits=["200 per day", "50 per hour"]
 )
 
 # Security headers
@@ -82,6 +81,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Apply the SQLite performance profile before the engine is created
+    from app.utils.sqlite import sqlite_profile
+    sqlite_profile.init_app(app)
+    
     # Initialize extensions
     db.init_app(app)
     bcrypt.init_app(app)
@@ -92,7 +95,8 @@ def create_app(config_class=Config):
     # Initialize Flask-Migrate
     migrate = Migrate(app, db)
     
-    # Initialize rate limiting
+    # Initialize rate limiting; importing ratelimit registers the sqlite:// storage
+    from app.utils import ratelimit  # noqa: F401
     limiter.init_app(app)
     
     # Initialize security headers with CSP
@@ -105,8 +109,61 @@ def create_app(config_class=Config):
         content_security_policy_nonce_in=['script-src']
     )
     
-    # Initialize session
-    session.init_app(app)
+    # Initialize session; the 'sqlite' type is our own low-I/O store
+    if app.config.get('SESSION_TYPE') == 'sqlite':
+        from app.utils.sessions import sqlite_sessions
+        sqlite_sessions.init_app(app)
+    else:
+        session.init_app(app)
+    
+    # Initialize the menu catalog cache
+    from app.utils.catalog import catalog
+    catalog.init_app(app)
+    
+    # Initialize the Flask-Login identity cache
+    from app.utils.identity import identities
+    identities.init_app(app)
+    
+    # Initialize write-behind activity tracking
+    from app.utils.activity import activity
+    activity.init_app(app)
+    
+    # Initialize the password hashing executor
+    from app.utils.passwords import passwords
+    passwords.init_app(app)
+    
+    # Initialize the outbound email worker pool
+    from app.utils.email import email_queue
+    email_queue.init_app(app)
+    
+    # Dashboard counter maintenance commands
+    from app.utils.stats import stats_cli
+    app.cli.add_command(stats_cli)
+    
+    # Delivery zone and rider batch commands
+    from app.utils.dispatch import dispatch_cli
+    app.cli.add_command(dispatch_cli)
+    
+    # Bulk order import commands
+    from app.utils.order_import import orders_cli
+    app.cli.add_command(orders_cli)
+    
+    # Subscription order materialization
+    from app.utils.subscriptions import subscriptions_cli
+    app.cli.add_command(subscriptions_cli)
+    
+    # Kitchen capacity limits
+    from app.utils.capacity import capacity_cli
+    app.cli.add_command(capacity_cli)
+    
+    # Idempotency keys for retried order placement
+    from app.utils.idempotency import idempotency, idempotency_cli
+    idempotency.init_app(app)
+    app.cli.add_command(idempotency_cli)
+    
+    # Meal search index commands; importing also hooks the index into create_all
+    from app.utils.search import search_cli
+    app.cli.add_command(search_cli)
     
     # Register blueprints
     from app.routes import main, auth, admin, api
@@ -132,14 +189,9 @@ def create_app(config_class=Config):
     # Request hooks
     @app.before_request
     def before_request():
-        # Set session timeout to 30 minutes
-        session.permanent = True
-        app.permanent_session_lifetime = timedelta(minutes=30)
-        
-        # Track user activity
+        # Track user activity; written in batches rather than committed here
         if current_user.is_authenticated:
-            current_user.last_seen = datetime.utcnow()
-            db.session.commit()
+            activity.touch(current_user.id)
     
     return app
 
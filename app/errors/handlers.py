@@ -1,4 +1,5 @@
 from flask import render_template, request, jsonify
+from flask_wtf.csrf import CSRFError
 from app.errors import bp
 from app import db
 
@@ -1,10 +1,22 @@
 from .user import User, Role, user_roles
-from .order import Order, OrderStatus, OrderItem, Payment, PaymentStatus
+from .order import (
+    Order, OrderStatus, OrderItem, Payment, PaymentStatus,
+    ORDER_TRANSITIONS, PAYMENT_TRANSITIONS, InvalidTransition
+)
 from .meal import Meal, MealCategory, meal_categories
+from .version import TableVersion
+from .stats import StatCounter
+from .subscription import Subscription, SubscriptionPause
+from .delivery import DeliveryArea
+from .capacity import MealCapacity
+from .idempotency import IdempotencyKey
 
 # Import all models to ensure they are registered with SQLAlchemy
 __all__ = [
     'User', 'Role', 'user_roles',
     'Order', 'OrderStatus', 'OrderItem', 'Payment', 'PaymentStatus',
-    'Meal', 'MealCategory', 'meal_categories'
+    'ORDER_TRANSITIONS', 'PAYMENT_TRANSITIONS', 'InvalidTransition',
+    'Meal', 'MealCategory', 'meal_categories',
+    'TableVersion', 'StatCounter', 'DeliveryArea', 'Subscription', 'SubscriptionPause',
+    'MealCapacity', 'IdempotencyKey'
 ]
@@ -0,0 +1,133 @@
+from sqlalchemy import case, func, insert, select, update
+from app import db
+from .order import Order, OrderItem, OrderStatus
+
+# Orders in these states no longer hold kitchen capacity
+RELEASED_STATUSES = (OrderStatus.CANCELLED, OrderStatus.REFUNDED)
+
+
+class MealCapacity(db.Model):
+    """Portions of a meal the kitchen can still take for one date and slot.
+
+    Order placement and order import call :meth:`reserve`, which takes
+    portions with a single conditional ``UPDATE``. Two customers racing
+    for the last portion cannot both get it, and nothing is read before
+    the write. Subscription orders are commitments: :meth:`take` counts
+    them against the limit without refusing any. Orders that are cancelled
+    or refunded give their portions back through :meth:`release`. A meal,
+    date and slot without a row has no limit.
+    """
+    __tablename__ = 'meal_capacity'
+    __table_args__ = (
+        db.CheckConstraint('remaining >= 0', name='ck_meal_capacity_remaining'),
+    )
+
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), primary_key=True)
+    delivery_date = db.Column(db.Date, primary_key=True)
+    delivery_time = db.Column(db.String(50), primary_key=True)
+    capacity = db.Column(db.Integer, nullable=False)
+    remaining = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<MealCapacity {self.meal_id} {self.delivery_date} {self.delivery_time}: {self.remaining}>'
+
+    @classmethod
+    def _key(cls, meal_id, day, slot):
+        table = cls.__table__
+        return (table.c.meal_id == meal_id, table.c.delivery_date == day, table.c.delivery_time == slot)
+
+    @classmethod
+    def reserve(cls, connection, meal_id, day, slot, quantity):
+        """Take ``quantity`` portions on ``connection``; returns ``False`` if fewer remain.
+
+        The caller commits the reservation together with its order, or rolls
+        both back.
+        """
+        table = cls.__table__
+        result = connection.execute(
+            update(table)
+            .where(*cls._key(meal_id, day, slot), table.c.remaining >= quantity)
+            .values(remaining=table.c.remaining - quantity)
+        )
+        if result.rowcount:
+            return True
+        # Sold out, or no limit set for this meal, date and slot
+        return connection.execute(select(table.c.remaining).where(*cls._key(meal_id, day, slot))).first() is None
+
+    @classmethod
+    def unreserve(cls, connection, meal_id, day, slot, quantity):
+        """Give back ``quantity`` portions taken by :meth:`reserve` in this transaction."""
+        table = cls.__table__
+        connection.execute(
+            update(table)
+            .where(*cls._key(meal_id, day, slot))
+            .values(remaining=table.c.remaining + quantity)
+        )
+
+    @classmethod
+    def _portions(cls, orders):
+        """Portions that the orders matching ``orders`` hold for each limit row."""
+        table = cls.__table__
+        return (
+            select(func.sum(OrderItem.quantity))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(orders, OrderItem.meal_id == table.c.meal_id, Order.delivery_date == table.c.delivery_date,
+                   Order.delivery_time == table.c.delivery_time)
+            .scalar_subquery()
+        )
+
+    @classmethod
+    def take(cls, connection, orders):
+        """Count the portions of the orders matching ``orders`` against the limits.
+
+        Nothing is refused; a limit that is exceeded is left with none to sell.
+        """
+        table = cls.__table__
+        portions = cls._portions(orders)
+        connection.execute(
+            update(table)
+            .where(portions.is_not(None))
+            .values(remaining=case((table.c.remaining > portions, table.c.remaining - portions), else_=0))
+        )
+
+    @classmethod
+    def release(cls, connection, order_ids):
+        """Give back the portions held by ``order_ids``, which stopped holding capacity.
+
+        Call this once per order, when it moves into ``RELEASED_STATUSES``.
+        """
+        table = cls.__table__
+        portions = cls._portions(Order.id.in_(order_ids))
+        returned = table.c.remaining + portions
+        connection.execute(
+            update(table)
+            .where(portions.is_not(None))
+            .values(remaining=case((returned < table.c.capacity, returned), else_=table.c.capacity))
+        )
+
+    @classmethod
+    def set_capacity(cls, connection, meal_id, day, slot, capacity):
+        """Set the portions the kitchen will make; returns how many remain to sell.
+
+        Portions already reserved stay reserved. A new limit is reduced by
+        the open orders already placed for the meal, date and slot.
+        """
+        table = cls.__table__
+        remaining = table.c.remaining + capacity - table.c.capacity
+        result = connection.execute(
+            update(table)
+            .where(*cls._key(meal_id, day, slot))
+            .values(capacity=capacity, remaining=case((remaining > 0, remaining), else_=0))
+        )
+        if not result.rowcount:
+            ordered = connection.execute(
+                select(func.coalesce(func.sum(OrderItem.quantity), 0))
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(OrderItem.meal_id == meal_id, Order.delivery_date == day, Order.delivery_time == slot,
+                       Order.status.not_in(RELEASED_STATUSES))
+            ).scalar()
+            connection.execute(insert(table).values(
+                meal_id=meal_id, delivery_date=day, delivery_time=slot,
+                capacity=capacity, remaining=max(capacity - ordered, 0),
+            ))
+        return connection.execute(select(table.c.remaining).where(*cls._key(meal_id, day, slot))).scalar()
@@ -0,0 +1,106 @@
+import re
+from sqlalchemy import event, select
+from app import db
+from .order import Order
+from .subscription import Subscription
+
+# Indian PIN codes: six digits, not part of a longer number
+PINCODE = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+# Longest locality name, in words, tried against the area table
+MAX_LOCALITY_WORDS = 3
+
+
+def normalize_locality(text):
+    """Lower-case ``text`` and collapse everything but letters and digits to single spaces."""
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def address_keys(address):
+    """Return ``(pincode, localities)`` to look up for a free-text address.
+
+    ``localities`` lists every run of up to three words, longest first, so
+    "Koramangala 5th Block" wins over "Koramangala".
+    """
+    match = PINCODE.search(address or '')
+    words = normalize_locality(PINCODE.sub(' ', address or '')).split()
+    localities = [
+        ' '.join(words[start:start + size])
+        for size in range(min(MAX_LOCALITY_WORDS, len(words)), 0, -1)
+        for start in range(len(words) - size + 1)
+    ]
+    return (match.group(1) if match else None), localities
+
+
+class DeliveryArea(db.Model):
+    """Maps a pincode or a locality name to a delivery zone.
+
+    Rows come from a local reference file (``flask dispatch load-areas``).
+    A pincode in the address decides the zone. Otherwise the longest known
+    locality named in the address does. Localities are stored normalized
+    by :func:`normalize_locality`.
+    """
+    __tablename__ = 'delivery_area'
+    __table_args__ = (
+        db.Index('ix_delivery_area_pincode', 'pincode'),
+        db.Index('ix_delivery_area_locality', 'locality'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pincode = db.Column(db.String(10))
+    locality = db.Column(db.String(100))
+    zone = db.Column(db.String(50), nullable=False)
+
+    def __repr__(self):
+        return f'<DeliveryArea {self.pincode or self.locality} -> {self.zone}>'
+
+    @classmethod
+    def zone_for(cls, connection, address):
+        """Resolve one address with at most two indexed lookups."""
+        pincode, localities = address_keys(address)
+        table = cls.__table__
+        if pincode:
+            zone = connection.execute(
+                select(table.c.zone).where(table.c.pincode == pincode).limit(1)
+            ).scalar()
+            if zone:
+                return zone
+        if not localities:
+            return None
+        found = dict(connection.execute(
+            select(table.c.locality, table.c.zone).where(table.c.locality.in_(localities))
+        ).all())
+        return next((found[name] for name in localities if name in found), None)
+
+    @classmethod
+    def resolver(cls):
+        """Load the whole table into a ``resolve(address)`` function for batch use."""
+        pincodes, localities = {}, {}
+        for pincode, locality, zone in db.session.execute(select(cls.pincode, cls.locality, cls.zone)):
+            if pincode:
+                pincodes.setdefault(pincode, zone)
+            if locality:
+                localities.setdefault(locality, zone)
+
+        def resolve(address):
+            pincode, names = address_keys(address)
+            if pincode in pincodes:
+                return pincodes[pincode]
+            return next((localities[name] for name in names if name in localities), None)
+        return resolve
+
+
+# Zone orders and subscriptions as they are placed or re-addressed, so
+# dispatch never parses addresses. Subscriptions pass their zone on to the
+# orders materialized from them.
+@event.listens_for(Order, 'before_insert')
+@event.listens_for(Subscription, 'before_insert')
+def _zone_new_order(mapper, connection, order):
+    if order.delivery_zone is None:
+        order.delivery_zone = DeliveryArea.zone_for(connection, order.delivery_address)
+
+
+@event.listens_for(Order, 'before_update')
+@event.listens_for(Subscription, 'before_update')
+def _rezone_moved_order(mapper, connection, order):
+    if db.inspect(order).attrs.delivery_address.history.has_changes():
+        order.delivery_zone = DeliveryArea.zone_for(connection, order.delivery_address)
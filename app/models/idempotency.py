@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+
+class IdempotencyKey(db.Model):
+    """The stored outcome of a POST made with an idempotency key.
+
+    The row is claimed before the view runs and holds no response until
+    the view returns. A retry with the same key and user then gets the
+    stored response back instead of placing a second order. Rows past
+    ``expires_at`` are purged in batches (see ``app.utils.idempotency``).
+    """
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='ux_idempotency_key_user_id_key'),
+        db.Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and form
+    status_code = db.Column(db.Integer)  # None while the first request is still running
+    location = db.Column(db.String(500))
+    content_type = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.user_id} {self.key}>'
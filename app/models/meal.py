@@ -11,12 +11,18 @@ from app import db
 meal_categories = db.Table(
     'meal_categories',
     db.Column('meal_id', db.Integer, db.ForeignKey('meal.id'), primary_key=True),
-    db.Column('category_id', db.Integer, db.ForeignKey('meal_category.id'), primary_key=True)
+    db.Column('category_id', db.Integer, db.ForeignKey('meal_category.id'), primary_key=True),
+    # Category to meals; the primary key only covers meal to categories
+    db.Index('ix_meal_categories_category_id_meal_id', 'category_id', 'meal_id')
 )
 
 class MealCategory(db.Model):
     """Meal category model (e.g., Vegetarian, Non-Vegetarian, Vegan, etc.)."""
     __tablename__ = 'meal_category'
+    __table_args__ = (
+        # get_active_categories() without a sort
+        db.Index('ix_meal_category_is_active_display_order', 'is_active', 'display_order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
@@ -41,6 +47,11 @@ class MealCategory(db.Model):
 class Meal(db.Model):
     """Meal model for tiffin menu items."""
     __tablename__ = 'meal'
+    __table_args__ = (
+        db.Index('ix_meal_created_at_id', 'created_at', 'id'),
+        # Menu listing, optionally narrowed to one category
+        db.Index('ix_meal_is_available_category', 'is_available', 'category'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -54,6 +65,7 @@ class Meal(db.Model):
     
     # Relationships
     order_items = db.relationship('OrderItem', backref='meal', lazy=True)
+    categories = db.relationship('MealCategory', secondary=meal_categories, back_populates='meals')
     
     def __repr__(self):
         return f'<Meal {self.name}>'
@@ -75,6 +87,9 @@ class Meal(db.Model):
 class MealReview(db.Model):
     """Customer reviews for meals."""
     __tablename__ = 'meal_review'
+    __table_args__ = (
+        db.Index('ix_meal_review_meal_id', 'meal_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), nullable=False)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from sqlalchemy.orm import selectinload, validates
 from app import db
 
 
@@ -13,6 +14,19 @@ class OrderStatus(Enum):
     REFUNDED = 'refunded'
 
 
+# Statuses an order may move to from each status. Dispatch sends confirmed
+# orders straight out; cancelled and delivered orders can still be refunded.
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: frozenset({OrderStatus.CONFIRMED, OrderStatus.CANCELLED}),
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.IN_PROGRESS, OrderStatus.OUT_FOR_DELIVERY, OrderStatus.CANCELLED}),
+    OrderStatus.IN_PROGRESS: frozenset({OrderStatus.OUT_FOR_DELIVERY, OrderStatus.CANCELLED}),
+    OrderStatus.OUT_FOR_DELIVERY: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset({OrderStatus.REFUNDED}),
+    OrderStatus.CANCELLED: frozenset({OrderStatus.REFUNDED}),
+    OrderStatus.REFUNDED: frozenset(),
+}
+
+
 class PaymentStatus(Enum):
     PENDING = 'pending'
     COMPLETED = 'completed'
@@ -21,9 +35,57 @@ class PaymentStatus(Enum):
     PARTIALLY_REFUNDED = 'partially_refunded'
     CANCELLED = 'cancelled'
 
+
+# A failed payment may be retried; refunds follow completed payments only
+PAYMENT_TRANSITIONS = {
+    PaymentStatus.PENDING: frozenset({PaymentStatus.COMPLETED, PaymentStatus.FAILED, PaymentStatus.CANCELLED}),
+    PaymentStatus.FAILED: frozenset({PaymentStatus.PENDING, PaymentStatus.CANCELLED}),
+    PaymentStatus.COMPLETED: frozenset({PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED}),
+    PaymentStatus.PARTIALLY_REFUNDED: frozenset({PaymentStatus.REFUNDED}),
+    PaymentStatus.REFUNDED: frozenset(),
+    PaymentStatus.CANCELLED: frozenset(),
+}
+
+
+class InvalidTransition(ValueError):
+    """A status that is unknown or not reachable from the current one."""
+
+
+def check_transition(transitions, current, status):
+    """Return ``status`` as a member of the table's enum, or raise :class:`InvalidTransition`.
+
+    ``status`` may be the enum member, its value or its name. Keeping the
+    current status is always allowed, and so is any status for a new row
+    (``current`` is ``None``).
+    """
+    enum = type(next(iter(transitions)))
+    if not isinstance(status, (str, enum)):
+        raise InvalidTransition(f'unknown status {status!r}')
+    if not isinstance(status, enum):
+        try:
+            status = enum(status)
+        except ValueError:
+            if status not in enum.__members__:
+                raise InvalidTransition(f'unknown status {status!r}')
+            status = enum[status]
+    if current is not None and status != current and status not in transitions[current]:
+        raise InvalidTransition(f'cannot change status from {current.value} to {status.value}')
+    return status
+
 class Order(db.Model):
     """Order model for tiffin orders."""
     __tablename__ = 'order'
+    __table_args__ = (
+        # Keyset pagination in the API: all orders, and one customer's orders
+        db.Index('ix_order_created_at_id', 'created_at', 'id'),
+        db.Index('ix_order_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        # Admin filtering by status, newest first
+        db.Index('ix_order_status_created_at', 'status', 'created_at'),
+        # Per-day kitchen and dispatch views; covers the production plan's date range scan
+        db.Index('ix_order_delivery_date_status_time', 'delivery_date', 'status', 'delivery_time'),
+        # At most one order per subscription and day; makes materialization re-runnable
+        db.Index('ux_order_subscription_id_delivery_date', 'subscription_id', 'delivery_date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -31,15 +93,37 @@ class Order(db.Model):
     delivery_address = db.Column(db.Text, nullable=False)
     delivery_date = db.Column(db.Date, nullable=False)
     delivery_time = db.Column(db.String(50), nullable=False)
+    delivery_zone = db.Column(db.String(50))  # from DeliveryArea, set on insert
+    subscription_id = db.Column(db.Integer, db.ForeignKey('subscription.id'))  # set for standing orders
     total_amount = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every UPDATE; a flush that finds another version raises StaleDataError
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
 
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<Order {self.id}>'
     
+    @validates('status')
+    def _validate_status(self, key, status):
+        return check_transition(ORDER_TRANSITIONS, self.status, status)
+    
+    @classmethod
+    def with_items(cls):
+        """Query orders with their items and meals loaded in batched selects.
+        
+        Use this whenever orders are serialized with ``to_dict`` so that the
+        items and meal prices come from two extra IN queries instead of one
+        lazy load per order and per item.
+        """
+        return cls.query.options(
+            selectinload(cls.items).selectinload(OrderItem.meal)
+        )
+    
     def calculate_total(self):
         """Calculate the total amount for the order."""
         self.total_amount = sum(item.quantity * item.meal.price for item in self.items)
@@ -56,6 +140,7 @@ class Order(db.Model):
             'delivery_time': self.delivery_time,
             'total_amount': self.total_amount,
             'created_at': self.created_at.isoformat(),
+            'version': self.version,
             'items': [item.to_dict() for item in self.items]
         }
 
@@ -63,16 +148,38 @@ class Order(db.Model):
 class OrderItem(db.Model):
     """Order items model for individual items in an order."""
     __tablename__ = 'order_item'
+    __table_args__ = (
+        db.Index('ix_order_item_meal_id', 'meal_id'),
+        # Items of an order; covers the production plan's item lookups
+        db.Index('ix_order_item_order_id_meal_id_quantity', 'order_id', 'meal_id', 'quantity'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
+    
+    def __repr__(self):
+        return f'<OrderItem {self.id}>'
+    
+    def to_dict(self):
+        """Convert order item to dictionary."""
+        return {
+            'id': self.id,
+            'meal_id': self.meal_id,
+            'meal_name': self.meal.name if self.meal else None,
+            'quantity': self.quantity,
+            'unit_price': self.meal.price if self.meal else 0,
+            'total_price': self.meal.price * self.quantity if self.meal else 0
+        }
 
 
 class Payment(db.Model):
     """Payment model for order payments."""
     __tablename__ = 'payment'
+    __table_args__ = (
+        db.Index('ix_payment_order_id', 'order_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
@@ -81,13 +188,20 @@ class Payment(db.Model):
     transaction_id = db.Column(db.String(100), unique=True, nullable=True)
     payment_method = db.Column(db.String(50), nullable=False)  # credit_card, debit_card, upi, net_banking, etc.
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     order = db.relationship('Order', backref=db.backref('payments', lazy=True))
     
+    __mapper_args__ = {'version_id_col': version}
+    
     def __repr__(self):
         return f'<Payment {self.id} - {self.status} - {self.amount}>'
     
+    @validates('status')
+    def _validate_status(self, key, status):
+        return check_transition(PAYMENT_TRANSITIONS, self.status, status)
+    
     def to_dict(self):
         """Convert payment to dictionary."""
         return {
@@ -97,22 +211,6 @@ class Payment(db.Model):
             'status': self.status.value if self.status else None,
             'transaction_id': self.transaction_id,
             'payment_method': self.payment_method,
-            'payment_date': self.payment_date.isoformat() if self.payment_date else None
-        }
-    
-    # Relationships
-    meal = db.relationship('Meal')
-    
-    def __repr__(self):
-        return f'<OrderItem {self.id}>'
-    
-    def to_dict(self):
-        """Convert order item to dictionary."""
-        return {
-            'id': self.id,
-            'meal_id': self.meal_id,
-            'meal_name': self.meal.name if self.meal else None,
-            'quantity': self.quantity,
-            'unit_price': self.meal.price if self.meal else 0,
-            'total_price': self.meal.price * self.quantity if self.meal else 0
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
+            'version': self.version
         }
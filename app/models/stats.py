@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect, insert, select, update, delete
+from sqlalchemy.orm import Session
+from app import db
+from .meal import Meal
+from .order import Order, OrderStatus
+from .user import User
+
+# Orders in these states bring in no revenue
+NON_REVENUE_STATUSES = frozenset({OrderStatus.CANCELLED, OrderStatus.REFUNDED})
+
+
+class StatCounter(db.Model):
+    """Running totals for the admin dashboard, kept current on every flush.
+
+    Each row is a named counter: ``users``, ``meals``, ``meals:available``,
+    ``orders:<status>`` and ``revenue:<YYYY-MM-DD>`` (orders that day and
+    their total). Every flush that adds, changes or removes users, meals or
+    orders applies its deltas in the same transaction, so the dashboard
+    reads a few rows by primary key instead of counting tables.
+    ``flask stats rebuild`` recomputes them from scratch.
+
+    Bulk ``UPDATE``/``DELETE`` statements bypass the flush; code issuing
+    them must call :meth:`apply` with the deltas it caused.
+    """
+    __tablename__ = 'stat_counter'
+
+    name = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.count}/{self.amount}>'
+
+    @classmethod
+    def apply(cls, connection, deltas):
+        """Add ``{name: (count, amount)}`` deltas to the counters on ``connection``."""
+        table = cls.__table__
+        for name in sorted(deltas):
+            count, amount = deltas[name]
+            if not count and not amount:
+                continue
+            result = connection.execute(
+                update(table)
+                .where(table.c.name == name)
+                .values(count=table.c.count + count, amount=table.c.amount + amount)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(name=name, count=count, amount=amount))
+
+    @classmethod
+    def get_counters(cls, names):
+        """Return ``{name: (count, amount)}``; missing counters are ``(0, 0.0)``."""
+        rows = db.session.execute(
+            select(cls.name, cls.count, cls.amount).where(cls.name.in_(names))
+        )
+        counters = {name: (0, 0.0) for name in names}
+        counters.update((row.name, (row.count, row.amount)) for row in rows)
+        return counters
+
+    @classmethod
+    def dashboard(cls, days=7, today=None):
+        """Return the dashboard figures, with revenue for the last ``days`` days."""
+        today = today or datetime.utcnow().date()
+        dates = [today - timedelta(days=n) for n in range(days)]
+        names = ['users', 'meals', 'meals:available']
+        names += [f'orders:{status.value}' for status in OrderStatus]
+        names += [f'revenue:{day.isoformat()}' for day in dates]
+        counters = cls.get_counters(names)
+        orders_by_status = {status: counters[f'orders:{status.value}'][0] for status in OrderStatus}
+        return {
+            'users': counters['users'][0],
+            'meals': counters['meals'][0],
+            'meals_available': counters['meals:available'][0],
+            'orders': sum(orders_by_status.values()),
+            'orders_by_status': orders_by_status,
+            'revenue_by_day': [(day, *counters[f'revenue:{day.isoformat()}']) for day in dates],
+        }
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the source tables; returns the row count."""
+        deltas = {
+            'users': (db.session.scalar(select(func.count(User.id))), 0.0),
+            'meals': (db.session.scalar(select(func.count(Meal.id))), 0.0),
+            'meals:available': (
+                db.session.scalar(select(func.count(Meal.id)).where(Meal.is_available.is_(True))), 0.0
+            ),
+        }
+        for status, count in db.session.execute(
+            select(Order.status, func.count(Order.id)).group_by(Order.status)
+        ):
+            deltas[f'orders:{status.value}'] = (count, 0.0)
+        day = func.date(Order.created_at)
+        for day_value, count, amount in db.session.execute(
+            select(day, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0.0))
+            .where(Order.status.not_in(NON_REVENUE_STATUSES))
+            .group_by(day)
+        ):
+            if day_value is not None:
+                deltas[f'revenue:{day_value}'] = (count, amount)
+        connection = db.session.connection()
+        connection.execute(delete(cls.__table__))
+        cls.apply(connection, deltas)
+        return len(deltas)
+
+
+def _value(state, key, previous):
+    """An attribute's value before (``previous``) or after the flush."""
+    history = state.attrs[key].history
+    values = (history.deleted if previous else history.added) or history.unchanged
+    return values[0] if values else None
+
+
+def _object_stats(obj, previous):
+    """The counters one row contributes, as it was or as it is now."""
+    state = inspect(obj)
+    if isinstance(obj, User):
+        return {'users': (1, 0.0)}
+    if isinstance(obj, Meal):
+        stats = {'meals': (1, 0.0)}
+        if _value(state, 'is_available', previous):
+            stats['meals:available'] = (1, 0.0)
+        return stats
+    status = _value(state, 'status', previous) or OrderStatus.PENDING
+    stats = {f'orders:{status.value}': (1, 0.0)}
+    created_at = _value(state, 'created_at', previous)
+    if status not in NON_REVENUE_STATUSES and created_at is not None:
+        stats[f'revenue:{created_at.date().isoformat()}'] = (1, _value(state, 'total_amount', previous) or 0.0)
+    return stats
+
+
+def _add(deltas, stats, sign):
+    for name, (count, amount) in stats.items():
+        total_count, total_amount = deltas.get(name, (0, 0.0))
+        deltas[name] = (total_count + sign * count, total_amount + sign * amount)
+
+
+TRACKED = (User, Meal, Order)
+TRACKED_ATTRIBUTES = {Meal: ('is_available',), Order: ('status', 'total_amount', 'created_at')}
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Load the old value before an assignment, so the flush can subtract it
+for _model, _keys in TRACKED_ATTRIBUTES.items():
+    for _key in _keys:
+        event.listen(getattr(_model, _key), 'set', _keep_previous_value, active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _load_deleted_rows(session, flush_context, instances):
+    # Deleted rows cannot be loaded after the flush; read what they counted now
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            for key in TRACKED_ATTRIBUTES.get(type(obj), ()):
+                getattr(obj, key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_flushed_rows(session, flush_context):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, TRACKED):
+            _add(deltas, _object_stats(obj, previous=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            _add(deltas, _object_stats(obj, previous=True), -1)
+    for obj in session.dirty:
+        keys = TRACKED_ATTRIBUTES.get(type(obj))
+        if keys and any(inspect(obj).attrs[key].history.has_changes() for key in keys):
+            _add(deltas, _object_stats(obj, previous=True), -1)
+            _add(deltas, _object_stats(obj, previous=False), 1)
+    if deltas:
+        StatCounter.apply(session.connection(), deltas)
@@ -0,0 +1,87 @@
+from datetime import datetime
+from app import db
+
+# Bit ``1 << date.weekday()`` of ``Subscription.weekdays`` marks a delivery day
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WEEKDAYS_MON_FRI = 0b0011111
+
+
+def weekdays_mask(names):
+    """Return the ``weekdays`` bitmask for day names such as ``['mon', 'wed']``."""
+    mask = 0
+    for name in names:
+        mask |= 1 << WEEKDAYS.index(name.strip().lower()[:3])
+    return mask
+
+
+class Subscription(db.Model):
+    """A standing order: the same meal delivered on chosen weekdays.
+
+    ``flask subscriptions materialize`` turns the subscriptions due on a day
+    into ordinary orders (see ``app.utils.subscriptions``). Deliveries
+    are skipped outside ``starts_on``/``ends_on``, on days covered by a
+    :class:`SubscriptionPause`, and while the meal is unavailable.
+    """
+    __tablename__ = 'subscription'
+    __table_args__ = (
+        db.Index('ix_subscription_user_id', 'user_id'),
+        # The daily materialization scans active subscriptions in date range
+        db.Index('ix_subscription_active_starts_on', 'is_active', 'starts_on'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    weekdays = db.Column(db.Integer, nullable=False, default=WEEKDAYS_MON_FRI)
+    delivery_time = db.Column(db.String(50), nullable=False)
+    delivery_address = db.Column(db.Text, nullable=False)
+    delivery_zone = db.Column(db.String(50))  # from DeliveryArea, copied onto each order
+    starts_on = db.Column(db.Date, nullable=False)
+    ends_on = db.Column(db.Date)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    customer = db.relationship('User', backref=db.backref('subscriptions', lazy=True))
+    meal = db.relationship('Meal')
+    pauses = db.relationship('SubscriptionPause', backref='subscription', lazy=True,
+                             cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<Subscription {self.id}>'
+
+    @property
+    def weekday_names(self):
+        return [name for bit, name in enumerate(WEEKDAYS) if self.weekdays & (1 << bit)]
+
+    def to_dict(self):
+        """Convert subscription to dictionary."""
+        return {
+            'id': self.id,
+            'meal_id': self.meal_id,
+            'quantity': self.quantity,
+            'weekdays': self.weekday_names,
+            'delivery_time': self.delivery_time,
+            'delivery_address': self.delivery_address,
+            'starts_on': self.starts_on.isoformat(),
+            'ends_on': self.ends_on.isoformat() if self.ends_on else None,
+            'is_active': self.is_active,
+            'pauses': [[pause.starts_on.isoformat(), pause.ends_on.isoformat()] for pause in self.pauses]
+        }
+
+
+class SubscriptionPause(db.Model):
+    """No deliveries from ``starts_on`` to ``ends_on``, both inclusive."""
+    __tablename__ = 'subscription_pause'
+    __table_args__ = (
+        db.Index('ix_subscription_pause_subscription_id_starts_on', 'subscription_id', 'starts_on', 'ends_on'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('subscription.id'), nullable=False)
+    starts_on = db.Column(db.Date, nullable=False)
+    ends_on = db.Column(db.Date, nullable=False)
+
+    def __repr__(self):
+        return f'<SubscriptionPause {self.subscription_id} {self.starts_on}..{self.ends_on}>'
@@ -3,7 +3,7 @@ import jwt
 from flask import current_app
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from app import db, login_manager, bcrypt
+from app import db, login_manager
 
 # Association table for many-to-many relationship between users and roles
 user_roles = db.Table('user_roles',
@@ -24,6 +24,9 @@ class Role(db.Model):
 class User(UserMixin, db.Model):
     """User account model."""
     __tablename__ = 'user'
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -35,6 +38,7 @@ class User(UserMixin, db.Model):
     address = db.Text()
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime)  # written in batches, see get_last_seen()
     
     # Relationships
     orders = db.relationship('Order', backref='customer', lazy=True)
@@ -47,12 +51,20 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
     
     def set_password(self, password):
-        """Create hashed password."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Create hashed password on the hashing executor."""
+        from app.utils.passwords import passwords
+        self.password_hash = passwords.hash(password)
     
     def check_password(self, password):
-        """Check hashed password."""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Check hashed password, upgrading a weak or legacy hash on success.
+        
+        The upgraded hash is only set on the instance; the caller commits it.
+        """
+        from app.utils.passwords import passwords
+        matches, needs_rehash = passwords.verify(self.password_hash, password)
+        if needs_rehash:
+            self.password_hash = passwords.hash(password)
+        return matches
     
     def get_reset_token(self, expires_sec=1800):
         """Generate a password reset token."""
@@ -79,6 +91,11 @@ class User(UserMixin, db.Model):
             return None
         return User.query.get(user_id)
     
+    def get_last_seen(self):
+        """Return when the user was last active, including unflushed activity."""
+        from app.utils.activity import activity
+        return activity.last_seen(self)
+    
     def get_full_name(self):
         """Return the full name of the user."""
         return f"{self.first_name} {self.last_name}" if self.first_name and self.last_name else self.username
@@ -96,5 +113,6 @@ class User(UserMixin, db.Model):
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login."""
-    return User.query.get(int(user_id))
+    """Load a cached, read-only identity by ID for Flask-Login."""
+    from app.utils.identity import identities
+    return identities.load(int(user_id))
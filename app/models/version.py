@@ -0,0 +1,86 @@
+from datetime import datetime
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.orm import Session, attributes
+from app import db
+
+
+class TableVersion(db.Model):
+    """Change counter per table, used to build cheap HTTP validators.
+
+    Every flush that inserts, updates or deletes rows of a tracked table
+    increments its counter in the same transaction, so a reader can tell
+    whether anything changed with a single primary-key lookup instead of
+    scanning the table.
+    """
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
+
+    @classmethod
+    def get_versions(cls, table_names):
+        """Return ``{table_name: (version, updated_at)}`` for the given tables.
+
+        Tables that have never been written report ``(0, None)``.
+        """
+        rows = db.session.execute(
+            select(cls.table_name, cls.version, cls.updated_at)
+            .where(cls.table_name.in_(table_names))
+        )
+        versions = {name: (0, None) for name in table_names}
+        versions.update((row.table_name, (row.version, row.updated_at)) for row in rows)
+        return versions
+
+    @classmethod
+    def bump(cls, connection, table_names):
+        """Increment the counters for ``table_names`` on ``connection``."""
+        now = datetime.utcnow()
+        for name in sorted(table_names):
+            result = connection.execute(
+                update(cls.__table__)
+                .where(cls.__table__.c.table_name == name)
+                .values(version=cls.__table__.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                connection.execute(
+                    insert(cls.__table__).values(table_name=name, version=1, updated_at=now)
+                )
+
+
+# Tables whose changes clients can observe through the API
+VERSIONED_TABLES = frozenset({
+    'user', 'order', 'order_item', 'payment', 'meal', 'meal_category', 'meal_categories', 'delivery_area'
+})
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_tables(session, flush_context):
+    changed = set()
+    for obj in session.new | session.deleted:
+        changed.add(getattr(obj, '__tablename__', None))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            changed.add(getattr(obj, '__tablename__', None))
+    # Association tables such as meal_categories are written from collections
+    for obj in session.new | session.dirty | session.deleted:
+        for relationship in inspect(obj).mapper.relationships:
+            if relationship.secondary is not None and (
+                    obj in session.deleted or attributes.get_history(
+                        obj, relationship.key, passive=attributes.PASSIVE_NO_INITIALIZE).has_changes()):
+                changed.add(relationship.secondary.name)
+    changed &= VERSIONED_TABLES
+    if changed:
+        TableVersion.bump(session.connection(), changed)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_bulk_statement_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        if name in VERSIONED_TABLES:
+            TableVersion.bump(orm_execute_state.session.connection(), {name})
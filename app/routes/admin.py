@@ -1,6 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort, Response, stream_with_context, jsonify
 from flask_login import login_required, current_user
-from app.models import User, Order, Meal, db
+from app import db
+from app.models import User, Order, OrderStatus, Meal, StatCounter
+from app.utils.export import generate_csv, generate_ndjson
+from app.utils.dispatch import plan_batches
+from app.utils.order_import import ImportFormatError, import_orders, read_rows
+from app.utils.order_status import UPDATED, transition_orders
+from app.utils.production import PlanColumns
 from functools import wraps
 
 bp = Blueprint('admin', __name__)
@@ -8,7 +15,7 @@ bp = Blueprint('admin', __name__)
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin:
+        if not current_user.is_authenticated or not current_user.has_permission('admin'):
             flash('You need to be an admin to access this page.', 'danger')
             return redirect(url_for('main.index'))
         return f(*args, **kwargs)
@@ -18,17 +25,17 @@ def admin_required(f):
 @login_required
 @admin_required
 def dashboard():
-    total_users = User.query.count()
-    total_orders = Order.query.count()
-    total_meals = Meal.query.count()
+    # Counters maintained on every flush: one primary-key lookup query, no table scans
+    stats = StatCounter.dashboard()
     
     recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html',
-                         total_users=total_users,
-                         total_orders=total_orders,
-                         total_meals=total_meals,
+                         stats=stats,
+                         total_users=stats['users'],
+                         total_orders=stats['orders'],
+                         total_meals=stats['meals'],
                          recent_orders=recent_orders,
                          recent_users=recent_users)
 
@@ -48,9 +55,107 @@ def orders():
     orders = Order.query.order_by(Order.created_at.desc()).paginate(page=page, per_page=10)
     return render_template('admin/orders.html', orders=orders)
 
+@bp.route('/orders/export')
+@login_required
+@admin_required
+def export_orders():
+    """Stream every order with its items and payments as NDJSON or CSV."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt == 'ndjson':
+        generate, mimetype = generate_ndjson, 'application/x-ndjson'
+    elif fmt == 'csv':
+        generate, mimetype = generate_csv, 'text/csv'
+    else:
+        abort(400)
+    
+    filename = f"orders-{datetime.utcnow():%Y%m%d}.{fmt}"
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    return Response(
+        stream_with_context(generate(batch_size)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@bp.route('/orders/import', methods=['POST'])
+@login_required
+@admin_required
+def import_orders_file():
+    """Import an uploaded CSV or JSON file of order rows; returns the per-row report."""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'No file uploaded'}), 400
+    fmt = request.form.get('format') or ('json' if upload.filename.lower().endswith('.json') else 'csv')
+    try:
+        rows = read_rows(upload.stream, fmt)
+    except ImportFormatError as error:
+        return jsonify({'error': str(error)}), 400
+    result = import_orders(rows)
+    current_app.logger.info('Imported %d orders from %s in %.2fs (%.0f rows/s)',
+                            result.orders, upload.filename, result.seconds, result.rows_per_second)
+    return jsonify(result.to_dict())
+
 @bp.route('/meals')
 @login_required
 @admin_required
 def meals():
     meals = Meal.query.all()
     return render_template('admin/meals.html', meals=meals)
+
+@bp.route('/production')
+@login_required
+@admin_required
+def production():
+    """Meals to cook per delivery date and slot, over orders not cancelled or refunded."""
+    try:
+        start = datetime.strptime(request.args['date'], '%Y-%m-%d').date() \
+            if request.args.get('date') else datetime.utcnow().date()
+    except ValueError:
+        abort(400)
+    days = min(max(request.args.get('days', 1, type=int), 1), 31)
+    slot = request.args.get('slot') or None
+    end = start + timedelta(days=days - 1)
+    # One query for the range; each day and slot card is a slice of it
+    columns = PlanColumns.load(start, end)
+    slots = sorted(columns.slot_names) if slot is None else [slot]
+    sections = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        cards = []
+        for name in slots:
+            rows = columns.plan(day=day, slot=name)
+            if rows:
+                cards.append((name, rows))
+        if cards:
+            sections.append((day, cards))
+    return render_template('admin/production.html', sections=sections, start=start, end=end, days=days, slot=slot)
+
+@bp.route('/dispatch')
+@login_required
+@admin_required
+def dispatch():
+    """Rider batches for one day's confirmed orders, per slot and zone."""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() \
+            if request.args.get('date') else datetime.utcnow().date()
+    except ValueError:
+        abort(400)
+    slot = request.args.get('slot') or None
+    batches = plan_batches(day, slot=slot)
+    return render_template('admin/dispatch.html', batches=batches, day=day, slot=slot)
+
+@bp.route('/dispatch/send', methods=['POST'])
+@login_required
+@admin_required
+def send_batch():
+    """Mark one rider batch's orders out for delivery."""
+    order_ids = request.form.getlist('order_id', type=int)
+    if not order_ids:
+        abort(400)
+    results = transition_orders(OrderStatus.OUT_FOR_DELIVERY, order_ids=order_ids)
+    updated = sum(1 for result in results if result.outcome == UPDATED)
+    skipped = [f'#{result.order_id}' for result in results if result.outcome != UPDATED]
+    if skipped:
+        flash(f"{updated} orders out for delivery; not moved: {', '.join(skipped)}", 'warning')
+    else:
+        flash(f'{updated} orders out for delivery.', 'success')
+    return redirect(url_for('admin.dispatch', date=request.form.get('date'), slot=request.form.get('slot') or None))
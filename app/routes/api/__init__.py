@@ -1,14 +1,35 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
-from app.models import User, Order, Meal
+from sqlalchemy.orm.exc import StaleDataError
+from app.models import User, Order, OrderStatus, InvalidTransition
+from app.routes.api.conditional import conditional
+from app.routes.api.pagination import InvalidCursor, get_limit, paginate, paginate_sorted
+from app.utils.catalog import CATALOG_TABLES, catalog
+from app.utils.dispatch import plan_batches
+from app.utils.order_status import UPDATED, change_status, transition_orders
+from app.utils.production import production_plan
+from app.utils.search import search_meals
 from functools import wraps
 
 bp = Blueprint('api', __name__)
 
+@bp.errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    return jsonify({'error': 'invalid cursor'}), 400
+
+@bp.errorhandler(StaleDataError)
+def version_conflict(error):
+    return jsonify({'error': 'conflict', 'message': str(error)}), 409
+
+@bp.errorhandler(InvalidTransition)
+def invalid_transition(error):
+    return jsonify({'error': 'invalid transition', 'message': str(error)}), 409
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin:
+        if not current_user.is_authenticated or not current_user.has_permission('admin'):
             return jsonify({'error': 'Admin access required'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -16,45 +37,188 @@ def admin_required(f):
 @bp.route('/users')
 @login_required
 @admin_required
+@conditional('user', private=True)
 def get_users():
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'is_admin': user.is_admin,
-        'created_at': user.created_at.isoformat()
-    } for user in users])
+    users, next_cursor = paginate(User.query, User)
+    return jsonify({
+        'users': [{
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'is_admin': user.is_admin,
+            'created_at': user.created_at.isoformat()
+        } for user in users],
+        'next_cursor': next_cursor
+    })
 
 @bp.route('/orders')
 @login_required
+@conditional('order', 'order_item', 'meal', private=True)
 def get_orders():
-    if current_user.is_admin:
-        orders = Order.query.all()
-    else:
-        orders = Order.query.filter_by(user_id=current_user.id).all()
+    query = Order.with_items()
+    if not current_user.is_admin:
+        query = query.filter_by(user_id=current_user.id)
+    orders, next_cursor = paginate(query, Order)
         
-    return jsonify([{
-        'id': order.id,
-        'user_id': order.user_id,
-        'status': order.status.value,
-        'total_amount': order.total_amount,
-        'created_at': order.created_at.isoformat(),
-        'items': [{
-            'meal_id': item.meal_id,
-            'quantity': item.quantity,
-            'price': item.meal.price if item.meal else 0
-        } for item in order.items]
-    } for order in orders])
+    return jsonify({
+        'orders': [{
+            'id': order.id,
+            'user_id': order.user_id,
+            'status': order.status.value,
+            'total_amount': order.total_amount,
+            'created_at': order.created_at.isoformat(),
+            'version': order.version,
+            'items': [{
+                'meal_id': item.meal_id,
+                'quantity': item.quantity,
+                'price': item.meal.price if item.meal else 0
+            } for item in order.items]
+        } for order in orders],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/orders/<int:order_id>/status', methods=['POST'])
+@login_required
+@admin_required
+def update_order_status(order_id):
+    """Move one order to ``status``; send the ``version`` last read to detect conflicting edits."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('status'), str):
+        return jsonify({'error': 'status must be a string'}), 400
+    version = data.get('version')
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        return jsonify({'error': 'version must be an integer'}), 400
+    result = change_status(order_id, data.get('status'), version=version)
+    if result is None:
+        return jsonify({'error': 'Order not found'}), 404
+    status, version = result
+    return jsonify({'id': order_id, 'status': status.value, 'version': version})
+
+@bp.route('/orders/status', methods=['POST'])
+@login_required
+@admin_required
+def transition_order_status():
+    """Move many orders to one status.
+
+    The JSON body holds ``status`` and either ``order_ids`` or a ``date``
+    with optional ``slot`` and ``zone``. An optional ``versions`` object
+    maps order ids to the versions the caller saw; orders that have moved
+    on since are reported as ``conflict``. Returns one result per order.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        target = OrderStatus(data.get('status'))
+    except ValueError:
+        return jsonify({'error': f"status must be one of: {', '.join(s.value for s in OrderStatus)}"}), 400
+    order_ids = data.get('order_ids')
+    if order_ids is not None and (not isinstance(order_ids, list)
+                                  or not all(isinstance(i, int) and not isinstance(i, bool) for i in order_ids)):
+        return jsonify({'error': 'order_ids must be a list of integers'}), 400
+    versions = data.get('versions') or {}
+    try:
+        versions = {int(order_id): version for order_id, version in versions.items()}
+    except (AttributeError, ValueError):
+        versions = None
+    if versions is None or not all(isinstance(v, int) and not isinstance(v, bool) for v in versions.values()):
+        return jsonify({'error': 'versions must map order ids to integer versions'}), 400
+    day = None
+    if data.get('date'):
+        try:
+            day = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    if order_ids is None and day is None:
+        return jsonify({'error': 'order_ids or date is required'}), 400
+
+    results = transition_orders(target, order_ids=order_ids, day=day,
+                                slot=data.get('slot') or None, zone=data.get('zone') or None, versions=versions)
+    return jsonify({
+        'status': target.value,
+        'updated': sum(1 for result in results if result.outcome == UPDATED),
+        'results': [{
+            'id': result.order_id,
+            'previous': result.previous.value if result.previous else None,
+            'status': result.status.value if result.status else None,
+            'outcome': result.outcome
+        } for result in results]
+    })
 
 @bp.route('/meals')
+@conditional(*CATALOG_TABLES, versions=catalog.versions)
 def get_meals():
-    meals = Meal.query.all()
-    return jsonify([{
-        'id': meal.id,
-        'name': meal.name,
-        'description': meal.description,
-        'price': meal.price,
-        'image_url': meal.image_url,
-        'is_available': meal.is_available
-    } for meal in meals])
+    snapshot = catalog.get()
+    
+    def build_page():
+        meals, next_cursor = paginate_sorted(snapshot.api_rows, snapshot.keys)
+        return current_app.json.dumps({'meals': meals, 'next_cursor': next_cursor})
+    
+    # First pages are what every client polls; serve them pre-serialized
+    if request.args.get('cursor'):
+        body = build_page()
+    else:
+        body = snapshot.page_json(get_limit(), build_page)
+    return current_app.response_class(body + '\n', mimetype='application/json')
+
+@bp.route('/meals/search')
+def search_meal_catalog():
+    """Available meals matching ``q`` by name, description or category, best first."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    return jsonify({'meals': search_meals(query, get_limit())})
+
+@bp.route('/categories')
+def get_categories():
+    """Active categories in display order, with how many meals each has available."""
+    return jsonify({'categories': catalog.categories()})
+
+@bp.route('/meals/browse')
+def browse_meals():
+    """Available meals in every ``category`` given, optionally vegetarian and up to ``max_price``."""
+    meals = catalog.browse(request.args.getlist('category'), request.args.get('max_price', type=float),
+                           request.args.get('vegetarian') == '1')
+    return jsonify({'meals': meals})
+
+@bp.route('/kitchen/plan')
+@login_required
+@admin_required
+@conditional('order', 'order_item', 'meal', private=True)
+def get_production_plan():
+    """Quantities to cook per meal for ``date`` (default today) and ``days`` after it."""
+    try:
+        start = datetime.strptime(request.args['date'], '%Y-%m-%d').date() \
+            if request.args.get('date') else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    days = min(max(request.args.get('days', 1, type=int), 1), 31)
+    plan = production_plan(start, start + timedelta(days=days - 1), slot=request.args.get('slot') or None)
+    return jsonify({
+        'plan': [{
+            'delivery_date': row.delivery_date.isoformat(),
+            'delivery_time': row.delivery_time,
+            'meal_id': row.meal_id,
+            'meal_name': row.meal_name,
+            'quantity': row.quantity
+        } for row in plan]
+    })
+
+@bp.route('/dispatch/batches')
+@login_required
+@admin_required
+@conditional('order', 'order_item', 'delivery_area', private=True)
+def get_dispatch_batches():
+    """Rider batches for ``date`` (default today), optionally one ``slot``."""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() \
+            if request.args.get('date') else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    batches = plan_batches(day, slot=request.args.get('slot') or None)
+    return jsonify({
+        'batches': [{
+            'delivery_time': batch.delivery_time,
+            'zone': batch.zone,
+            'order_ids': batch.order_ids,
+            'meals': batch.meals
+        } for batch in batches]
+    })
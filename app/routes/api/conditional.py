@@ -0,0 +1,69 @@
+"""Conditional GET support for the JSON API.
+
+Validators are derived from :class:`~app.models.TableVersion` counters, which
+cost one primary-key lookup to read. When a client's ``If-None-Match`` or
+``If-Modified-Since`` still matches, the view is never called, so nothing is
+queried or serialized for an unchanged response.
+"""
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+from app.models import TableVersion
+
+
+def _validators(tables, private, versions):
+    versions = versions() if versions is not None else TableVersion.get_versions(tables)
+    scope = [request.endpoint, sorted(request.args.items(multi=True)),
+             sorted((name, version) for name, (version, _) in versions.items())]
+    if private:
+        scope += [current_user.id, current_user.is_admin]
+    etag = hashlib.sha1(repr(scope).encode('utf-8')).hexdigest()
+
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc, microsecond=0) if stamps else None
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(*tables, private=False, versions=None):
+    """Answer GETs with 304 Not Modified while ``tables`` are unchanged.
+
+    Args:
+        tables: Names of every table the response is built from.
+        private: Set for per-user responses; the ETag then also covers the
+            current user and the response is marked ``Cache-Control: private``.
+        versions: Returns the ``{table: (version, updated_at)}`` the response
+            will be built from, for views served from a cache that may lag
+            the database. Defaults to reading ``tables`` now.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            etag, last_modified = _validators(tables, private, versions)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            if private:
+                response.cache_control.private = True
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,87 @@
+"""Keyset (cursor) pagination for the JSON API.
+
+Pages are ordered newest first on ``(created_at, id)`` and continue from an
+opaque cursor that encodes the last row of the previous page. Unlike
+``Query.paginate()``, which uses OFFSET, the next page is found with an index
+range seek, so page 1000 costs the same as page 1.
+"""
+import base64
+import json
+from bisect import bisect_left
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(created_at, id):
+    """Encode the sort key of a row as an opaque URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+
+
+def get_limit():
+    """Read the ``limit`` query parameter, clamped to the configured maximum."""
+    default = current_app.config['API_PAGE_SIZE']
+    maximum = current_app.config['API_MAX_PAGE_SIZE']
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+
+def paginate(query, model):
+    """Return one page of ``query`` and the cursor for the next page.
+
+    ``model`` must have ``created_at`` and ``id`` columns, backed by a
+    composite index so the seek and the ORDER BY are served from it.
+
+    Returns:
+        tuple: ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+
+    Raises:
+        InvalidCursor: If the ``cursor`` query parameter is malformed.
+    """
+    limit = get_limit()
+    cursor = request.args.get('cursor')
+    key = tuple_(model.created_at, model.id)
+
+    if cursor:
+        query = query.filter(key < decode_cursor(cursor))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def paginate_sorted(rows, keys):
+    """Return one page of an in-memory sequence, like :func:`paginate`.
+
+    ``rows`` and ``keys`` are parallel lists sorted ascending by the
+    ``(created_at, id)`` key; pages are served newest first, exactly as the
+    database query would return them, so cursors work with either.
+    """
+    limit = get_limit()
+    cursor = request.args.get('cursor')
+    end = bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
+    start = max(0, end - limit)
+
+    page = rows[start:end][::-1]
+    next_cursor = encode_cursor(*keys[start]) if start > 0 else None
+    return page, next_cursor
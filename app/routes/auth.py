@@ -5,7 +5,7 @@ from urllib.parse import urlparse as url_parse
 from app import db, bcrypt
 from app.models.user import User
 from app.forms import LoginForm, RegistrationForm, RequestResetForm, ResetPasswordForm
-from app.utils.email import send_reset_email
+from app.utils.email import EmailQueueFull, send_reset_email
 
 bp = Blueprint('auth', __name__)
 
@@ -13,7 +13,7 @@ def admin_required(f):
     """Decorator to ensure user has admin privileges."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin:
+        if not current_user.is_authenticated or not current_user.has_permission('admin'):
             flash('You do not have permission to view this page.', 'danger')
             return redirect(url_for('main.index'))
         return f(*args, **kwargs)
@@ -33,6 +33,8 @@ def login():
         user = User.query.filter_by(email=form.email.data).first()
         
         if user and user.check_password(form.password.data):
+            # Persist a password hash upgraded by check_password
+            db.session.commit()
             login_user(user, remember=form.remember.data)
             next_page = request.args.get('next')
             
@@ -79,7 +81,11 @@ def reset_request():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         if user:
-            send_reset_email(user)
+            try:
+                send_reset_email(user)
+            except EmailQueueFull:
+                # Same response either way, so the form does not reveal accounts
+                current_app.logger.warning('Dropped password reset email: queue is full')
         flash('An email has been sent with instructions to reset your password.', 'info')
         return redirect(url_for('auth.login'))
         
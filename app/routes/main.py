@@ -1,34 +1,42 @@
+from datetime import datetime
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models.meal import Meal
 from app.models.order import Order, OrderItem
+from app.models.capacity import MealCapacity
 from app import db
+from app.utils.catalog import catalog
+from app.utils.idempotency import idempotent
+from app.utils.search import search_meals
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
 def index():
-    meals = Meal.query.filter_by(is_available=True).all()
-    return render_template('index.html', meals=meals)
+    return render_template('index.html', meals=catalog.available())
 
 @bp.route('/menu')
 def menu():
-    category = request.args.get('category')
-    query = Meal.query.filter_by(is_available=True)
-    
-    if category:
-        query = query.filter_by(category=category)
-        
-    meals = query.all()
-    return render_template('menu.html', meals=meals, active_category=category)
+    query = request.args.get('q', '').strip()
+    categories = request.args.getlist('category')
+    max_price = request.args.get('max_price', type=float)
+    vegetarian = request.args.get('vegetarian') == '1'
+    if query:
+        meals = search_meals(query)
+    else:
+        meals = catalog.browse(categories, max_price, vegetarian)
+    return render_template('menu.html', meals=meals, categories=catalog.categories(),
+                           active_category=request.args.get('category'), active_categories=categories,
+                           max_price=max_price, vegetarian=vegetarian, query=query)
 
 @bp.route('/order/<int:meal_id>', methods=['GET', 'POST'])
 @login_required
+@idempotent()
 def order(meal_id):
     meal = Meal.query.get_or_404(meal_id)
     
     if request.method == 'POST':
-        quantity = int(request.form.get('quantity', 1))
+        quantity = request.form.get('quantity', 1, type=int)
         delivery_date = request.form.get('delivery_date')
         delivery_time = request.form.get('delivery_time')
         delivery_address = request.form.get('delivery_address')
@@ -36,6 +44,20 @@ def order(meal_id):
         if not all([delivery_date, delivery_time, delivery_address]):
             flash('Please fill in all delivery details', 'danger')
             return redirect(url_for('main.order', meal_id=meal_id))
+        try:
+            delivery_date = datetime.strptime(delivery_date, '%Y-%m-%d').date()
+        except ValueError:
+            flash('Please choose a valid delivery date', 'danger')
+            return redirect(url_for('main.order', meal_id=meal_id))
+        if not quantity or quantity < 1:
+            flash('Please order at least one meal', 'danger')
+            return redirect(url_for('main.order', meal_id=meal_id))
+        
+        # Take the portions first: one conditional UPDATE, committed with the order
+        if not MealCapacity.reserve(db.session.connection(), meal.id, delivery_date, delivery_time, quantity):
+            db.session.rollback()
+            flash(f'Sorry, {meal.name} is sold out for that delivery.', 'danger')
+            return redirect(url_for('main.order', meal_id=meal_id))
         
         # Create new order
         order = Order(
@@ -66,17 +88,18 @@ def order(meal_id):
 @bp.route('/orders')
 @login_required
 def orders():
-    orders = Order.query.filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).all()
+    orders = Order.with_items().filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).all()
     return render_template('orders.html', orders=orders)
 
 @bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     if request.method == 'POST':
-        current_user.first_name = request.form.get('first_name', '')
-        current_user.last_name = request.form.get('last_name', '')
-        current_user.phone = request.form.get('phone', '')
-        current_user.address = request.form.get('address', '')
+        user = current_user.get_user()
+        user.first_name = request.form.get('first_name', '')
+        user.last_name = request.form.get('last_name', '')
+        user.phone = request.form.get('phone', '')
+        user.address = request.form.get('address', '')
         
         db.session.commit()
         flash('Profile updated successfully!', 'success')
@@ -0,0 +1,129 @@
+"""Write-behind tracking of when users were last seen.
+
+Recording activity used to mean a commit on every authenticated request,
+which on SQLite serializes all traffic behind the single writer. Instead,
+requests record the timestamp in an in-memory buffer, and the buffer is
+written with one executemany UPDATE once it holds ``ACTIVITY_FLUSH_SIZE``
+users or ``ACTIVITY_FLUSH_INTERVAL`` seconds have passed since the last write.
+
+Timestamps that have not been flushed yet are still visible through
+:meth:`ActivityTracker.last_seen`. Flushes only happen on requests, plus
+once when the process exits cleanly (``ACTIVITY_FLUSH_AT_EXIT``). A flush that fails, for example
+with "database is locked", is logged and the timestamps stay buffered
+for the next one. A crash loses whatever was buffered since the last
+flush, which is acceptable for a "last seen" indicator.
+"""
+import atexit
+import threading
+import time
+import weakref
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, case, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import User
+
+
+class _ActivityState:
+    """Per-application buffer of unflushed timestamps."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        self.flush_at_exit = False
+
+
+class ActivityTracker:
+    """Flask extension that buffers ``User.last_seen`` updates."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ACTIVITY_FLUSH_INTERVAL', 60)
+        app.config.setdefault('ACTIVITY_FLUSH_SIZE', 500)
+        app.config.setdefault('ACTIVITY_FLUSH_AT_EXIT', True)
+        app.extensions['activity_tracker'] = _ActivityState(app)
+
+    def _state(self):
+        return current_app.extensions['activity_tracker']
+
+    def touch(self, user_id, when=None):
+        """Record activity for ``user_id``, flushing the buffer if it is due."""
+        state = self._state()
+        with state.lock:
+            state.pending[user_id] = when or datetime.utcnow()
+            due = (len(state.pending) >= current_app.config['ACTIVITY_FLUSH_SIZE'] or
+                   time.monotonic() - state.last_flush >= current_app.config['ACTIVITY_FLUSH_INTERVAL'])
+            register = not state.flush_at_exit and current_app.config['ACTIVITY_FLUSH_AT_EXIT']
+            state.flush_at_exit = True
+        if register:
+            # Write what is still buffered when the process exits, if the app is still around
+            atexit.register(self._flush_at_exit, weakref.ref(state))
+        if due:
+            self.flush()
+
+    def last_seen(self, user):
+        """Return the most recent activity for ``user``, flushed or not."""
+        with self._state().lock:
+            pending = self._state().pending.get(user.id)
+        if pending is None or (user.last_seen is not None and user.last_seen > pending):
+            return user.last_seen
+        return pending
+
+    def flush(self):
+        """Write all buffered timestamps in one executemany UPDATE.
+
+        Database errors are logged, not raised, and the timestamps stay
+        buffered, so a busy database never fails the request that flushes.
+
+        Returns:
+            int: The number of users written.
+        """
+        state = self._state()
+        with state.lock:
+            pending, state.pending = state.pending, {}
+            state.last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        table = User.__table__
+        seen = bindparam('seen')
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('user_id'))
+            # Never move last_seen backwards when several workers flush
+            .values(last_seen=case(
+                (table.c.last_seen.is_(None) | (table.c.last_seen < seen), seen),
+                else_=table.c.last_seen
+            ))
+        )
+        try:
+            # A separate transaction, so flushing never joins the request's
+            with db.engine.begin() as connection:
+                connection.execute(statement, [
+                    {'user_id': user_id, 'seen': when} for user_id, when in pending.items()
+                ])
+        except SQLAlchemyError as error:
+            # Put the timestamps back for the next attempt unless newer ones arrived
+            with state.lock:
+                for user_id, when in pending.items():
+                    state.pending.setdefault(user_id, when)
+            current_app.logger.warning('Activity flush of %d users failed: %s', len(pending), error)
+            return 0
+        return len(pending)
+
+    def _flush_at_exit(self, state_ref):
+        state = state_ref()
+        if state is not None and state.pending:
+            with state.app.app_context():
+                self.flush()
+
+
+activity = ActivityTracker()
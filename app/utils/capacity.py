@@ -0,0 +1,39 @@
+"""Kitchen capacity commands: set and list portions per meal, date and slot."""
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+
+from app import db
+from app.models import Meal, MealCapacity
+
+capacity_cli = AppGroup('capacity', help='Portions the kitchen can cook per meal, date and slot.')
+
+
+@capacity_cli.command('set')
+@click.argument('meal_id', type=int)
+@click.argument('day', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.argument('slot')
+@click.argument('portions', type=click.IntRange(min=0))
+def set_capacity(meal_id, day, slot, portions):
+    """Allow PORTIONS of MEAL_ID on DAY (YYYY-MM-DD) in SLOT."""
+    if db.session.get(Meal, meal_id) is None:
+        raise click.ClickException(f'No meal with id {meal_id}.')
+    remaining = MealCapacity.set_capacity(db.session.connection(), meal_id, day.date(), slot, portions)
+    db.session.commit()
+    click.echo(f'Meal {meal_id} on {day:%Y-%m-%d} {slot}: {portions} portions, {remaining} left to sell.')
+
+
+@capacity_cli.command('show')
+@click.argument('day', type=click.DateTime(formats=['%Y-%m-%d']))
+def show_capacity(day):
+    """List the limits set for DAY (YYYY-MM-DD)."""
+    rows = db.session.execute(
+        select(MealCapacity.delivery_time, Meal.name, MealCapacity.capacity, MealCapacity.remaining)
+        .join(Meal, Meal.id == MealCapacity.meal_id)
+        .where(MealCapacity.delivery_date == day.date())
+        .order_by(MealCapacity.delivery_time, Meal.name)
+    ).all()
+    if not rows:
+        click.echo('No limits set; every meal is unlimited.')
+    for slot, name, capacity, remaining in rows:
+        click.echo(f'{slot:<12} {name:<30} {capacity - remaining:>5} of {capacity:>5} sold')
@@ -0,0 +1,270 @@
+"""In-process cache of the meal catalog.
+
+The menu is read on almost every page view but changes a couple of times a
+day, so the available meals, their per-category slices and the serialized
+API bodies are built once and reused until either the TTL expires or a
+``Meal``, ``MealCategory`` or ``meal_categories`` row changes.
+
+Every snapshot records the ``table_version`` counters of those tables as
+they were when it was loaded. :meth:`MenuCatalog.get` compares them with the
+current counters (one primary-key read, once per request) and rebuilds on a
+mismatch, so writes made by other worker processes are picked up on the
+next request and the ``/api/v1/meals`` ETag always describes the body served.
+
+Each snapshot also maps every active ``MealCategory`` to the ids of its
+available meals. The map is read from the ``meal_categories`` association
+table. :meth:`MenuCatalog.browse` answers multi-category filters such as
+"Vegan and Jain, up to 100" by intersecting those id sets, smallest
+first, so no request joins the association table.
+
+Invalidation is driven by SQLAlchemy events: mapper ``after_insert``,
+``after_update`` and ``after_delete`` for the two models, collection events
+for the association table, and DML statements run through the session. The cache is
+dropped when the change is flushed and again when it is committed, so a
+reader that rebuilt in between cannot keep a pre-commit view. These only see
+this process's writes; the version check above covers the rest.
+"""
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Meal, MealCategory, TableVersion, meal_categories
+
+CATALOG_TABLES = frozenset({'meal', 'meal_category', 'meal_categories'})
+
+API_FIELDS = ('id', 'name', 'description', 'price', 'image_url', 'is_available')
+
+
+class CatalogSnapshot:
+    """An immutable view of the catalog at one point in time."""
+
+    def __init__(self, meals, generation, expires_at, categories=(), links=(), versions=None):
+        self.generation = generation
+        self.expires_at = expires_at
+        # {table: (version, updated_at)} read before the rows were loaded
+        self.versions = versions or {}
+
+        # API order: ascending (created_at, id) so pages can be bisected
+        ordered = sorted(meals, key=_sort_key)
+        self.keys = [_sort_key(meal) for meal in ordered]
+        self.api_rows = [{field: getattr(meal, field) for field in API_FIELDS}
+                         for meal in ordered]
+
+        # Menu order: available meals by id, as the unfiltered query returns them
+        self.available = [meal.to_dict() for meal in sorted(meals, key=lambda m: m.id)
+                          if meal.is_available]
+        self.by_category = {}
+        for meal in self.available:
+            self.by_category.setdefault(meal['category'], []).append(meal)
+
+        # Category browsing: id sets per active category, legacy string and flag
+        self.by_id = {meal['id']: meal for meal in self.available}
+        self.meal_ids = {category.id: set() for category in categories}
+        for category_id, meal_id in links:
+            if meal_id in self.by_id and category_id in self.meal_ids:
+                self.meal_ids[category_id].add(meal_id)
+        self.meal_ids = {category_id: frozenset(ids) for category_id, ids in self.meal_ids.items()}
+        self.category_ids = {category.name.lower(): category.id for category in categories}
+        self.categories = [{
+            'id': category.id,
+            'name': category.name,
+            'description': category.description,
+            'meal_count': len(self.meal_ids[category.id]),
+        } for category in categories]
+        self.legacy_ids = {name: frozenset(meal['id'] for meal in meals)
+                           for name, meals in self.by_category.items()}
+        self.vegetarian_ids = frozenset(meal['id'] for meal in self.available if meal['is_vegetarian'])
+        by_price = sorted(self.available, key=lambda meal: (meal['price'], meal['id']))
+        self.prices = [meal['price'] for meal in by_price]
+        self.ids_by_price = [meal['id'] for meal in by_price]
+
+        self._pages = {}
+
+    def browse(self, categories=(), max_price=None, vegetarian=False):
+        """Available meals in every one of ``categories`` and within the filters, in menu order.
+
+        A name that is not an active ``MealCategory`` falls back to the
+        legacy ``Meal.category`` string. Unknown names match nothing.
+        """
+        sets = []
+        for name in categories:
+            category_id = self.category_ids.get(name.lower())
+            sets.append(self.meal_ids[category_id] if category_id is not None
+                        else self.legacy_ids.get(name, frozenset()))
+        if vegetarian:
+            sets.append(self.vegetarian_ids)
+
+        if max_price is not None:
+            # Meals within the price are a prefix of the price-sorted ids
+            sets.append(self.ids_by_price[:bisect_right(self.prices, max_price)])
+        if not sets:
+            return self.available
+        sets.sort(key=len)
+        ids = frozenset(sets[0]).intersection(*sets[1:])
+        return [self.by_id[meal_id] for meal_id in sorted(ids)]
+
+    def page_json(self, limit, build):
+        """Return the serialized first page for ``limit``, building it once."""
+        body = self._pages.get(limit)
+        if body is None:
+            body = self._pages[limit] = build()
+        return body
+
+
+def _sort_key(meal):
+    return (meal.created_at or datetime.min, meal.id)
+
+
+class _CatalogState:
+    """Per-application cache slot."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.generation = 0
+
+    def invalidate(self):
+        with self.lock:
+            self.snapshot = None
+            self.generation += 1
+
+
+def _forget_request_snapshot(exc):
+    # g can outlive the request when an app context was already pushed
+    g.pop('catalog_snapshot', None)
+
+
+class MenuCatalog:
+    """Flask extension holding one catalog snapshot per application."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOG_CACHE_TTL', 300)
+        app.extensions['menu_catalog'] = _CatalogState()
+        app.teardown_request(_forget_request_snapshot)
+
+    def _state(self):
+        return current_app.extensions['menu_catalog']
+
+    def get(self):
+        """Return the current snapshot, rebuilding it if stale.
+
+        Within a request the snapshot is checked against ``table_version``
+        once and then reused, so every part of a response sees the same one.
+        """
+        state = self._state()
+        snapshot = state.snapshot
+        if (has_request_context() and snapshot is not None and g.get('catalog_snapshot') is snapshot
+                and snapshot.expires_at > time.monotonic()):
+            return snapshot
+
+        versions = TableVersion.get_versions(CATALOG_TABLES)
+        if snapshot is None or snapshot.expires_at <= time.monotonic() or snapshot.versions != versions:
+            snapshot = self._load(state, versions)
+        if has_request_context():
+            g.catalog_snapshot = snapshot
+        return snapshot
+
+    def _load(self, state, versions):
+        with state.lock:
+            generation = state.generation
+        meals = Meal.query.all()
+        categories = MealCategory.get_active_categories()
+        # Served from ix_meal_categories_category_id_meal_id alone
+        links = db.session.execute(
+            select(meal_categories.c.category_id, meal_categories.c.meal_id)
+            .where(meal_categories.c.category_id.in_([category.id for category in categories]))
+        ).all() if categories else []
+        snapshot = CatalogSnapshot(
+            meals, generation,
+            time.monotonic() + current_app.config['CATALOG_CACHE_TTL'],
+            categories, links, versions
+        )
+        with state.lock:
+            # Only publish if nothing was invalidated while we were loading
+            if state.generation == generation:
+                state.snapshot = snapshot
+        return snapshot
+
+    def versions(self, tables=CATALOG_TABLES):
+        """``table_version`` counters of the snapshot :meth:`get` serves.
+
+        Pass as ``versions=`` to :func:`~app.routes.api.conditional.conditional`
+        so the ETag describes the cached body rather than the database.
+        """
+        versions = self.get().versions
+        return {name: versions[name] for name in tables}
+
+    def available(self):
+        """Available meals as dicts, in menu order."""
+        return self.get().available
+
+    def category(self, name):
+        """Available meals in ``name``, in menu order."""
+        return self.get().by_category.get(name, [])
+
+    def categories(self):
+        """Active categories in display order, with their available meal counts."""
+        return self.get().categories
+
+    def browse(self, categories=(), max_price=None, vegetarian=False):
+        """Available meals matching every filter; see :meth:`CatalogSnapshot.browse`."""
+        return self.get().browse(categories, max_price, vegetarian)
+
+    def invalidate(self):
+        """Drop the cached snapshot for the current application."""
+        if has_app_context() and 'menu_catalog' in current_app.extensions:
+            self._state().invalidate()
+
+
+catalog = MenuCatalog()
+
+
+def _changed(session=None):
+    """Invalidate now and remember to invalidate again when ``session`` ends."""
+    if session is not None:
+        session.info['catalog_changed'] = True
+    catalog.invalidate()
+
+
+def _on_row_change(mapper, connection, target):
+    _changed(object_session(target))
+
+
+def _on_collection_change(state, *args):
+    _changed(state.session)
+
+
+for _model in (Meal, MealCategory):
+    for _name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _name, _on_row_change)
+
+# meal_categories rows are written from these two collections
+for _collection in (Meal.categories, MealCategory.meals):
+    for _name in ('append', 'remove', 'bulk_replace'):
+        event.listen(_collection, _name, _on_collection_change, raw=True)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    """Catch bulk and Core DML statements that bypass the mapper events."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in CATALOG_TABLES:
+            _changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _on_transaction_end(session):
+    if session.info.pop('catalog_changed', False):
+        catalog.invalidate()
@@ -0,0 +1,113 @@
+"""Delivery batching: group a day's confirmed orders into rider runs.
+
+Orders carry a ``delivery_zone`` resolved from ``DeliveryArea`` when they
+are placed (see ``app.models.delivery``). :func:`plan_batches` reads one
+day's ``CONFIRMED`` orders in a single query over
+``ix_order_delivery_date_status_time``, taking meal counts from the covering
+order item index. It buckets the orders by slot and zone, then fills
+riders in address order up to ``DISPATCH_RIDER_CAPACITY`` meals and
+``DISPATCH_MAX_STOPS`` stops. Orders placed before their area was known
+are zoned in memory from one read of the area table. Nothing is queried
+per order or per rider.
+"""
+import csv
+from collections import namedtuple
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+
+from app import db
+from app.models import DeliveryArea, Order, OrderItem, OrderStatus
+from app.models.delivery import PINCODE, normalize_locality
+
+# Orders whose address matched no area
+UNZONED = 'unzoned'
+
+Batch = namedtuple('Batch', 'delivery_time zone order_ids meals')
+
+
+def plan_batches(day, slot=None, capacity=None, max_stops=None):
+    """Return the rider batches for ``day``, ordered by slot and zone.
+
+    An order with more meals than ``capacity`` rides alone.
+    """
+    capacity = capacity or current_app.config['DISPATCH_RIDER_CAPACITY']
+    max_stops = max_stops or current_app.config['DISPATCH_MAX_STOPS']
+    meals = (
+        select(func.coalesce(func.sum(OrderItem.quantity), 0))
+        .where(OrderItem.order_id == Order.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(Order.id, Order.delivery_time, Order.delivery_zone, Order.delivery_address, meals)
+        .where(Order.delivery_date == day, Order.status == OrderStatus.CONFIRMED)
+    )
+    if slot:
+        statement = statement.where(Order.delivery_time == slot)
+
+    buckets = {}
+    resolve = None
+    # Plain rows on the session's connection; ORM result processing doubles the time
+    for order_id, delivery_time, zone, address, meals in db.session.connection().execute(statement):
+        if zone is None:
+            resolve = resolve or DeliveryArea.resolver()
+            zone = resolve(address)
+        # Orders sharing a pincode or street stay next to each other in a run
+        match = PINCODE.search(address)
+        stop_key = (match.group(1) if match else '', address.lower())
+        buckets.setdefault((delivery_time, zone or UNZONED), []).append((stop_key, order_id, meals))
+
+    batches = []
+    for (delivery_time, zone), stops in sorted(buckets.items()):
+        stops.sort()
+        order_ids, load = [], 0
+        for _, order_id, meals in stops:
+            if order_ids and (load + meals > capacity or len(order_ids) == max_stops):
+                batches.append(Batch(delivery_time, zone, order_ids, load))
+                order_ids, load = [], 0
+            order_ids.append(order_id)
+            load += meals
+        batches.append(Batch(delivery_time, zone, order_ids, load))
+    return batches
+
+
+dispatch_cli = AppGroup('dispatch', help='Delivery zones and rider batches.')
+
+
+@dispatch_cli.command('load-areas')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--replace', is_flag=True, help='Delete the existing areas first.')
+def load_areas(path, replace):
+    """Load delivery areas from a CSV with pincode, locality and zone columns."""
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = [{
+            'pincode': (row.get('pincode') or '').strip() or None,
+            'locality': normalize_locality(row.get('locality') or '') or None,
+            'zone': row['zone'].strip(),
+        } for row in csv.DictReader(file)]
+    if replace:
+        db.session.execute(DeliveryArea.__table__.delete())
+    if rows:
+        db.session.execute(DeliveryArea.__table__.insert(), rows)
+    db.session.commit()
+    click.echo(f'Loaded {len(rows)} delivery areas.')
+
+
+@dispatch_cli.command('rezone')
+@click.option('--all', 'everything', is_flag=True, help='Re-zone every order, not only unzoned ones.')
+def rezone(everything):
+    """Resolve ``delivery_zone`` for existing orders from the area table."""
+    resolve = DeliveryArea.resolver()
+    query = select(Order.id, Order.version, Order.delivery_address)
+    if not everything:
+        query = query.where(Order.delivery_zone.is_(None))
+    # Orders are versioned: each row's UPDATE matches and bumps its version
+    changes = [{'id': order_id, 'version': version, 'delivery_zone': resolve(address)}
+               for order_id, version, address in db.session.execute(query)]
+    if changes:
+        db.session.execute(update(Order), changes)
+    db.session.commit()
+    zoned = sum(1 for change in changes if change['delivery_zone'])
+    click.echo(f'Zoned {zoned} of {len(changes)} orders.')
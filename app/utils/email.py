@@ -1,22 +1,287 @@
-from flask import render_template, current_app
-from flask_mail import Message
+"""Outbound email through a bounded worker pool.
+
+Messages are put on a bounded queue and sent by a fixed number of worker
+threads. Each worker drains up to ``EMAIL_BATCH_SIZE`` messages and sends
+them over one ``mail.connect()`` SMTP connection, so a burst of password
+resets costs a handful of TLS handshakes rather than one thread and one
+connection per message.
+
+When the queue is full, :meth:`EmailQueue.send` blocks for up to
+``EMAIL_ENQUEUE_TIMEOUT`` seconds and then raises :class:`EmailQueueFull`.
+Transient failures (4xx replies, dropped connections) are retried up to
+``EMAIL_MAX_RETRIES`` times, waiting ``EMAIL_RETRY_BACKOFF * 2 ** attempt``
+seconds between attempts; permanent ones (5xx replies, malformed messages)
+are logged and dropped. :meth:`EmailQueue.stats` exposes queue depth and
+counters for monitoring.
+"""
+import atexit
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+
+from flask import render_template, current_app, url_for
+from flask_mail import BadHeaderError, Message
 from app import mail
-from threading import Thread
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+# Raised by Flask-Mail for messages that can never be sent as they are
+PERMANENT_ERRORS = (AssertionError, BadHeaderError, smtplib.SMTPRecipientsRefused)
+
+
+class EmailQueueFull(RuntimeError):
+    """Raised when the outbound queue stays full for ``EMAIL_ENQUEUE_TIMEOUT``."""
+
+
+class _Job:
+    """A queued message and how many times sending it has failed."""
+
+    __slots__ = ('message', 'attempts')
+
+    def __init__(self, message):
+        self.message = message
+        self.attempts = 0
+
+
+class _EmailState:
+    """Per-application queue, retry schedule, workers and counters."""
+
+    def __init__(self, app):
+        self.app = app
+        self.queue = queue.Queue(maxsize=app.config['EMAIL_QUEUE_SIZE'])
+        self.lock = threading.Condition()
+        self.retries = []  # heap of (due, sequence, job)
+        self.sequence = itertools.count()
+        self.workers = []
+        self.stopping = False
+        self.outstanding = 0
+        self.counters = {
+            'enqueued': 0, 'sent': 0, 'failed': 0, 'retried': 0,
+            'rejected': 0, 'batches': 0, 'connections': 0
+        }
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def finish(self, counter):
+        """Record a job's final outcome."""
+        with self.lock:
+            self.counters[counter] += 1
+            self.outstanding -= 1
+            self.lock.notify_all()
+
+    def due_retries(self, limit):
+        """Pop up to ``limit`` retries whose backoff has elapsed."""
+        now = time.monotonic()
+        jobs = []
+        with self.lock:
+            while self.retries and len(jobs) < limit and self.retries[0][0] <= now:
+                jobs.append(heapq.heappop(self.retries)[2])
+        return jobs
+
+    def next_retry_in(self, default):
+        with self.lock:
+            if not self.retries:
+                return default
+            return max(0.0, min(default, self.retries[0][0] - time.monotonic()))
+
+
+class EmailQueue:
+    """Flask extension sending mail from a bounded pool of worker threads."""
+
+    # How often idle workers wake up to check for due retries and shutdown
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EMAIL_WORKERS', 2)
+        app.config.setdefault('EMAIL_QUEUE_SIZE', 1000)
+        app.config.setdefault('EMAIL_BATCH_SIZE', 50)
+        app.config.setdefault('EMAIL_ENQUEUE_TIMEOUT', 5)
+        app.config.setdefault('EMAIL_MAX_RETRIES', 3)
+        app.config.setdefault('EMAIL_RETRY_BACKOFF', 2.0)
+        app.extensions['email_queue'] = _EmailState(app)
+
+    def _state(self):
+        return current_app.extensions['email_queue']
+
+    def send(self, message):
+        """Queue ``message`` for delivery.
+
+        Raises:
+            EmailQueueFull: If no slot frees up within ``EMAIL_ENQUEUE_TIMEOUT``.
+        """
+        state = self._state()
+        self._start_workers(state)
+        with state.lock:
+            state.outstanding += 1
+        try:
+            state.queue.put(_Job(message), timeout=current_app.config['EMAIL_ENQUEUE_TIMEOUT'])
+        except queue.Full:
+            state.finish('rejected')
+            raise EmailQueueFull(f'Email queue is full ({state.queue.maxsize} messages).')
+        state.count('enqueued')
+
+    def stats(self):
+        """Return queue depth, worker count and running counters.
+
+        Counters are ``enqueued``, ``sent``, ``failed`` (dropped after a
+        permanent error or the last retry), ``retried``, ``rejected`` (queue
+        full), ``batches`` and SMTP ``connections`` opened.
+        """
+        state = self._state()
+        with state.lock:
+            return {
+                'queued': state.queue.qsize(),
+                'capacity': state.queue.maxsize,
+                'retrying': len(state.retries),
+                'outstanding': state.outstanding,
+                'workers': sum(worker.is_alive() for worker in state.workers),
+                **state.counters
+            }
+
+    def wait(self, timeout=None):
+        """Block until every queued message is sent or dropped.
+
+        Returns:
+            bool: False if ``timeout`` seconds passed first.
+        """
+        state = self._state()
+        with state.lock:
+            return state.lock.wait_for(lambda: state.outstanding == 0, timeout)
+
+    def shutdown(self, timeout=10):
+        """Send what is queued, then stop the workers."""
+        self._shutdown(self._state(), timeout)
+
+    def _start_workers(self, state):
+        with state.lock:
+            if state.workers or state.stopping:
+                return
+            for number in range(state.app.config['EMAIL_WORKERS']):
+                worker = threading.Thread(
+                    target=self._run, args=(state,), name=f'email-worker-{number}', daemon=True
+                )
+                worker.start()
+                state.workers.append(worker)
+        # Deliver what is still queued when the process exits
+        atexit.register(self._shutdown, state, 10)
+
+    def _shutdown(self, state, timeout):
+        with state.lock:
+            if not state.workers:
+                return
+            state.lock.wait_for(lambda: state.outstanding == 0, timeout)
+            state.stopping = True
+            workers, state.workers = state.workers, []
+        for _ in workers:
+            # Wake idle workers so they notice they are stopping
+            try:
+                state.queue.put_nowait(None)
+            except queue.Full:
+                break
+        for worker in workers:
+            worker.join(timeout)
+
+    def _run(self, state):
+        with state.app.app_context():
+            while not state.stopping:
+                batch = self._next_batch(state)
+                if batch:
+                    self._send_batch(state, batch)
+
+    def _next_batch(self, state):
+        """Wait for work, then take up to ``EMAIL_BATCH_SIZE`` messages."""
+        size = state.app.config['EMAIL_BATCH_SIZE']
+        batch = state.due_retries(size)
+        if not batch:
+            try:
+                batch.append(state.queue.get(timeout=state.next_retry_in(self.POLL_INTERVAL)))
+            except queue.Empty:
+                return state.due_retries(size)
+        while len(batch) < size:
+            try:
+                batch.append(state.queue.get_nowait())
+            except queue.Empty:
+                break
+        # None is the shutdown wake-up
+        return [job for job in batch if job is not None]
+
+    def _send_batch(self, state, batch):
+        state.count('batches')
+        pending = list(batch)
+        try:
+            connection = mail.connect()
+            with connection:
+                state.count('connections')
+                while pending:
+                    job = pending[0]
+                    try:
+                        connection.send(job.message)
+                    except PERMANENT_ERRORS as exc:
+                        pending.pop(0)
+                        self._drop(state, job, exc)
+                    except smtplib.SMTPResponseException as exc:
+                        pending.pop(0)
+                        if exc.smtp_code >= 500:
+                            self._drop(state, job, exc)
+                        else:
+                            self._retry(state, job, exc)
+                    else:
+                        pending.pop(0)
+                        state.finish('sent')
+        except (smtplib.SMTPException, OSError) as exc:
+            # Connecting failed or the connection dropped; retry what is left
+            for job in pending:
+                self._retry(state, job, exc)
+        except Exception as exc:
+            # Keep the worker alive whatever the mail backend raises
+            for job in pending:
+                self._drop(state, job, exc)
+
+    def _retry(self, state, job, exc):
+        if job.attempts >= state.app.config['EMAIL_MAX_RETRIES']:
+            self._drop(state, job, exc)
+            return
+        job.attempts += 1
+        delay = state.app.config['EMAIL_RETRY_BACKOFF'] * 2 ** (job.attempts - 1)
+        with state.lock:
+            heapq.heappush(state.retries, (time.monotonic() + delay, next(state.sequence), job))
+            state.counters['retried'] += 1
+        state.app.logger.warning('Email to %s failed (%s); retrying in %.1fs',
+                                 job.message.recipients, exc, delay)
+
+    def _drop(self, state, job, exc):
+        state.app.logger.error('Giving up on email to %s after %d attempt(s): %s',
+                               job.message.recipients, job.attempts + 1, exc)
+        state.finish('failed')
+
+
+email_queue = EmailQueue()
+
+
+def send_email(subject, recipients, body, sender=None):
+    """Build a plain-text message and queue it for delivery."""
+    msg = Message(subject,
+                  sender=sender or current_app.config['MAIL_DEFAULT_SENDER'],
+                  recipients=recipients)
+    msg.body = body
+    email_queue.send(msg)
+    return msg
+
 
 def send_reset_email(user):
     token = user.get_reset_token()
-    msg = Message('Password Reset Request',
-                  sender=current_app.config['MAIL_USERNAME'],
-                  recipients=[user.email])
-    msg.body = f'''To reset your password, visit the following link:
+    return send_email('Password Reset Request',
+                      recipients=[user.email],
+                      sender=current_app.config['MAIL_USERNAME'],
+                      body=f'''To reset your password, visit the following link:
 {url_for('auth.reset_token', token=token, _external=True)}
 
 If you did not make this request, please ignore this email.
-'''
-    
-    # Send email asynchronously
-    Thread(target=send_async_email, args=(current_app._get_current_object(), msg)).start()
+''')
@@ -0,0 +1,147 @@
+"""Streaming order export for admin and accounting.
+
+Orders, their items and their payments are read as three flat column
+projections, each ordered by order id and fetched from the database in
+``yield_per`` batches. The item and payment streams are merged onto the order
+stream in a single pass, so memory use depends on the batch size and not on
+the number of orders.
+"""
+import csv
+import io
+import json
+from itertools import groupby
+from operator import attrgetter
+
+from sqlalchemy import select
+
+from app import db
+from app.models import User, Order, OrderItem, Meal, Payment, PaymentStatus
+
+CSV_COLUMNS = [
+    'order_id', 'created_at', 'username', 'email', 'status',
+    'delivery_date', 'delivery_time', 'delivery_address', 'total_amount',
+    'amount_paid', 'payment_status',
+    'item_id', 'meal_id', 'meal_name', 'quantity', 'unit_price', 'line_total'
+]
+
+
+class _ChildStream:
+    """Hands out the rows of an order-id-ordered result one order at a time."""
+
+    def __init__(self, rows):
+        self._groups = groupby(rows, key=attrgetter('order_id'))
+        self._current = next(self._groups, None)
+
+    def take(self, order_id):
+        """Return the rows belonging to ``order_id`` and advance past them."""
+        while self._current is not None and self._current[0] < order_id:
+            self._current = next(self._groups, None)
+        if self._current is None or self._current[0] != order_id:
+            return []
+        rows = list(self._current[1])
+        self._current = next(self._groups, None)
+        return rows
+
+
+def _stream(statement, batch_size):
+    return db.session.execute(statement.execution_options(yield_per=batch_size))
+
+
+def iter_orders(batch_size=1000):
+    """Yield every order as a plain dict with its ``items`` and ``payments``."""
+    orders = _stream(
+        select(
+            Order.id, Order.created_at, User.username, User.email, Order.status,
+            Order.delivery_date, Order.delivery_time, Order.delivery_address,
+            Order.total_amount
+        ).join(User, Order.user_id == User.id).order_by(Order.id),
+        batch_size
+    )
+    items = _ChildStream(_stream(
+        select(
+            OrderItem.order_id, OrderItem.id, OrderItem.meal_id, Meal.name,
+            OrderItem.quantity, Meal.price
+        ).outerjoin(Meal, OrderItem.meal_id == Meal.id)
+        # Index order of ix_order_item_order_id_meal_id_quantity, so nothing is sorted
+        .order_by(OrderItem.order_id, OrderItem.meal_id, OrderItem.quantity, OrderItem.id),
+        batch_size
+    ))
+    payments = _ChildStream(_stream(
+        select(
+            Payment.order_id, Payment.id, Payment.amount, Payment.status,
+            Payment.payment_method, Payment.transaction_id, Payment.payment_date
+        ).order_by(Payment.order_id, Payment.id),
+        batch_size
+    ))
+
+    for row in orders:
+        yield {
+            'id': row.id,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'username': row.username,
+            'email': row.email,
+            'status': row.status.value if row.status else None,
+            'delivery_date': row.delivery_date.isoformat() if row.delivery_date else None,
+            'delivery_time': row.delivery_time,
+            'delivery_address': row.delivery_address,
+            'total_amount': row.total_amount,
+            'items': [{
+                'id': item.id,
+                'meal_id': item.meal_id,
+                'meal_name': item.name,
+                'quantity': item.quantity,
+                'unit_price': item.price or 0,
+                'total_price': (item.price or 0) * item.quantity
+            } for item in items.take(row.id)],
+            'payments': [{
+                'id': payment.id,
+                'amount': payment.amount,
+                'status': payment.status.value if payment.status else None,
+                'payment_method': payment.payment_method,
+                'transaction_id': payment.transaction_id,
+                'payment_date': payment.payment_date.isoformat() if payment.payment_date else None
+            } for payment in payments.take(row.id)]
+        }
+
+
+def generate_ndjson(batch_size=1000):
+    """Yield one JSON document per order, newline terminated."""
+    for order in iter_orders(batch_size):
+        yield json.dumps(order, separators=(',', ':')) + '\n'
+
+
+def generate_csv(batch_size=1000):
+    """Yield CSV text with one line per order item.
+
+    Order and payment fields are repeated on every item line; orders without
+    items get a single line with the item columns left empty.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+
+    for count, order in enumerate(iter_orders(batch_size), 1):
+        completed = [p for p in order['payments']
+                     if p['status'] == PaymentStatus.COMPLETED.value]
+        head = [
+            order['id'], order['created_at'], order['username'], order['email'],
+            order['status'], order['delivery_date'], order['delivery_time'],
+            order['delivery_address'], order['total_amount'],
+            sum(p['amount'] for p in completed),
+            order['payments'][-1]['status'] if order['payments'] else ''
+        ]
+        for item in order['items'] or [None]:
+            if item is None:
+                writer.writerow(head + [''] * 6)
+            else:
+                writer.writerow(head + [
+                    item['id'], item['meal_id'], item['meal_name'],
+                    item['quantity'], item['unit_price'], item['total_price']
+                ])
+
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,241 @@
+"""Idempotency keys for POSTs that must not run twice.
+
+Flaky mobile connections retry order placement, and each retry used to
+create another order and charge. A client can now send an
+``Idempotency-Key`` header. An ``idempotency_key`` form field, rendered
+by ``{{ idempotency_key() }}``, is accepted too, but no template in this
+tree renders the order form, so only the header is in use. The first
+request with a key claims it by inserting an
+:class:`~app.models.IdempotencyKey` row in its own transaction, before
+the view runs. The unique index on ``(user_id, key)`` lets only one
+concurrent duplicate win the claim. The other duplicates get one of
+three answers:
+
+- the stored response, if the first request has finished;
+- ``409`` with ``Retry-After``, while the first request is still running;
+- ``422``, if the same key is reused for a different form.
+
+A view that raises or returns a 5xx gives its key back, so the retry
+runs the view again. If storing a finished response fails, a bare marker
+with its status and ``Location`` is stored instead, so that retries do
+not get ``409`` until the key expires. Keys expire after
+``IDEMPOTENCY_KEY_TTL`` seconds. Every ``IDEMPOTENCY_GC_EVERY`` claims,
+up to ``IDEMPOTENCY_GC_BATCH`` expired rows are deleted. ``flask
+idempotency purge`` deletes them all.
+"""
+import hashlib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+import click
+from flask import current_app, make_response, request
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from werkzeug.exceptions import BadRequest, UnprocessableEntity
+
+from app import db
+from app.models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 64
+
+# Form fields that may change between a request and its retry
+_UNSIGNED_FIELDS = (FORM_FIELD, 'csrf_token')
+
+
+class _IdempotencyState:
+    """Per-application count of claims since the last purge."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.claims = 0
+
+
+class IdempotencyKeys:
+    """Flask extension that claims, completes and purges idempotency keys."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+        app.config.setdefault('IDEMPOTENCY_GC_EVERY', 100)
+        app.config.setdefault('IDEMPOTENCY_GC_BATCH', 500)
+        app.extensions['idempotency_keys'] = _IdempotencyState()
+        app.jinja_env.globals['idempotency_key'] = new_key
+
+    def claim(self, user_id, key, fingerprint, now=None):
+        """Claim ``key`` for ``user_id``.
+
+        Returns:
+            ``None`` if this request claimed the key, otherwise the earlier
+            request's row. If that request released the key in the meantime,
+            the result reads as still running and the client retries.
+        """
+        table = IdempotencyKey.__table__
+        now = now or datetime.utcnow()
+        ttl = timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+        mine = (table.c.user_id == user_id, table.c.key == key)
+        try:
+            # A separate transaction, so the claim is visible before the view commits
+            with db.engine.begin() as connection:
+                connection.execute(delete(table).where(*mine, table.c.expires_at <= now))
+                connection.execute(insert(table).values(
+                    user_id=user_id, key=key, fingerprint=fingerprint, created_at=now, expires_at=now + ttl,
+                ))
+        except IntegrityError:
+            with db.engine.connect() as connection:
+                return connection.execute(select(table).where(*mine)).first() or _RUNNING
+        self._count_claim()
+        return None
+
+    def complete(self, user_id, key, response):
+        """Store ``response`` as the answer to replays of ``key``.
+
+        The view has committed by now, so failures are logged, not raised.
+        If the response cannot be stored, its status and ``Location`` are
+        stored without the body.
+        """
+        table = IdempotencyKey.__table__
+        values = {'status_code': response.status_code, 'location': response.headers.get('Location'),
+                  'content_type': response.content_type}
+        for body in (response.get_data(), None):
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        update(table)
+                        .where(table.c.user_id == user_id, table.c.key == key)
+                        .values(body=body, **values)
+                    )
+                return
+            except SQLAlchemyError as error:
+                current_app.logger.warning('Storing the response for idempotency key %s failed: %s', key, error)
+        current_app.logger.error('Idempotency key %s stays claimed until it expires', key)
+
+    def release(self, user_id, key):
+        """Drop the claim on ``key`` so that a retry runs the view again."""
+        table = IdempotencyKey.__table__
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.user_id == user_id, table.c.key == key))
+
+    def purge(self, batch=None, now=None):
+        """Delete up to ``batch`` expired keys (all of them if ``batch`` is None).
+
+        Returns:
+            int: The number of keys deleted.
+        """
+        table = IdempotencyKey.__table__
+        expired = table.c.expires_at <= (now or datetime.utcnow())
+        statement = delete(table)
+        if batch is None:
+            statement = statement.where(expired)
+        else:
+            statement = statement.where(table.c.id.in_(select(table.c.id).where(expired).limit(batch)))
+        with db.engine.begin() as connection:
+            return connection.execute(statement).rowcount
+
+    def _count_claim(self):
+        state = current_app.extensions['idempotency_keys']
+        with state.lock:
+            state.claims += 1
+            due = state.claims >= current_app.config['IDEMPOTENCY_GC_EVERY']
+            if due:
+                state.claims = 0
+        if due:
+            self.purge(current_app.config['IDEMPOTENCY_GC_BATCH'])
+
+
+class _Running:
+    """Stands in for a claim whose row disappeared while we looked it up."""
+    fingerprint = None
+    status_code = None
+
+
+_RUNNING = _Running()
+
+idempotency = IdempotencyKeys()
+
+
+def new_key():
+    """Return a fresh key for a form's hidden ``idempotency_key`` field."""
+    return uuid.uuid4().hex
+
+
+def fingerprint():
+    """Hash the request's method, path and form, ignoring per-page tokens."""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    if request.form:
+        for name, value in sorted(request.form.items(multi=True)):
+            if name not in _UNSIGNED_FIELDS:
+                digest.update(f'{name}={value}\n'.encode())
+    else:
+        digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def replay(row):
+    """Rebuild the stored response of a completed request."""
+    response = make_response(row.body or b'', row.status_code)
+    if row.content_type:
+        response.content_type = row.content_type
+    if row.location:
+        response.headers['Location'] = row.location
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope=None):
+    """Make a POST view safe to retry with the same idempotency key.
+
+    Args:
+        scope: Returns the id of the user the key belongs to. Defaults to
+            the Flask-Login user; apply the decorator below the login check.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER) or request.form.get(FORM_FIELD)
+            if request.method != 'POST' or not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                raise BadRequest(f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.')
+
+            user_id = scope() if scope is not None else current_user.id
+            signed = fingerprint()
+            earlier = idempotency.claim(user_id, key, signed)
+            if earlier is not None:
+                if earlier.fingerprint is not None and earlier.fingerprint != signed:
+                    raise UnprocessableEntity(f'{HEADER} was already used for a different request.')
+                if earlier.status_code is None:
+                    response = make_response('This request is still being processed.', 409)
+                    response.headers['Retry-After'] = '1'
+                    return response
+                return replay(earlier)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                idempotency.release(user_id, key)
+                raise
+            if response.status_code >= 500:
+                idempotency.release(user_id, key)
+            else:
+                idempotency.complete(user_id, key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+idempotency_cli = AppGroup('idempotency', help='Idempotency key maintenance.')
+
+
+@idempotency_cli.command('purge')
+def purge_keys():
+    """Delete every expired idempotency key."""
+    click.echo(f'Deleted {idempotency.purge()} expired idempotency keys.')
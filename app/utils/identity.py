@@ -0,0 +1,193 @@
+"""Cached user identities for Flask-Login.
+
+``load_user`` runs on every authenticated request, and authorization checks
+used to lazy-load ``User.roles`` again on top of that. This module keeps a
+small LRU of immutable :class:`UserIdentity` snapshots, each carrying the
+user's role names and a precomputed permission set, so a warm request
+resolves ``current_user`` and its permissions without touching the database.
+
+Entries expire after ``IDENTITY_CACHE_TTL`` seconds, the cache holds at most
+``IDENTITY_CACHE_SIZE`` users, and entries are evicted when the ``User`` row,
+its ``user_roles`` links or any ``Role`` change (at flush, and again at commit
+or rollback).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, selectinload
+
+from app import db
+from app.models import User, Role
+
+ADMIN = 'admin'
+
+
+@dataclass(frozen=True)
+class UserIdentity(UserMixin):
+    """Read-only stand-in for ``User`` used as ``current_user``.
+
+    Views that need to modify the account should load the ``User`` row
+    with :meth:`get_user`.
+    """
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    phone: str
+    is_admin: bool
+    roles: frozenset
+    permissions: frozenset
+
+    @classmethod
+    def from_user(cls, user):
+        roles = frozenset(role.name for role in user.roles)
+        permissions = set(roles)
+        if user.is_admin:
+            permissions.add(ADMIN)
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            phone=user.phone,
+            is_admin=ADMIN in permissions,
+            roles=roles,
+            permissions=frozenset(permissions)
+        )
+
+    def has_permission(self, name):
+        """Check a permission against the precomputed set."""
+        return name in self.permissions
+
+    def get_full_name(self):
+        """Return the full name of the user."""
+        return f"{self.first_name} {self.last_name}" if self.first_name and self.last_name else self.username
+
+    def get_user(self):
+        """Load the ``User`` row behind this identity."""
+        return db.session.get(User, self.id)
+
+
+class _IdentityState:
+    """Per-application LRU of ``user_id -> (expires_at, UserIdentity)``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+
+class IdentityCache:
+    """Flask extension caching :class:`UserIdentity` snapshots."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IDENTITY_CACHE_TTL', 30)
+        app.config.setdefault('IDENTITY_CACHE_SIZE', 1024)
+        app.extensions['identity_cache'] = _IdentityState()
+
+    def _state(self):
+        return current_app.extensions['identity_cache']
+
+    def load(self, user_id):
+        """Return the identity for ``user_id``, or None if there is no such user."""
+        state = self._state()
+        now = time.monotonic()
+        with state.lock:
+            entry = state.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                state.entries.move_to_end(user_id)
+                return entry[1]
+
+        user = User.query.options(selectinload(User.roles)).filter_by(id=user_id).first()
+        if user is None:
+            return None
+        identity = UserIdentity.from_user(user)
+
+        with state.lock:
+            state.entries[user_id] = (now + current_app.config['IDENTITY_CACHE_TTL'], identity)
+            state.entries.move_to_end(user_id)
+            while len(state.entries) > current_app.config['IDENTITY_CACHE_SIZE']:
+                state.entries.popitem(last=False)
+        return identity
+
+    def evict(self, user_ids=None):
+        """Drop the given users, or everyone when ``user_ids`` is None."""
+        if not (has_app_context() and 'identity_cache' in current_app.extensions):
+            return
+        state = self._state()
+        with state.lock:
+            if user_ids is None:
+                state.entries.clear()
+            else:
+                for user_id in user_ids:
+                    state.entries.pop(user_id, None)
+
+
+identities = IdentityCache()
+
+IDENTITY_TABLES = frozenset({'user', 'roles', 'user_roles'})
+
+
+def _changed(session, user_ids):
+    """Evict now, and remember to evict again when ``session`` ends."""
+    if session is not None:
+        pending = session.info.setdefault('identity_changes', set())
+        if user_ids is None:
+            pending.add(None)
+        else:
+            pending.update(user_ids)
+    identities.evict(user_ids)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _on_user_change(mapper, connection, target):
+    _changed(object_session(target), {target.id})
+
+
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _on_role_change(mapper, connection, target):
+    _changed(object_session(target), None)
+
+
+def _on_user_roles_change(state, *args):
+    user_id = state.identity[0] if state.identity else None
+    _changed(state.session, None if user_id is None else {user_id})
+
+
+def _on_role_users_change(state, *args):
+    _changed(state.session, None)
+
+
+# user_roles rows are written from these two collections
+for _name in ('append', 'remove', 'bulk_replace'):
+    event.listen(User.roles, _name, _on_user_roles_change, raw=True)
+    event.listen(Role.users, _name, _on_role_users_change, raw=True)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    """Catch bulk and Core DML statements that bypass the mapper events."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in IDENTITY_TABLES:
+            _changed(orm_execute_state.session, None)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _on_transaction_end(session):
+    pending = session.info.pop('identity_changes', None)
+    if pending:
+        identities.evict(None if None in pending else pending)
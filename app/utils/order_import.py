@@ -0,0 +1,342 @@
+"""Bulk order import from CSV or JSON spreadsheets.
+
+Each input row is one meal line:
+
+    email, delivery_address, delivery_date, delivery_time, meal, quantity,
+    unit_price (optional), payment_method (optional), order_ref (optional)
+
+Rows sharing an ``order_ref`` become one order with several items; rows
+without one are an order each. ``meal`` is a meal id or name. When
+``unit_price`` is given it must match the meal's current price.
+
+Customers and meals are read once into dictionaries, so validating a row
+never touches the database. Valid orders are written in chunks of
+``ORDER_IMPORT_CHUNK_SIZE``, one transaction per chunk:
+
+- one executemany insert for the orders, taking their ids from
+  ``RETURNING`` in parameter order (or, on SQLite, allocating them under
+  the write lock);
+- one executemany insert each for their items and payments.
+
+Orders for a meal, date and slot with a kitchen limit reserve their
+portions first, as order placement does. An order that does not fit is
+reported as sold out and left out of its chunk.
+
+These are Core table inserts: they skip the ORM's per-row bookkeeping and
+bypass the flush listeners, so the delivery zone and the dashboard
+counters are computed here. A chunk the database rejects is rolled back
+and reported row by row; the other chunks still commit.
+"""
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import (
+    DeliveryArea, Meal, MealCapacity, Order, OrderItem, OrderStatus, Payment, PaymentStatus, StatCounter, User
+)
+
+REQUIRED = ('email', 'delivery_address', 'delivery_date', 'delivery_time', 'meal', 'quantity')
+DEFAULT_PAYMENT_METHOD = 'invoice'
+
+RowError = namedtuple('RowError', 'row message')
+
+
+class ImportResult:
+    """Counts, per-row errors and throughput of one import."""
+
+    def __init__(self):
+        self.rows = 0
+        self.orders = 0
+        self.items = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'orders': self.orders,
+            'items': self.items,
+            'errors': [{'row': error.row, 'message': error.message} for error in self.errors],
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be read as CSV or JSON rows at all."""
+
+
+def read_rows(stream, fmt):
+    """Return the rows of a CSV or JSON (list, or ``{"orders": [...]}``) file as dicts."""
+    if fmt == 'csv':
+        try:
+            text = stream.read()
+            if isinstance(text, bytes):
+                text = text.decode('utf-8-sig')
+        except UnicodeDecodeError as error:
+            raise ImportFormatError(f'CSV must be UTF-8: {error}')
+        return list(csv.DictReader(io.StringIO(text)))
+    if fmt == 'json':
+        try:
+            data = json.load(stream)
+        except ValueError as error:
+            raise ImportFormatError(f'invalid JSON: {error}')
+        if isinstance(data, dict):
+            data = data.get('orders')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ImportFormatError('JSON must be a list of order rows or {"orders": [...]}')
+        return data
+    raise ImportFormatError(f'unsupported format {fmt!r}; use csv or json')
+
+
+def _clean(row):
+    """Strip a row's values to strings; missing and null values become ``''``."""
+    return {key: str(value).strip() if value is not None else '' for key, value in row.items()
+            if isinstance(key, str)}
+
+
+class _Catalog:
+    """Customers and meals needed by a file, read in two queries."""
+
+    def __init__(self, rows):
+        emails = {row.get('email', '').lower() for row in rows} - {''}
+        self.users = dict(db.session.execute(
+            select(func.lower(User.email), User.id).where(func.lower(User.email).in_(emails))
+        ).all()) if emails else {}
+        self.meals = {}
+        for meal_id, name, price, is_available in db.session.execute(
+            select(Meal.id, Meal.name, Meal.price, Meal.is_available)
+        ):
+            self.meals[str(meal_id)] = self.meals[name.strip().lower()] = (meal_id, price, is_available)
+        # A file has few distinct dates; parse each once
+        self.dates = {}
+
+    def parse_date(self, text):
+        if text not in self.dates:
+            try:
+                self.dates[text] = datetime.strptime(text, '%Y-%m-%d').date()
+            except ValueError:
+                self.dates[text] = None
+        return self.dates[text]
+
+
+def _validate(row, catalog):
+    """Return ``(line, error)`` for a cleaned row; ``line`` is a dict of parsed values."""
+    missing = [key for key in REQUIRED if not row.get(key)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    user_id = catalog.users.get(row['email'].lower())
+    if user_id is None:
+        return None, f"unknown customer {row['email']}"
+    meal = catalog.meals.get(row['meal'].lower())
+    if meal is None:
+        return None, f"unknown meal {row['meal']}"
+    meal_id, price, is_available = meal
+    if not is_available:
+        return None, f"meal {row['meal']} is not available"
+    try:
+        quantity = int(row['quantity'])
+    except ValueError:
+        return None, 'quantity must be a whole number'
+    if quantity < 1:
+        return None, 'quantity must be at least 1'
+    delivery_date = catalog.parse_date(row['delivery_date'])
+    if delivery_date is None:
+        return None, 'delivery_date must be YYYY-MM-DD'
+    if row.get('unit_price'):
+        try:
+            unit_price = float(row['unit_price'])
+        except ValueError:
+            return None, 'unit_price must be a number'
+        if abs(unit_price - price) > 0.005:
+            return None, f'unit_price {unit_price:.2f} does not match the current price {price:.2f}'
+    return {
+        'user_id': user_id,
+        'delivery_address': row['delivery_address'],
+        'delivery_date': delivery_date,
+        'delivery_time': row['delivery_time'],
+        'payment_method': row.get('payment_method') or DEFAULT_PAYMENT_METHOD,
+        'meal_id': meal_id,
+        'quantity': quantity,
+        'amount': price * quantity,
+    }, None
+
+
+def _group_orders(rows, catalog, result):
+    """Validate rows and merge lines that share an ``order_ref`` into orders."""
+    orders, by_ref, failed_refs = [], {}, set()
+    for number, row in enumerate(rows, start=1):
+        line, error = _validate(row, catalog)
+        ref = row.get('order_ref', '')
+        if error:
+            result.errors.append(RowError(number, error))
+            failed_refs.add(ref)
+            continue
+        header = (line['user_id'], line['delivery_address'], line['delivery_date'],
+                  line['delivery_time'], line['payment_method'])
+        order = by_ref.get(ref) if ref else None
+        if order is None:
+            order = {'header': header, 'rows': [], 'items': [], 'ref': ref}
+            orders.append(order)
+            if ref:
+                by_ref[ref] = order
+        elif order['header'] != header:
+            result.errors.append(RowError(number, f'order_ref {ref} has different customer or delivery details'))
+            failed_refs.add(ref)
+            continue
+        order['rows'].append(number)
+        order['items'].append((line['meal_id'], line['quantity'], line['amount']))
+    # An order is imported whole or not at all
+    for order in orders:
+        if order['ref'] and order['ref'] in failed_refs:
+            result.errors.extend(RowError(number, f"skipped with the rest of order_ref {order['ref']}")
+                                 for number in order['rows'])
+    return [order for order in orders if not (order['ref'] and order['ref'] in failed_refs)]
+
+
+def _reserve_chunk(chunk):
+    """Reserve capacity for each order; returns the orders that fit and those sold out."""
+    connection = db.session.connection()
+    table = MealCapacity.__table__
+    days = {order['header'][2] for order in chunk}
+    limited = set(connection.execute(
+        select(table.c.meal_id, table.c.delivery_date, table.c.delivery_time)
+        .where(table.c.delivery_date.in_(days))
+    ).tuples())
+    if not limited:
+        return chunk, []
+    kept, sold_out = [], []
+    for order in chunk:
+        _, _, delivery_date, delivery_time, _ = order['header']
+        taken = []
+        for meal_id, quantity, _ in order['items']:
+            if (meal_id, delivery_date, delivery_time) not in limited:
+                continue
+            if not MealCapacity.reserve(connection, meal_id, delivery_date, delivery_time, quantity):
+                break
+            taken.append((meal_id, quantity))
+        else:
+            kept.append(order)
+            continue
+        for meal_id, quantity in taken:
+            MealCapacity.unreserve(connection, meal_id, delivery_date, delivery_time, quantity)
+        sold_out.append(order)
+    return kept, sold_out
+
+
+def _insert_chunk(chunk, zone_for, now):
+    """Write one chunk of orders with their items and payments; returns the item count."""
+    order_rows = []
+    for order in chunk:
+        user_id, address, delivery_date, delivery_time, _ = order['header']
+        order_rows.append({
+            'user_id': user_id,
+            'status': OrderStatus.PENDING,
+            'delivery_address': address,
+            'delivery_date': delivery_date,
+            'delivery_time': delivery_time,
+            'delivery_zone': zone_for(address),
+            'total_amount': sum(amount for _, _, amount in order['items']),
+            'created_at': now,
+        })
+    connection = db.session.connection()
+    StatCounter.apply(connection, {
+        f'orders:{OrderStatus.PENDING.value}': (len(order_rows), 0.0),
+        f'revenue:{now.date().isoformat()}': (len(order_rows), sum(row['total_amount'] for row in order_rows)),
+    })
+    if connection.dialect.name == 'sqlite':
+        # SQLite cannot return ids in parameter order from one statement, so
+        # RETURNING would insert row by row. The counter write above holds the
+        # database lock, so ids past max(id) stay free until commit.
+        first = (connection.scalar(select(func.max(Order.id))) or 0) + 1
+        order_ids = list(range(first, first + len(order_rows)))
+        for order_id, row in zip(order_ids, order_rows):
+            row['id'] = order_id
+        db.session.execute(Order.__table__.insert(), order_rows)
+    else:
+        order_ids = db.session.scalars(
+            Order.__table__.insert().returning(Order.__table__.c.id, sort_by_parameter_order=True), order_rows
+        ).all()
+    items = [{'order_id': order_id, 'meal_id': meal_id, 'quantity': quantity}
+             for order_id, order in zip(order_ids, chunk)
+             for meal_id, quantity, _ in order['items']]
+    db.session.execute(OrderItem.__table__.insert(), items)
+    db.session.execute(Payment.__table__.insert(), [{
+        'order_id': order_id,
+        'amount': row['total_amount'],
+        'status': PaymentStatus.PENDING,
+        'payment_method': order['header'][4],
+        'payment_date': now,
+    } for order_id, order, row in zip(order_ids, chunk, order_rows)])
+    return len(items)
+
+
+def import_orders(rows, chunk_size=None):
+    """Validate and insert ``rows``; returns an :class:`ImportResult`."""
+    chunk_size = chunk_size or current_app.config['ORDER_IMPORT_CHUNK_SIZE']
+    result = ImportResult()
+    started = time.perf_counter()
+    result.rows = len(rows)
+    rows = [_clean(row) for row in rows]
+    catalog = _Catalog(rows)
+    orders = _group_orders(rows, catalog, result)
+    zone_for = DeliveryArea.resolver()
+    db.session.commit()  # end the read transaction before writing chunks
+
+    for start in range(0, len(orders), chunk_size):
+        batch = orders[start:start + chunk_size]
+        now = datetime.utcnow()
+        try:
+            chunk, sold_out = _reserve_chunk(batch)
+            items = _insert_chunk(chunk, zone_for, now) if chunk else 0
+            db.session.commit()
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            current_app.logger.warning('Order import chunk failed: %s', error)
+            message = f'not imported: {error.__class__.__name__}'
+            result.errors.extend(RowError(number, message) for order in batch for number in order['rows'])
+            continue
+        result.errors.extend(RowError(number, 'not imported: sold out for that delivery')
+                             for order in sold_out for number in order['rows'])
+        result.orders += len(chunk)
+        result.items += items
+
+    result.errors.sort()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+orders_cli = AppGroup('orders', help='Bulk order operations.')
+
+
+@orders_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json']), help='Default: from the file extension.')
+@click.option('--chunk-size', type=int, help='Orders per transaction.')
+def import_command(path, fmt, chunk_size):
+    """Import orders from a CSV or JSON file."""
+    fmt = fmt or ('json' if path.lower().endswith('.json') else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        try:
+            rows = read_rows(stream, fmt)
+        except ImportFormatError as error:
+            raise click.ClickException(str(error))
+    result = import_orders(rows, chunk_size)
+    for error in result.errors:
+        click.echo(f'row {error.row}: {error.message}', err=True)
+    click.echo(f'Imported {result.orders} orders ({result.items} items) from {result.rows} rows '
+               f'in {result.seconds:.2f}s, {result.rows_per_second:.0f} rows/s; {len(result.errors)} errors.')
@@ -0,0 +1,161 @@
+"""Bulk order status transitions.
+
+:func:`transition_orders` moves many orders to one status, such as a
+dispatch run to ``OUT_FOR_DELIVERY``. Orders are picked by id, or by
+delivery date with an optional slot and zone. It reads the matching
+orders once and checks each move against ``ORDER_TRANSITIONS``. The
+allowed ones are changed with one ``UPDATE ... WHERE (id, version) IN
+(...)`` for the versions read, which returns the ids it changed. An order
+that someone else changed between the read and the write no longer
+matches. It is reported as ``conflict`` and left alone, and the
+dashboard counters only follow the orders actually written. Callers can
+also pass the versions they last saw, as with :func:`change_status`.
+
+:func:`change_status` moves one order optimistically. It reads the order
+without locking, checks the move, then issues ``UPDATE ... WHERE id = ?
+AND version = ?``. If no row matches, someone else changed the order
+first and ``StaleDataError`` is raised. Both functions bump ``version``.
+Bulk updates bypass the flush listeners, so the dashboard counters are
+adjusted here. Orders that are cancelled or refunded give their portions
+back to the kitchen capacity in the same transaction.
+"""
+from collections import Counter, namedtuple
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db
+from app.models import ORDER_TRANSITIONS, MealCapacity, Order, StatCounter
+from app.models.capacity import RELEASED_STATUSES
+from app.models.order import check_transition
+from app.models.stats import NON_REVENUE_STATUSES
+
+# Outcomes in the per-order report
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_ALLOWED = 'not_allowed'
+NOT_FOUND = 'not_found'
+CONFLICT = 'conflict'
+
+Transition = namedtuple('Transition', 'order_id previous status outcome')
+
+
+def _counter_deltas(target, moved):
+    """Dashboard counter deltas for ``(status, created_at, total_amount)`` rows moved to ``target``."""
+    deltas = Counter()
+    amounts = Counter()
+    for status, created_at, total_amount in moved:
+        deltas[f'orders:{status.value}'] -= 1
+        deltas[f'orders:{target.value}'] += 1
+        was_revenue = status not in NON_REVENUE_STATUSES
+        is_revenue = target not in NON_REVENUE_STATUSES
+        if was_revenue != is_revenue and created_at is not None:
+            name = f'revenue:{created_at.date().isoformat()}'
+            sign = 1 if is_revenue else -1
+            deltas[name] += sign
+            amounts[name] += sign * (total_amount or 0.0)
+    return {name: (deltas[name], amounts[name]) for name in set(deltas) | set(amounts)}
+
+
+def transition_orders(target, order_ids=None, day=None, slot=None, zone=None, versions=None):
+    """Move the selected orders to ``target`` and commit.
+
+    Pass ``order_ids``, or a delivery ``day`` with an optional ``slot`` and
+    ``zone``. ``versions`` optionally maps order ids to the version the
+    caller last saw. Returns one :class:`Transition` per order, ordered by
+    id. Orders already at ``target`` are ``unchanged``. Orders that cannot
+    move there are ``not_allowed``. Orders at another version than the
+    caller saw, or changed by someone else after they were read, are
+    ``conflict``. Requested ids that do not exist are ``not_found``.
+    """
+    if order_ids is None and day is None:
+        raise ValueError('select orders by id or by delivery date')
+    versions = versions or {}
+    statement = select(
+        Order.id, Order.status, Order.version, Order.created_at, Order.total_amount
+    )
+    if order_ids is not None:
+        statement = statement.where(Order.id.in_(order_ids))
+    if day is not None:
+        statement = statement.where(Order.delivery_date == day)
+    if slot:
+        statement = statement.where(Order.delivery_time == slot)
+    if zone:
+        statement = statement.where(Order.delivery_zone == zone)
+
+    report, moving = {}, {}
+    for order_id, status, version, created_at, total_amount in db.session.execute(statement):
+        if versions.get(order_id, version) != version:
+            outcome = CONFLICT
+        elif status == target:
+            outcome = UNCHANGED
+        elif target in ORDER_TRANSITIONS[status]:
+            outcome = UPDATED
+            moving[(order_id, version)] = (status, created_at, total_amount)
+        else:
+            outcome = NOT_ALLOWED
+        report[order_id] = Transition(order_id, status, target if outcome == UPDATED else status, outcome)
+    for order_id in set(order_ids or ()) - set(report):
+        report[order_id] = Transition(order_id, None, None, NOT_FOUND)
+
+    moved = []
+    if moving:
+        # Only rows still at the version read above; anything else changed concurrently
+        written = set(db.session.scalars(
+            update(Order)
+            .where(tuple_(Order.id, Order.version).in_(list(moving)))
+            .values(status=target, version=Order.version + 1)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ))
+        for (order_id, _), row in moving.items():
+            if order_id in written:
+                moved.append(row)
+            else:
+                report[order_id] = Transition(order_id, row[0], None, CONFLICT)
+        if target in RELEASED_STATUSES:
+            MealCapacity.release(db.session.connection(), [
+                order_id for (order_id, _), row in moving.items()
+                if order_id in written and row[0] not in RELEASED_STATUSES
+            ])
+    if moved:
+        StatCounter.apply(db.session.connection(), _counter_deltas(target, moved))
+    db.session.commit()
+    return [report[order_id] for order_id in sorted(report)]
+
+
+def change_status(order_id, status, version=None):
+    """Move one order to ``status`` and commit; returns ``(status, version)``.
+
+    ``status`` may be an ``OrderStatus`` or its value. Pass the ``version``
+    the caller last saw to refuse the change if the order has moved on
+    since. Returns ``None`` if the order does not exist. Raises
+    ``InvalidTransition`` for a disallowed move and ``StaleDataError`` on a
+    version conflict.
+    """
+    row = db.session.execute(
+        select(Order.status, Order.version, Order.created_at, Order.total_amount).where(Order.id == order_id)
+    ).first()
+    if row is None:
+        return None
+    current, current_version, created_at, total_amount = row
+    if version is not None and version != current_version:
+        raise StaleDataError(f'order {order_id} is at version {current_version}, not {version}')
+    status = check_transition(ORDER_TRANSITIONS, current, status)
+    if status == current:
+        return status, current_version
+
+    result = db.session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.version == current_version)
+        .values(status=status, version=current_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        raise StaleDataError(f'order {order_id} was changed concurrently')
+    if status in RELEASED_STATUSES and current not in RELEASED_STATUSES:
+        MealCapacity.release(db.session.connection(), [order_id])
+    StatCounter.apply(db.session.connection(), _counter_deltas(status, [(current, created_at, total_amount)]))
+    db.session.commit()
+    return status, current_version + 1
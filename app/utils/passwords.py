@@ -0,0 +1,108 @@
+"""Password hashing on a dedicated executor.
+
+bcrypt is deliberately slow, and running it inline let a lunch-time burst of
+logins occupy every request worker at once. Hashes are now computed on a
+bounded executor of ``PASSWORD_HASH_WORKERS`` threads (bcrypt releases the
+GIL) or, with ``PASSWORD_HASH_EXECUTOR = 'process'``, processes. However
+many requests arrive, only that many hashes run at a time and the rest queue.
+
+New hashes use ``BCRYPT_LOG_ROUNDS``, the same setting Flask-Bcrypt reads.
+:meth:`PasswordHasher.verify` also accepts werkzeug hashes written by the
+legacy code and reports when a hash should be upgraded, which
+``User.check_password`` does on a successful login.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt as bcrypt_backend
+from flask import current_app
+from werkzeug.security import check_password_hash
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+
+def _hash(password, rounds):
+    return bcrypt_backend.hashpw(password.encode('utf-8'), bcrypt_backend.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password_hash, password):
+    if password_hash.startswith(BCRYPT_PREFIXES):
+        return bcrypt_backend.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return check_password_hash(password_hash, password)
+
+
+def bcrypt_rounds(password_hash):
+    """Return the cost of a bcrypt hash, or None for any other format."""
+    if not password_hash or not password_hash.startswith(BCRYPT_PREFIXES):
+        return None
+    return int(password_hash[4:6])
+
+
+class _HasherState:
+    """Per-application executor, created on first use."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+
+
+class PasswordHasher:
+    """Flask extension running password hashing on a bounded executor."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 4)
+        app.config.setdefault('PASSWORD_HASH_EXECUTOR', 'thread')
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 30)
+        if app.config['PASSWORD_HASH_EXECUTOR'] not in EXECUTORS:
+            raise ValueError(f"PASSWORD_HASH_EXECUTOR must be one of {sorted(EXECUTORS)}.")
+        app.extensions['password_hasher'] = _HasherState()
+
+    def _executor(self):
+        state = current_app.extensions['password_hasher']
+        with state.lock:
+            if state.executor is None:
+                executor_class = EXECUTORS[current_app.config['PASSWORD_HASH_EXECUTOR']]
+                state.executor = executor_class(max_workers=current_app.config['PASSWORD_HASH_WORKERS'])
+            return state.executor
+
+    def _run(self, func, *args):
+        future = self._executor().submit(func, *args)
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+
+    def hash(self, password):
+        """Hash ``password`` with bcrypt at the configured cost."""
+        return self._run(_hash, password, current_app.config['BCRYPT_LOG_ROUNDS'])
+
+    def verify(self, password_hash, password):
+        """Check ``password`` against a bcrypt or werkzeug hash.
+
+        Returns:
+            tuple: ``(matches, needs_rehash)``. ``needs_rehash`` is True when
+            the hash is not bcrypt or costs less than ``BCRYPT_LOG_ROUNDS``.
+        """
+        if not password_hash or password is None:
+            return False, False
+        matches = self._run(_verify, password_hash, password)
+        return matches, matches and self.needs_rehash(password_hash)
+
+    def needs_rehash(self, password_hash):
+        """Whether ``password_hash`` is weaker than new hashes would be."""
+        rounds = bcrypt_rounds(password_hash)
+        return rounds is None or rounds < current_app.config['BCRYPT_LOG_ROUNDS']
+
+    def shutdown(self, wait=True):
+        """Stop the executor; it is recreated on next use."""
+        state = current_app.extensions['password_hasher']
+        with state.lock:
+            executor, state.executor = state.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,173 @@
+"""Kitchen production plan: how many of each meal to cook per day and slot.
+
+:func:`production_plan` sums ``OrderItem.quantity`` by delivery date, slot
+and meal in one grouped query. It excludes orders that will never be cooked.
+The query reads only the covering indexes
+``ix_order_delivery_date_status_time`` and
+``ix_order_item_order_id_meal_id_quantity``, so its cost depends on the
+days asked for, not the size of the order history.
+
+:class:`PlanColumns` is for views that reslice the same date range many
+times, such as one day at a time, one slot, or a set of meals. It loads the
+range once into parallel integer columns and aggregates the requested
+slice in memory. It uses NumPy when it is installed and falls back to
+stdlib ``array`` columns and a dict otherwise.
+"""
+from array import array
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Meal, Order, OrderItem, OrderStatus
+
+try:
+    import numpy
+except ImportError:  # optional; PlanColumns falls back to the array module
+    numpy = None
+
+# Cancelled and refunded orders are not cooked
+NOT_COOKED = (OrderStatus.CANCELLED, OrderStatus.REFUNDED)
+
+PlanRow = namedtuple('PlanRow', 'delivery_date delivery_time meal_id meal_name quantity')
+
+
+def _date_range(statement, start, end):
+    return statement.where(
+        Order.delivery_date >= start,
+        Order.delivery_date <= (end or start),
+        Order.status.not_in(NOT_COOKED),
+    )
+
+
+def production_plan(start, end=None, slot=None):
+    """Return :class:`PlanRow` totals for ``start``..``end`` (inclusive).
+
+    Rows are ordered by date, slot and meal name. ``slot`` narrows the
+    plan to one ``delivery_time``.
+    """
+    totals = _date_range(
+        select(
+            Order.delivery_date, Order.delivery_time, OrderItem.meal_id,
+            func.sum(OrderItem.quantity).label('quantity')
+        ).join(OrderItem, OrderItem.order_id == Order.id),
+        start, end
+    )
+    if slot:
+        totals = totals.where(Order.delivery_time == slot)
+    totals = totals.group_by(Order.delivery_date, Order.delivery_time, OrderItem.meal_id).subquery()
+    # Meal names are joined per group rather than per item
+    statement = select(
+        totals.c.delivery_date, totals.c.delivery_time, totals.c.meal_id, Meal.name, totals.c.quantity
+    ).join(Meal, Meal.id == totals.c.meal_id).order_by(
+        totals.c.delivery_date, totals.c.delivery_time, Meal.name
+    )
+    return [PlanRow(*row) for row in db.session.execute(statement)]
+
+
+class PlanColumns:
+    """The order items of a date range as columns, for repeated slicing.
+
+    ``days`` holds day offsets from ``start``. ``slots`` holds indexes into
+    ``slot_names``. ``meals`` and ``quantities`` hold meal ids and
+    quantities. They are NumPy arrays when NumPy is available and
+    ``array('l')`` otherwise.
+    """
+
+    def __init__(self, start, days, slots, meals, quantities, slot_names, meal_names):
+        self.start = start
+        self.days = days
+        self.slots = slots
+        self.meals = meals
+        self.quantities = quantities
+        self.slot_names = slot_names
+        self.meal_names = meal_names
+        self._groups = None
+
+    def __len__(self):
+        return len(self.quantities)
+
+    @classmethod
+    def load(cls, start, end=None):
+        """Read every cooked order item delivered ``start``..``end`` in one query."""
+        rows = db.session.execute(_date_range(
+            select(Order.delivery_date, Order.delivery_time, OrderItem.meal_id, OrderItem.quantity)
+            .join(OrderItem, OrderItem.order_id == Order.id),
+            start, end
+        ))
+        slot_index = {}
+        days, slots, meals, quantities = array('l'), array('l'), array('l'), array('l')
+        for delivery_date, delivery_time, meal_id, quantity in rows:
+            days.append((delivery_date - start).days)
+            slots.append(slot_index.setdefault(delivery_time, len(slot_index)))
+            meals.append(meal_id)
+            quantities.append(quantity)
+        meal_names = dict(db.session.execute(
+            select(Meal.id, Meal.name).where(Meal.id.in_(set(meals)))
+        ).all()) if meals else {}
+        if numpy is not None:
+            days, slots, meals, quantities = (
+                numpy.frombuffer(column, dtype=numpy.dtype(f'i{column.itemsize}')).astype(numpy.int64)
+                for column in (days, slots, meals, quantities)
+            )
+        return cls(start, days, slots, meals, quantities, list(slot_index), meal_names)
+
+    def plan(self, day=None, slot=None, meal_ids=None):
+        """Aggregate the loaded items into :class:`PlanRow` totals.
+
+        ``day`` is a date, ``slot`` a ``delivery_time`` and ``meal_ids`` an
+        iterable of meal ids; each narrows the slice when given.
+        """
+        day_offset = (day - self.start).days if day is not None else None
+        slot_code = None
+        if slot is not None:
+            if slot not in self.slot_names:
+                return []
+            slot_code = self.slot_names.index(slot)
+        aggregate = self._sum_numpy if numpy is not None else self._sum_arrays
+        totals = aggregate(day_offset, slot_code, meal_ids)
+        rows = [
+            PlanRow(self.start + timedelta(days=d), self.slot_names[s], m, self.meal_names.get(m), q)
+            for (d, s, m), q in totals
+        ]
+        rows.sort(key=lambda row: (row.delivery_date, row.delivery_time, row.meal_name or ''))
+        return rows
+
+    def _numpy_groups(self):
+        """Number every (day, slot, meal) group once; slices then only mask and count."""
+        if self._groups is None:
+            stride = int(self.meals.max()) + 1
+            keys = (self.days * len(self.slot_names) + self.slots) * stride + self.meals
+            unique, codes = numpy.unique(keys, return_inverse=True)
+            day_slot, meal = numpy.divmod(unique, stride)
+            day, slot = numpy.divmod(day_slot, len(self.slot_names))
+            self._groups = (list(zip(day.tolist(), slot.tolist(), meal.tolist())), codes.ravel())
+        return self._groups
+
+    def _sum_numpy(self, day_offset, slot_code, meal_ids):
+        if not len(self):
+            return []
+        mask = numpy.ones(len(self), dtype=bool)
+        if day_offset is not None:
+            mask &= self.days == day_offset
+        if slot_code is not None:
+            mask &= self.slots == slot_code
+        if meal_ids is not None:
+            mask &= numpy.isin(self.meals, numpy.fromiter(meal_ids, dtype=numpy.int64))
+        groups, codes = self._numpy_groups()
+        codes = codes[mask]
+        items = numpy.bincount(codes, minlength=len(groups))
+        sums = numpy.bincount(codes, weights=self.quantities[mask], minlength=len(groups))
+        return [(groups[n], int(sums[n])) for n in numpy.flatnonzero(items).tolist()]
+
+    def _sum_arrays(self, day_offset, slot_code, meal_ids):
+        meal_ids = set(meal_ids) if meal_ids is not None else None
+        totals = {}
+        for d, s, m, q in zip(self.days, self.slots, self.meals, self.quantities):
+            if (day_offset is not None and d != day_offset) or (slot_code is not None and s != slot_code) \
+                    or (meal_ids is not None and m not in meal_ids):
+                continue
+            key = (d, s, m)
+            totals[key] = totals.get(key, 0) + q
+        return list(totals.items())
@@ -0,0 +1,193 @@
+"""SQLite storage for Flask-Limiter shared by every worker process.
+
+With ``memory://`` storage each gunicorn worker counted requests on its own,
+so a client could make ``workers x limit`` requests, and counters for every
+client ever seen stayed in memory. Importing this module registers a
+``sqlite://`` storage scheme with the ``limits`` package, so setting
+``RATELIMIT_STORAGE_URI = 'sqlite:////path/to/ratelimit.db'`` makes all
+processes on the host share counters in one small WAL-mode database.
+
+Counters are updated with a single ``INSERT ... ON CONFLICT ... RETURNING``
+statement, so increments are atomic across processes without a lock. The
+sliding window counter check runs in one ``BEGIN IMMEDIATE`` transaction,
+so two processes cannot both take the last slot. Expired counters are
+deleted in batches every ``expire_interval`` seconds rather than per key.
+"""
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.errors import ConfigurationError
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_rate_limit_expires_at ON rate_limit (expires_at);
+'''
+
+# Starts a new window for an expired key, otherwise adds to it
+INCR = '''
+INSERT INTO rate_limit (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expires_at <= :now THEN excluded.count ELSE count + excluded.count END,
+    expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+RETURNING count
+'''
+
+EXPIRE = '''
+DELETE FROM rate_limit WHERE key IN (
+    SELECT key FROM rate_limit WHERE expires_at <= ? LIMIT ?
+)
+'''
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit storage in a SQLite file, for fixed and sliding window counters.
+
+    Args:
+        uri: ``sqlite:///relative/path.db`` or ``sqlite:////absolute/path.db``.
+        timeout: Seconds to wait for another process's write lock.
+        expire_interval: Seconds between batch deletions of expired counters.
+        expire_batch: Most counters deleted per batch.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, timeout=5.0,
+                 expire_interval=60.0, expire_batch=1000, **options):
+        path = uri.split('://', 1)[1][1:]
+        if not path or path == ':memory:':
+            raise ConfigurationError('SQLite rate limit storage needs a file shared by all workers.')
+        self.path = path
+        self.timeout = float(timeout)
+        self.expire_interval = float(expire_interval)
+        self.expire_batch = int(expire_batch)
+        self._local = threading.local()
+        self._expire_lock = threading.Lock()
+        self._next_expiry = 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork."""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            # Autocommit; transactions are opened explicitly where needed
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            # Losing the last counters on power failure is harmless
+            connection.execute('PRAGMA synchronous = OFF')
+            self._local.connection, self._local.pid = connection, pid
+        return self._local.connection
+
+    def _expire(self, now):
+        """Delete a batch of expired counters if the interval has passed."""
+        if now < self._next_expiry or not self._expire_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_expiry = now + self.expire_interval
+            self._connection().execute(EXPIRE, (now, self.expire_batch))
+        finally:
+            self._expire_lock.release()
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        self._expire(now)
+        return self._incr(self._connection(), key, expiry, amount, now)
+
+    def _incr(self, connection, key, expiry, amount, now):
+        # fetchall() steps the statement to completion, ending its write at once
+        return connection.execute(INCR, {
+            'key': key, 'amount': amount, 'expires_at': now + expiry, 'now': now
+        }).fetchall()[0][0]
+
+    def decr(self, key, amount=1):
+        connection = self._connection()
+        rows = connection.execute(
+            'UPDATE rate_limit SET count = max(count - ?, 0) WHERE key = ? AND expires_at > ? RETURNING count',
+            (amount, key, time.time())
+        ).fetchall()
+        return rows[0][0] if rows else 0
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT count FROM rate_limit WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            'SELECT expires_at FROM rate_limit WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key):
+        self._connection().execute('DELETE FROM rate_limit WHERE key = ?', (key,))
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def reset(self):
+        return self._connection().execute('DELETE FROM rate_limit').rowcount
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        self._expire(now)
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        connection = self._connection()
+        # Take the write lock up front so the check and the increment are atomic
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            previous_count, previous_ttl, current_count, _ = self._window(
+                connection, previous_key, current_key, expiry, now
+            )
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                connection.execute('COMMIT')
+                return False
+            # Keep the current window for two periods; it becomes the previous one
+            self._incr(connection, current_key, 2 * expiry, amount, now)
+            connection.execute('COMMIT')
+            return True
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _window(self, connection, previous_key, current_key, expiry, now):
+        counts = dict(connection.execute(
+            'SELECT key, count FROM rate_limit WHERE key IN (?, ?) AND expires_at > ?',
+            (previous_key, current_key, now)
+        ).fetchall())
+        previous_count = counts.get(previous_key, 0)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, counts.get(current_key, 0), current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._window(self._connection(), previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._connection().execute('DELETE FROM rate_limit WHERE key IN (?, ?)', (previous_key, current_key))
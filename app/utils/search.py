@@ -0,0 +1,141 @@
+"""Full-text meal search backed by an SQLite FTS5 index.
+
+``meal_search`` is an FTS5 table with one row per available meal, keyed
+by meal id. It indexes three columns: the meal's name, its description,
+and a ``categories`` column. That column holds the legacy ``Meal.category``
+string plus the names of the meal's ``MealCategory`` rows. Triggers on
+``meal``, ``meal_categories`` and ``meal_category`` keep the index in step
+with every write, including bulk and raw SQL writes that skip the ORM.
+
+Queries are split into words, and each word matches as a prefix, so
+``pan tik`` finds "Paneer Tikka". Results are ranked by ``bm25``, with
+name hits counting most and description hits least. Ranking happens
+inside the index before any ``meal`` row is read, and the prefix indexes
+on two- and three-letter prefixes keep short prefixes from scanning the
+whole vocabulary. ``db.create_all()`` builds the index, and the migration
+builds it for existing databases. ``flask search rebuild`` repopulates
+and compacts it, which is worth doing after a large import.
+"""
+import re
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, text
+
+from app import db
+
+# Column weights for bm25(): name, description, categories
+RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Result fields, as in Meal.to_dict()
+MEAL_FIELDS = ('id', 'name', 'description', 'price', 'is_vegetarian', 'is_available', 'image_url', 'category')
+
+# Longer queries are cut to this many words
+MAX_TERMS = 8
+
+_WORD = re.compile(r'\w+')
+
+# The categories column for the meal row aliased ``meal``
+_CATEGORIES = """coalesce(meal.category, '') || ' ' || coalesce((
+        SELECT group_concat(meal_category.name, ' ') FROM meal_categories
+        JOIN meal_category ON meal_category.id = meal_categories.category_id
+        WHERE meal_categories.meal_id = meal.id), '')"""
+
+# Index rows for available meals; unavailable ones are never searched
+_ROW = f"""SELECT meal.id, meal.name, coalesce(meal.description, ''), {_CATEGORIES}
+        FROM meal WHERE meal.is_available"""
+
+_REFRESH_CATEGORIES = f"""UPDATE meal_search SET categories = (
+        SELECT {_CATEGORIES} FROM meal WHERE meal.id = meal_search.rowid)"""
+
+CREATE_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS meal_search USING fts5("
+    "name, description, categories, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_meal_insert AFTER INSERT ON meal BEGIN
+        INSERT INTO meal_search (rowid, name, description, categories) {_ROW} AND meal.id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_meal_update
+    AFTER UPDATE OF name, description, category, is_available ON meal BEGIN
+        DELETE FROM meal_search WHERE rowid = OLD.id;
+        INSERT INTO meal_search (rowid, name, description, categories) {_ROW} AND meal.id = NEW.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS meal_search_meal_delete AFTER DELETE ON meal BEGIN
+        DELETE FROM meal_search WHERE rowid = OLD.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_categories_insert AFTER INSERT ON meal_categories BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid = NEW.meal_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_categories_delete AFTER DELETE ON meal_categories BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid = OLD.meal_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_category_rename AFTER UPDATE OF name ON meal_category BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid IN (
+            SELECT meal_id FROM meal_categories WHERE category_id = NEW.id);
+    END""",
+)
+
+REBUILD_STATEMENTS = (
+    'DELETE FROM meal_search',
+    f'INSERT INTO meal_search (rowid, name, description, categories) {_ROW}',
+    "INSERT INTO meal_search (meal_search) VALUES ('optimize')",
+)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in CREATE_STATEMENTS:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_search_index(target, connection, **kw):
+    # The triggers went with their tables
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS meal_search')
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so FTS5 syntax in the input is searched for
+    literally rather than parsed. Returns ``''`` if there are no words.
+    """
+    words = _WORD.findall(query.lower())[:MAX_TERMS]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_meals(query, limit=20):
+    """Available meals matching ``query`` as ``Meal.to_dict()`` dicts, best match first."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    # Rank in the index first; only the top ``limit`` meals are then read
+    statement = text(
+        f'SELECT {", ".join(f"meal.{field}" for field in MEAL_FIELDS)} FROM ('
+        f'SELECT rowid, bm25(meal_search, {weights}) AS score FROM meal_search '
+        'WHERE meal_search MATCH :expression ORDER BY score LIMIT :limit'
+        ') AS hit JOIN meal ON meal.id = hit.rowid ORDER BY hit.score'
+    )
+    rows = db.session.execute(statement, {'expression': expression, 'limit': limit})
+    return [dict(row, is_vegetarian=bool(row['is_vegetarian']), is_available=bool(row['is_available']))
+            for row in rows.mappings()]
+
+
+def rebuild_search_index(connection):
+    """Repopulate ``meal_search`` from the meal tables; returns the meals indexed."""
+    for statement in CREATE_STATEMENTS + REBUILD_STATEMENTS:
+        connection.exec_driver_sql(statement)
+    return connection.exec_driver_sql('SELECT count(*) FROM meal_search').scalar()
+
+
+search_cli = AppGroup('search', help='Meal search index commands.')
+
+
+@search_cli.command('rebuild')
+def rebuild():
+    """Rebuild the meal search index from the meal and category tables."""
+    indexed = rebuild_search_index(db.session.connection())
+    db.session.commit()
+    click.echo(f'Indexed {indexed} meals.')
@@ -0,0 +1,210 @@
+"""Server-side sessions in SQLite that are only written when they change.
+
+The filesystem store read a file on every request that had a session, and
+because Flask refreshes sessions on each request it also rewrote the file
+every time, even when nothing had changed. Selecting
+``SESSION_TYPE = 'sqlite'`` stores sessions as compact msgpack blobs in a
+``WITHOUT ROWID`` table in ``SESSION_SQLITE_PATH``, indexed on expiry:
+
+- a request costs one primary-key lookup;
+- the row is rewritten only when the session's encoded bytes differ from
+  what was loaded;
+- an unchanged session has its expiry pushed forward at most once every
+  ``SESSION_SQLITE_TOUCH_INTERVAL`` seconds, with an expiry-only UPDATE;
+- every ``SESSION_SQLITE_GC_EVERY`` writes, up to ``SESSION_SQLITE_GC_BATCH``
+  expired sessions are deleted through the expiry index, instead of
+  scanning a directory.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+from itsdangerous import BadSignature
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    expiry REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_sessions_expiry ON sessions (expiry);
+'''
+
+UPSERT = '''
+INSERT INTO sessions (id, data, expiry) VALUES (?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET data = excluded.data, expiry = excluded.expiry
+'''
+
+COLLECT = '''
+DELETE FROM sessions WHERE id IN (
+    SELECT id FROM sessions WHERE expiry <= ? LIMIT ?
+)
+'''
+
+
+class SQLiteSession(ServerSideSession):
+    """A session that remembers the bytes and expiry it was loaded with."""
+
+    def __init__(self, initial=None, sid=None, permanent=None, stored=None, stored_expiry=None):
+        super().__init__(initial, sid, permanent)
+        self.stored = stored
+        self.stored_expiry = stored_expiry
+        self.encoded = None
+
+
+class SQLiteSessionInterface(ServerSideSessionInterface):
+    """Flask-Session interface backed by a SQLite table."""
+
+    session_class = SQLiteSession
+    # Expiry is collected here, not by Flask-Session's cleanup hooks
+    ttl = True
+
+    def __init__(self, app, path, touch_interval=300, gc_every=100, gc_batch=500, **params):
+        super().__init__(app, **params)
+        self.touch_interval = touch_interval
+        self.gc_every = gc_every
+        self.gc_batch = gc_batch
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_gc = 0
+        self.counters = {'reads': 0, 'writes': 0, 'touches': 0, 'skipped': 0, 'deletes': 0, 'collected': 0}
+        if path == ':memory:':
+            # Shared between this process's threads while the anchor stays open
+            self._target, self._uri = f'file:sessions_{id(self)}?mode=memory&cache=shared', True
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._target, self._uri = path, False
+        self._anchor = self._connect()
+        self._anchor.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self._target, uri=self._uri, timeout=5.0, isolation_level=None)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        return connection
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork."""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            self._local.connection, self._local.pid = self._connect(), pid
+        return self._local.connection
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """Return counts of session reads, writes, expiry touches, skipped
+        writes, deletes and collected (expired) sessions."""
+        with self._lock:
+            return dict(self.counters)
+
+    # Reading
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and self.use_signer:
+            try:
+                sid = self._unsign(app, sid)
+            except BadSignature:
+                sid = None
+        if sid:
+            row = self._load(self._get_store_id(sid))
+            if row is not None:
+                data, expiry = row
+                return self.session_class(self.serializer.decode(data), sid=sid,
+                                          stored=data, stored_expiry=expiry)
+        return self.session_class(sid=self._generate_sid(self.sid_length), permanent=self.permanent)
+
+    def _load(self, store_id):
+        self._count('reads')
+        return self._connection().execute(
+            'SELECT data, expiry FROM sessions WHERE id = ? AND expiry > ?', (store_id, time.time())
+        ).fetchone()
+
+    def _retrieve_session_data(self, store_id):
+        row = self._load(store_id)
+        return self.serializer.decode(row[0]) if row is not None else None
+
+    # Writing
+
+    def should_set_storage(self, app, session):
+        if session.stored is None:
+            return True
+        if session.modified:
+            session.encoded = self.serializer.encode(session)
+            if session.encoded != session.stored:
+                return True
+        if not app.config['SESSION_REFRESH_EACH_REQUEST']:
+            self._count('skipped')
+            return False
+        # Unchanged: push the expiry forward once per touch interval at most
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        if session.stored_expiry - time.time() < lifetime - self.touch_interval:
+            return True
+        self._count('skipped')
+        return False
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        expiry = time.time() + session_lifetime.total_seconds()
+        data = session.encoded if session.encoded is not None else self.serializer.encode(session)
+        connection = self._connection()
+        if data == session.stored:
+            connection.execute('UPDATE sessions SET expiry = ? WHERE id = ?', (expiry, store_id))
+            self._count('touches')
+        else:
+            connection.execute(UPSERT, (store_id, data, expiry))
+            self._count('writes')
+        session.stored, session.stored_expiry = data, expiry
+        self._collect()
+
+    def _delete_session(self, store_id):
+        self._connection().execute('DELETE FROM sessions WHERE id = ?', (store_id,))
+        self._count('deletes')
+
+    def _collect(self):
+        """Delete a batch of expired sessions every ``gc_every`` writes."""
+        with self._lock:
+            self._writes_since_gc += 1
+            if self._writes_since_gc < self.gc_every:
+                return
+            self._writes_since_gc = 0
+        self._delete_expired_sessions()
+
+    def _delete_expired_sessions(self):
+        collected = self._connection().execute(COLLECT, (time.time(), self.gc_batch)).rowcount
+        self._count('collected', collected)
+        return collected
+
+
+class SQLiteSessions:
+    """Flask extension installing :class:`SQLiteSessionInterface`."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SESSION_SQLITE_PATH', os.path.join(app.instance_path, 'sessions.db'))
+        app.config.setdefault('SESSION_SQLITE_TOUCH_INTERVAL', 300)
+        app.config.setdefault('SESSION_SQLITE_GC_EVERY', 100)
+        app.config.setdefault('SESSION_SQLITE_GC_BATCH', 500)
+        config = app.config
+        app.session_interface = SQLiteSessionInterface(
+            app,
+            path=config['SESSION_SQLITE_PATH'],
+            touch_interval=config['SESSION_SQLITE_TOUCH_INTERVAL'],
+            gc_every=config['SESSION_SQLITE_GC_EVERY'],
+            gc_batch=config['SESSION_SQLITE_GC_BATCH'],
+            key_prefix=config.get('SESSION_KEY_PREFIX', 'session:'),
+            use_signer=config.get('SESSION_USE_SIGNER', False),
+            permanent=config.get('SESSION_PERMANENT', True),
+            sid_length=config.get('SESSION_ID_LENGTH', 32),
+            serialization_format=config.get('SESSION_SERIALIZATION_FORMAT', 'msgpack')
+        )
+
+
+sqlite_sessions = SQLiteSessions()
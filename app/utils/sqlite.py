@@ -0,0 +1,169 @@
+"""SQLite performance profiles.
+
+Out of the box SQLite uses a rollback journal, fsyncs every commit, maps no
+memory and keeps a 2MB page cache per connection. A writer then blocks every
+reader, and concurrent checkouts fail with ``database is locked``.
+
+``SQLITE_PROFILE`` names one of :data:`config.SQLITE_PROFILES`. The profile's
+PRAGMAs are applied to every connection the SQLAlchemy engine opens, its pool
+settings size the engine's pool, and ``wal_autocheckpoint`` and
+``journal_size_limit`` control how often the WAL is folded back into the
+database and how large it may stay afterwards. The raw sqlite3 pool in
+``db_utils`` reads the same settings. Any ``SQLITE_*`` key set directly in
+the config overrides the profile's value.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app import db
+from config import SQLITE_PROFILES
+
+DEFAULT_PROFILE = 'throughput'
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+TEMP_STORES = {'DEFAULT', 'FILE', 'MEMORY'}
+CHECKPOINT_MODES = {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'}
+
+
+def resolve_settings(config):
+    """Return the effective ``SQLITE_*`` settings for a config mapping.
+
+    Raises:
+        ValueError: If ``SQLITE_PROFILE`` names an unknown profile.
+    """
+    name = config.get('SQLITE_PROFILE') or DEFAULT_PROFILE
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{name}'; expected one of {sorted(SQLITE_PROFILES)}.")
+    return {key: config.get(key, value) for key, value in SQLITE_PROFILES[name].items()}
+
+
+def pragma_statements(settings):
+    """Build the PRAGMA statements for resolved settings, validating each value.
+
+    Raises:
+        ValueError: If a mode is not one SQLite accepts.
+    """
+    journal_mode = str(settings['SQLITE_JOURNAL_MODE']).upper()
+    synchronous = str(settings['SQLITE_SYNCHRONOUS']).upper()
+    temp_store = str(settings['SQLITE_TEMP_STORE']).upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown journal mode '{journal_mode}'.")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown synchronous level '{synchronous}'.")
+    if temp_store not in TEMP_STORES:
+        raise ValueError(f"Unknown temp store '{temp_store}'.")
+    return [
+        # busy_timeout first, so switching journal mode waits out other writers
+        f"PRAGMA busy_timeout = {int(settings['SQLITE_BUSY_TIMEOUT'])}",
+        f'PRAGMA journal_mode = {journal_mode}',
+        f'PRAGMA synchronous = {synchronous}',
+        f"PRAGMA mmap_size = {int(settings['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size = {int(settings['SQLITE_CACHE_SIZE'])}",
+        f'PRAGMA temp_store = {temp_store}',
+        f"PRAGMA wal_autocheckpoint = {int(settings['SQLITE_WAL_AUTOCHECKPOINT'])}",
+        f"PRAGMA journal_size_limit = {int(settings['SQLITE_JOURNAL_SIZE_LIMIT'])}",
+    ]
+
+
+def is_memory_database(url):
+    """Whether a SQLite URL names an in-memory database."""
+    url = make_url(url)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+class SQLiteProfile:
+    """Flask extension applying the configured SQLite profile to the engine.
+
+    ``init_app`` must run before ``db.init_app``, which creates the engine
+    from ``SQLALCHEMY_ENGINE_OPTIONS``.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PROFILE', DEFAULT_PROFILE)
+        app.cli.add_command(sqlite_cli)
+
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+        if not uri or make_url(uri).get_backend_name() != 'sqlite':
+            return
+        settings = resolve_settings(app.config)
+        pragmas = pragma_statements(settings)
+
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+        # Pool "connect" listeners, registered as the engine's pool is built
+        options = {'pool_events': [(apply_pragmas, 'connect')]}
+        if not is_memory_database(uri):
+            # In-memory databases get a single shared connection (StaticPool)
+            options.update(
+                pool_size=settings['SQLITE_POOL_SIZE'],
+                max_overflow=settings['SQLITE_MAX_OVERFLOW'],
+                pool_timeout=settings['SQLITE_POOL_TIMEOUT']
+            )
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+        app.extensions['sqlite_profile'] = settings
+
+
+sqlite_profile = SQLiteProfile()
+
+
+def checkpoint(connection, mode='PASSIVE'):
+    """Run ``PRAGMA wal_checkpoint`` on a SQLAlchemy connection.
+
+    Returns:
+        dict: ``busy`` (1 if a writer blocked a full checkpoint), ``log`` (pages
+        in the WAL) and ``checkpointed`` (pages copied back to the database).
+    """
+    mode = mode.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Unknown checkpoint mode '{mode}'.")
+    busy, log, checkpointed = connection.execute(text(f'PRAGMA wal_checkpoint({mode})')).one()
+    return {'busy': busy, 'log': log, 'checkpointed': checkpointed}
+
+
+@click.group('sqlite')
+def sqlite_cli():
+    """SQLite maintenance commands."""
+
+
+@sqlite_cli.command('profile')
+@with_appcontext
+def show_profile():
+    """Show the effective SQLite settings."""
+    settings = current_app.extensions.get('sqlite_profile')
+    if settings is None:
+        click.echo('The database is not SQLite; no profile applied.')
+        return
+    click.echo(f"profile: {current_app.config['SQLITE_PROFILE']}")
+    for key, value in settings.items():
+        click.echo(f'{key}: {value}')
+    with db.engine.connect() as connection:
+        click.echo(f"journal_mode in effect: {connection.execute(text('PRAGMA journal_mode')).scalar()}")
+
+
+@sqlite_cli.command('checkpoint')
+@click.option('--mode', type=click.Choice(sorted(CHECKPOINT_MODES), case_sensitive=False),
+              default='PASSIVE', show_default=True)
+@with_appcontext
+def run_checkpoint(mode):
+    """Fold the WAL back into the database file.
+
+    TRUNCATE also shrinks the WAL to zero bytes, e.g. before a backup.
+    """
+    with db.engine.connect() as connection:
+        result = checkpoint(connection, mode)
+    click.echo('busy={busy} log={log} checkpointed={checkpointed}'.format(**result))
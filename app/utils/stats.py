@@ -0,0 +1,42 @@
+"""Maintenance commands for the admin dashboard counters.
+
+The counters in ``stat_counter`` are updated on every flush (see
+``app.models.stats``). ``flask stats rebuild`` recomputes them from the
+source tables, for use after bulk SQL, restores or a migration, and
+``flask stats check`` reports any counter that has drifted.
+"""
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.models import StatCounter
+
+stats_cli = AppGroup('stats', help='Admin dashboard counters.')
+
+
+def _snapshot():
+    return {row.name: (row.count, round(row.amount, 2)) for row in StatCounter.query}
+
+
+@stats_cli.command('rebuild')
+def rebuild():
+    """Recompute every counter from the source tables."""
+    rows = StatCounter.rebuild()
+    db.session.commit()
+    click.echo(f'Rebuilt {rows} counters.')
+
+
+@stats_cli.command('check')
+def check():
+    """Compare the counters against a fresh count without changing them."""
+    current = _snapshot()
+    StatCounter.rebuild()
+    expected = _snapshot()
+    db.session.rollback()
+    drifted = sorted(name for name in current.keys() | expected.keys()
+                     if current.get(name, (0, 0.0)) != expected.get(name, (0, 0.0)))
+    for name in drifted:
+        click.echo(f'{name}: stored {current.get(name, (0, 0.0))}, actual {expected.get(name, (0, 0.0))}')
+    if drifted:
+        raise SystemExit(1)
+    click.echo('All counters match.')
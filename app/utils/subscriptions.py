@@ -0,0 +1,118 @@
+"""Turn the subscriptions due on a day into orders.
+
+:func:`materialize_orders` runs three set-based statements in one
+transaction, whatever the number of subscriptions:
+
+1. ``INSERT INTO "order" ... SELECT`` over the subscriptions due that day
+   (active, in date range, on a chosen weekday, not paused, with an
+   available meal) that have no order for the day yet;
+2. ``INSERT INTO order_item ... SELECT`` joining the orders just created
+   back to their subscriptions;
+3. one ``UPDATE meal_capacity`` counting their portions against the
+   kitchen limits. Subscriptions are never refused for capacity.
+
+The unique ``(subscription_id, delivery_date)`` index backs the "no order
+yet" check. It also makes a repeated run for the same day insert nothing.
+The orders are created ``CONFIRMED`` at the meal's current price, in the
+zone resolved for the subscription. The statements bypass the flush
+listeners, so the dashboard counters are updated here.
+"""
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, exists, func, insert, literal, select, true
+
+from app import db
+from app.models import (
+    Meal, MealCapacity, Order, OrderItem, OrderStatus, StatCounter, Subscription, SubscriptionPause
+)
+
+
+def _due(day):
+    """Conditions for a subscription delivering on ``day``."""
+    paused = exists().where(
+        SubscriptionPause.subscription_id == Subscription.id,
+        SubscriptionPause.starts_on <= day,
+        SubscriptionPause.ends_on >= day,
+    )
+    ordered = exists().where(Order.subscription_id == Subscription.id, Order.delivery_date == day)
+    return (
+        Subscription.is_active == true(),
+        Subscription.starts_on <= day,
+        (Subscription.ends_on.is_(None)) | (Subscription.ends_on >= day),
+        Subscription.weekdays.op('&')(1 << day.weekday()) != 0,
+        Meal.is_available == true(),
+        ~paused,
+        ~ordered,
+    )
+
+
+def materialize_orders(day):
+    """Create the orders due on ``day`` and commit; returns how many were created."""
+    now = datetime.utcnow()
+    order = Order.__table__.c
+    orders = (
+        select(
+            Subscription.id,
+            Subscription.user_id,
+            literal(OrderStatus.CONFIRMED, order.status.type),
+            Subscription.delivery_address,
+            literal(day, order.delivery_date.type),
+            Subscription.delivery_time,
+            Subscription.delivery_zone,
+            Meal.price * Subscription.quantity,
+            literal(now, order.created_at.type),
+            literal(1),
+        )
+        .join(Meal, Meal.id == Subscription.meal_id)
+        .where(*_due(day))
+    )
+    result = db.session.execute(insert(Order).from_select(
+        ['subscription_id', 'user_id', 'status', 'delivery_address', 'delivery_date', 'delivery_time',
+         'delivery_zone', 'total_amount', 'created_at', 'version'],
+        orders,
+    ))
+    if result.rowcount == 0:
+        # Nothing due or already done: keep the table versions (and ETags) as they were
+        db.session.rollback()
+        return 0
+
+    # The rows just inserted are this day's subscription orders stamped ``now``
+    created = (
+        Order.delivery_date == day,
+        Order.subscription_id.is_not(None),
+        Order.created_at == now,
+    )
+    db.session.execute(insert(OrderItem).from_select(
+        ['order_id', 'meal_id', 'quantity'],
+        select(Order.id, Subscription.meal_id, Subscription.quantity)
+        .join(Subscription, Subscription.id == Order.subscription_id)
+        .where(*created),
+    ))
+    MealCapacity.take(db.session.connection(), and_(*created))
+
+    count, amount = db.session.execute(
+        select(func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0.0)).where(*created)
+    ).one()
+    StatCounter.apply(db.session.connection(), {
+        f'orders:{OrderStatus.CONFIRMED.value}': (count, 0.0),
+        f'revenue:{now.date().isoformat()}': (count, amount),
+    })
+    db.session.commit()
+    return count
+
+
+subscriptions_cli = AppGroup('subscriptions', help='Recurring tiffin subscriptions.')
+
+
+@subscriptions_cli.command('materialize')
+@click.option('--date', 'day', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Delivery date (default: tomorrow).')
+@click.option('--days', type=int, default=1, show_default=True, help='Number of days from --date.')
+def materialize(day, days):
+    """Create the orders for subscriptions due on the coming day(s); safe to re-run."""
+    start = day.date() if day else datetime.utcnow().date() + timedelta(days=1)
+    for offset in range(days):
+        current = start + timedelta(days=offset)
+        click.echo(f'{current.isoformat()}: created {materialize_orders(current)} orders.')
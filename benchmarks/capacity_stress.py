@@ -0,0 +1,101 @@
+"""Reservation throughput and oversell check for one hot meal.
+
+Worker threads place orders for the same meal, date and slot the way
+``main.order`` does: take portions with ``MealCapacity.reserve``, then
+insert the Order and its OrderItem and commit, or roll back when the meal
+is sold out. Attempts outnumber the portions on offer, so most threads
+race for the last few. At the end the portions sold must equal the
+capacity exactly.
+
+Usage:
+    python -m benchmarks.capacity_stress [--workers 16] [--attempts 200] [--capacity 1000]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models import Meal, MealCapacity, Order, OrderItem, User
+from config import Config
+
+DAY = date(2026, 11, 2)
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def place_orders(app, attempts, outcomes):
+    with app.app_context():
+        for _ in range(attempts):
+            try:
+                if not MealCapacity.reserve(db.session.connection(), 1, DAY, 'lunch', 1):
+                    db.session.rollback()
+                    outcomes.append('sold out')
+                    continue
+                order = Order(user_id=1, delivery_address='12 MG Road', delivery_date=DAY,
+                              delivery_time='lunch', total_amount=120.0)
+                order.items.append(OrderItem(meal_id=1, quantity=1))
+                db.session.add(order)
+                db.session.commit()
+                outcomes.append('placed')
+            except OperationalError:
+                db.session.rollback()
+                outcomes.append('error')
+            finally:
+                db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=200, help='orders each worker tries to place')
+    parser.add_argument('--capacity', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            db.session.add_all([User(username='bench', email='bench@example.com'), Meal(name='Thali', price=120.0)])
+            db.session.flush()
+            MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', args.capacity)
+            db.session.commit()
+
+        outcomes = []
+        threads = [threading.Thread(target=place_orders, args=(app, args.attempts, outcomes))
+                   for _ in range(args.workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            sold = db.session.scalar(db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)))
+            remaining = db.session.get(MealCapacity, (1, DAY, 'lunch')).remaining
+            db.session.remove()
+            db.engine.dispose()
+
+    attempted = len(outcomes)
+    print(f'{args.workers} workers, {attempted} attempts for {args.capacity} portions in {elapsed:.2f} s '
+          f'({attempted / elapsed:,.0f} attempts/s, {outcomes.count("placed") / elapsed:,.0f} orders/s)')
+    print(f'placed {outcomes.count("placed")}, sold out {outcomes.count("sold out")}, '
+          f'errors {outcomes.count("error")}')
+    print(f'sold {sold} of {args.capacity}, {remaining} left, oversold {max(sold - args.capacity, 0)}')
+
+
+if __name__ == '__main__':
+    main()
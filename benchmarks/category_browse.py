@@ -0,0 +1,117 @@
+"""Multi-category browsing: catalog id-set intersection against SQL joins.
+
+Seeds ``--meals`` meals over a dozen categories, each meal in one to
+three of them. The benchmark then times each filter two ways. One is
+``catalog.browse`` on a warm snapshot. The other is the SQL it replaces,
+which joins ``meal_categories`` once per category. It also reports how
+long a snapshot takes to rebuild after the catalog changes.
+
+Usage:
+    python -m benchmarks.category_browse [--meals 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, select
+
+from app import create_app, db
+from app.models import Meal, meal_categories
+from app.utils.catalog import catalog
+from config import Config
+
+CATEGORIES = ('Vegan', 'Vegetarian', 'Jain', 'High Protein', 'Low Carb', 'Gluten Free',
+              'South Indian', 'North Indian', 'Street Food', 'Breakfast', 'Kids', 'Festive')
+FILTERS = (
+    (('Vegan',), None),
+    (('Vegan',), 100.0),
+    (('Vegan', 'Jain'), None),
+    (('Vegan', 'Gluten Free', 'South Indian'), 150.0),
+)
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def seed(meals, seed_value=11):
+    """Insert categories, meals and their links with raw executemany calls."""
+    rng = random.Random(seed_value)
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.executemany(
+        'INSERT INTO meal_category (id, name, is_active, display_order, created_at) VALUES (?, ?, 1, ?, ?)',
+        ((n, name, n, now) for n, name in enumerate(CATEGORIES, 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal (id, name, price, is_available, is_vegetarian, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        ((n, f'Meal {n}', rng.randrange(60, 400), rng.random() < 0.9, rng.random() < 0.6, now)
+         for n in range(1, meals + 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal_categories (meal_id, category_id) VALUES (?, ?)',
+        ((n, category) for n in range(1, meals + 1)
+         for category in rng.sample(range(1, len(CATEGORIES) + 1), rng.randrange(1, 4)))
+    )
+    connection.commit()
+
+
+def sql_browse(names, max_price):
+    """The join-per-category query that the catalog index replaces."""
+    statement = select(Meal).where(Meal.is_available)
+    for name in names:
+        link = meal_categories.alias()
+        statement = statement.join(link, and_(link.c.meal_id == Meal.id,
+                                              link.c.category_id == CATEGORIES.index(name) + 1))
+    if max_price is not None:
+        statement = statement.where(Meal.price <= max_price)
+    return [meal.to_dict() for meal in db.session.scalars(statement.order_by(Meal.id))]
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            seed(args.meals)
+            started = time.perf_counter()
+            catalog.get()
+            print(f'snapshot for {args.meals} meals built in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+            print(f"{'filter':<44} {'meals':>6} {'index ms':>9} {'sql ms':>8}")
+            for names, max_price in FILTERS:
+                indexed, meals = median_ms(lambda: catalog.browse(names, max_price), args.repeat)
+                joined, rows = median_ms(lambda: sql_browse(names, max_price), args.repeat)
+                assert [meal['id'] for meal in meals] == [row['id'] for row in rows]
+                label = ' & '.join(names) + (f' <= {max_price:.0f}' if max_price else '')
+                print(f'{label:<44} {len(meals):>6} {indexed:>9.2f} {joined:>8.2f}')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
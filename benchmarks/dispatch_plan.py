@@ -0,0 +1,103 @@
+"""Rider batch planning time for a busy delivery day.
+
+Seeds ``--days`` days of ``--orders`` orders each (1-3 items per order)
+against an area table of ``--zones`` zones. Most orders are confirmed and
+zoned on insert. ``--unzoned`` of them have no zone stored, so they are
+resolved in memory. The benchmark then times ``plan_batches`` for one day.
+
+Usage:
+    python -m benchmarks.dispatch_plan [--orders 50000] [--days 7] [--zones 40]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from app import create_app, db
+from app.utils.dispatch import plan_batches
+from config import Config
+
+SLOTS = ('breakfast', 'lunch', 'dinner')
+FIRST_DAY = date(2026, 1, 1)
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def seed(orders, days, zones, unzoned, seed_value=11):
+    """Insert areas, orders and items with raw executemany calls."""
+    rng = random.Random(seed_value)
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.execute("INSERT INTO user (id, username, email, created_at) VALUES (1, 'bench', 'bench@example.com', ?)",
+                       (now,))
+    connection.execute("INSERT INTO meal (id, name, price, is_available, created_at) VALUES (1, 'Thali', 100, 1, ?)",
+                       (now,))
+    localities = [(f'locality {n}', f'zone {n % zones}') for n in range(zones * 10)]
+    pincodes = [(str(560001 + n), f'zone {n % zones}') for n in range(zones * 3)]
+    connection.executemany('INSERT INTO delivery_area (locality, zone) VALUES (?, ?)', localities)
+    connection.executemany('INSERT INTO delivery_area (pincode, zone) VALUES (?, ?)', pincodes)
+
+    def order_rows():
+        for n in range(1, orders * days + 1):
+            if rng.random() < 0.5:
+                pincode, zone = rng.choice(pincodes)
+                address = f'{rng.randrange(1, 500)}, {rng.randrange(1, 40)}th Cross, Bengaluru {pincode}'
+            else:
+                locality, zone = rng.choice(localities)
+                address = f'{rng.randrange(1, 500)}, {locality.title()}, Bengaluru'
+            status = 'CONFIRMED' if rng.random() < 0.9 else 'PENDING'
+            yield (n, status, address, (FIRST_DAY + timedelta(days=(n - 1) // orders)).isoformat(),
+                   rng.choice(SLOTS), None if rng.random() < unzoned else zone, now)
+
+    connection.executemany(
+        'INSERT INTO "order" (id, user_id, status, delivery_address, delivery_date, delivery_time, '
+        'delivery_zone, total_amount, created_at) VALUES (?, 1, ?, ?, ?, ?, ?, 0, ?)',
+        order_rows()
+    )
+    connection.executemany(
+        'INSERT INTO order_item (order_id, meal_id, quantity) VALUES (?, 1, ?)',
+        ((n, rng.randrange(1, 3)) for n in range(1, orders * days + 1) for _ in range(rng.randrange(1, 4)))
+    )
+    connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50000, help='orders per day')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--zones', type=int, default=40)
+    parser.add_argument('--unzoned', type=float, default=0.05, help='share of orders without a stored zone')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            seed(args.orders, args.days, args.zones, args.unzoned)
+            day = FIRST_DAY + timedelta(days=args.days // 2)
+            timings = []
+            for _ in range(3):
+                started = time.perf_counter()
+                batches = plan_batches(day)
+                timings.append(time.perf_counter() - started)
+            orders = sum(len(batch.order_ids) for batch in batches)
+            print(f'{args.orders} orders/day over {args.days} days, {args.zones} zones, '
+                  f'{args.unzoned:.0%} unzoned')
+            print(f'{orders} confirmed orders -> {len(batches)} batches in {min(timings) * 1000:.0f} ms '
+                  f'(best of 3; worst {max(timings) * 1000:.0f} ms)')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Login throughput against the size of the password hashing executor.
+
+Concurrent clients post to /auth/login. Every login runs one bcrypt check
+on the hashing executor, so throughput grows with PASSWORD_HASH_WORKERS up
+to the number of CPU cores and then levels off. Past that point, extra
+clients queue for the executor instead of competing for the CPU.
+
+Usage:
+    python -m benchmarks.login_throughput [--clients 16] [--logins 20] [--rounds 10]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.models import User
+from app.utils.passwords import passwords
+from config import Config
+
+
+def make_app(path, workers, rounds, users):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',  # no HTTPS redirect from Talisman
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'BCRYPT_LOG_ROUNDS': rounds,
+        'PASSWORD_HASH_WORKERS': workers,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        if not User.query.count():
+            password_hash = passwords.hash('lunchtime')
+            db.session.add_all([
+                User(username=f'user{n}', email=f'user{n}@example.com', password_hash=password_hash)
+                for n in range(users)
+            ])
+            db.session.commit()
+    return app
+
+
+def log_in(app, client_number, logins, failures):
+    client = app.test_client()
+    for n in range(logins):
+        response = client.post('/auth/login', data={
+            'email': f'user{client_number}@example.com', 'password': 'lunchtime'
+        })
+        client.get('/auth/logout')
+        if response.status_code != 302 or response.location.endswith('/auth/login'):
+            failures.append(response.status_code)
+
+
+def run(path, workers, clients, logins, rounds):
+    app = make_app(path, workers, rounds, clients)
+    failures = []
+    threads = [threading.Thread(target=log_in, args=(app, n, logins, failures)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        passwords.shutdown()
+        db.engine.dispose()
+    return clients * logins - len(failures), len(failures), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=20, help='logins per client')
+    parser.add_argument('--rounds', type=int, default=10, help='bcrypt cost')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f'{args.clients} clients x {args.logins} logins, bcrypt cost {args.rounds}, '
+          f'{os.cpu_count()} CPUs')
+    print(f"{'workers':>8}{'logins':>8}{'failed':>8}{'seconds':>10}{'logins/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        for workers in args.workers:
+            ok, failed, elapsed = run(path, workers, args.clients, args.logins, args.rounds)
+            print(f'{workers:>8}{ok:>8}{failed:>8}{elapsed:>10.2f}{ok / elapsed:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Meal search latency: FTS5 index against a LIKE '%...%' scan.
+
+Seeds ``--meals`` meals with generated names and descriptions, and puts
+each meal in one or two of a dozen categories. Inserting through the
+triggers builds the search index, which is then rebuilt and optimized
+the way ``flask search rebuild`` does it. The benchmark then reports the
+median time of ``search_meals`` and of an equivalent ranked ``LIKE`` query
+for each query, over ``--repeat`` runs.
+
+Usage:
+    python -m benchmarks.meal_search [--meals 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from app import create_app, db
+from app.utils.search import match_expression, rebuild_search_index, search_meals
+from config import Config
+
+DISHES = ('paneer', 'dal', 'rajma', 'chole', 'biryani', 'pulao', 'khichdi', 'dosa', 'idli', 'poha',
+          'upma', 'thali', 'korma', 'kofta', 'saag', 'aloo', 'gobi', 'bhindi', 'baingan', 'methi',
+          'chicken', 'mutton', 'fish', 'prawn', 'egg', 'soya', 'tofu', 'mushroom', 'palak', 'matar',
+          'kadhi', 'sambar', 'rasam', 'uttapam', 'paratha', 'kulcha', 'pav', 'vada', 'dhokla', 'thepla')
+STYLES = ('tikka', 'masala', 'makhani', 'fry', 'tadka', 'curry', 'bowl', 'wrap', 'combo', 'special',
+          'kadai', 'do pyaza', 'chettinad', 'hyderabadi', 'amritsari', 'malabar', 'kolhapuri', 'goan',
+          'lababdar', 'bhuna')
+WORDS = ('slow cooked', 'spiced', 'with rice', 'with roti', 'in tomato gravy', 'home style', 'smoky',
+         'with cashew', 'tangy', 'light', 'coconut', 'ghee roasted', 'with salad', 'crispy', 'mild',
+         'fiery', 'creamy', 'tandoor baked', 'with pickle', 'mustard seeds', 'curry leaves', 'fenugreek',
+         'jaggery', 'tamarind', 'yoghurt', 'saffron', 'cardamom', 'kokum', 'peanut', 'sesame',
+         'millet', 'brown rice', 'quinoa', 'sprouts', 'mint chutney', 'onion', 'garlic', 'ginger',
+         'green chilli', 'lemon')
+CATEGORIES = ('Vegan', 'Vegetarian', 'Jain', 'High Protein', 'Low Carb', 'Gluten Free',
+              'South Indian', 'North Indian', 'Street Food', 'Breakfast', 'Kids', 'Festive')
+# Dish searches first, then words shared by a large share of the catalog
+QUERIES = ('pan tik', 'hyderabadi biryani', 'gobi fry', 'malabar fish', 'dosa', 'paneer', 'kokum', 'jain')
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def seed(meals, seed_value=5):
+    """Insert meals, categories and their links with raw executemany calls."""
+    rng = random.Random(seed_value)
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.executemany(
+        'INSERT INTO meal_category (id, name, is_active, display_order, created_at) VALUES (?, ?, 1, ?, ?)',
+        ((n, name, n, now) for n, name in enumerate(CATEGORIES, 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal (id, name, description, price, is_available, category, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((n, f'{rng.choice(DISHES).title()} {rng.choice(STYLES).title()} {n}',
+          ', '.join(rng.sample(WORDS, 3)), rng.randrange(60, 400), rng.random() < 0.9,
+          rng.choice(('veg', 'non-veg', 'vegan')), now)
+         for n in range(1, meals + 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal_categories (meal_id, category_id) VALUES (?, ?)',
+        ((n, category) for n in range(1, meals + 1)
+         for category in rng.sample(range(1, len(CATEGORIES) + 1), rng.randrange(1, 3)))
+    )
+    connection.commit()
+
+
+def like_search(query, limit=20):
+    """The LIKE equivalent, with name hits first, so every row has to be scanned."""
+    clauses, params = [], {'limit': limit}
+    for n, word in enumerate(query.split()):
+        params[f'w{n}'] = f'%{word}%'
+        clauses.append(f'(name LIKE :w{n} OR description LIKE :w{n} OR category LIKE :w{n})')
+    return db.session.execute(db.text(
+        f"SELECT * FROM meal WHERE is_available AND {' AND '.join(clauses)} "
+        'ORDER BY name LIKE :w0 DESC, id LIMIT :limit'
+    ), params).all()
+
+
+def median_ms(search, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            seed(args.meals)
+            print(f'seeded {args.meals} meals, indexed by triggers, in {time.perf_counter() - started:.1f} s')
+            started = time.perf_counter()
+            indexed = rebuild_search_index(db.session.connection())
+            db.session.commit()
+            print(f'rebuilt and optimized the index ({indexed} meals) in {time.perf_counter() - started:.1f} s')
+            print(f"{'query':<20} {'matches':>8} {'fts5 ms':>8} {'like ms':>8}")
+            for query in QUERIES:
+                matches = db.session.execute(db.text('SELECT count(*) FROM meal_search WHERE meal_search MATCH :q'),
+                                             {'q': match_expression(query)}).scalar()
+                print(f'{query:<20} {matches:>8} {median_ms(search_meals, query, args.repeat):>8.2f} '
+                      f'{median_ms(like_search, query, args.repeat):>8.2f}')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Bulk order import throughput in rows per second.
+
+Builds ``--rows`` CSV rows (one to three meal lines per order, a few
+percent invalid) for ``--customers`` customers and ``--meals`` meals, then
+times ``import_orders`` at each ``--chunk-size`` on a fresh database.
+
+Usage:
+    python -m benchmarks.order_import [--rows 50000] [--chunk-size 100 500 2000]
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+from datetime import datetime
+
+from app import create_app, db
+from app.utils.order_import import import_orders, read_rows
+from config import Config
+
+SLOTS = ('breakfast', 'lunch', 'dinner')
+HEADER = 'email,delivery_address,delivery_date,delivery_time,meal,quantity,unit_price,order_ref\n'
+
+
+def make_app(path, chunk_size):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'ORDER_IMPORT_CHUNK_SIZE': chunk_size,
+    })
+    return create_app(config)
+
+
+def seed(customers, meals):
+    """Insert customers and meals with raw executemany calls."""
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.executemany(
+        'INSERT INTO user (id, username, email, created_at) VALUES (?, ?, ?, ?)',
+        ((n, f'user{n}', f'user{n}@example.com', now) for n in range(1, customers + 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal (id, name, price, is_available, created_at) VALUES (?, ?, ?, 1, ?)',
+        ((n, f'Meal {n}', 50 + n % 200, now) for n in range(1, meals + 1))
+    )
+    connection.commit()
+
+
+def make_csv(rows, customers, meals, invalid, seed_value=5):
+    rng = random.Random(seed_value)
+    lines, order = [], 0
+    while len(lines) < rows:
+        order += 1
+        email = f'user{rng.randrange(1, customers + 1)}@example.com'
+        address = f'{rng.randrange(1, 500)}, Koramangala {rng.randrange(1, 9)}th Block'
+        day = f'2026-11-{rng.randrange(1, 29):02d}'
+        slot = rng.choice(SLOTS)
+        for _ in range(rng.randrange(1, 4)):
+            meal = rng.randrange(1, meals + 1)
+            price = 50 + meal % 200
+            if rng.random() < invalid:
+                price += 1
+            lines.append(f'{email},"{address}",{day},{slot},{meal},{rng.randrange(1, 3)},{price},R{order}\n')
+    return HEADER + ''.join(lines[:rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--meals', type=int, default=200)
+    parser.add_argument('--invalid', type=float, default=0.02, help='share of rows with a wrong unit price')
+    parser.add_argument('--chunk-size', type=int, nargs='+', default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    text = make_csv(args.rows, args.customers, args.meals, args.invalid)
+    for chunk_size in args.chunk_size:
+        with tempfile.TemporaryDirectory() as directory:
+            app = make_app(os.path.join(directory, 'bench.db'), chunk_size)
+            with app.app_context():
+                db.create_all()
+                seed(args.customers, args.meals)
+                result = import_orders(read_rows(io.StringIO(text), 'csv'))
+                print(f'chunk {chunk_size:>5}: {result.rows} rows -> {result.orders} orders, '
+                      f'{len(result.errors)} errors in {result.seconds:.2f}s '
+                      f'({result.rows_per_second:,.0f} rows/s)')
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Kitchen production plan timings over a large order history.
+
+Seeds ``--items`` order items, about two per order, spread over
+``--days`` delivery days, three slots and ``--meals`` meals. Then times:
+
+- the grouped SQL plan for one day and for a week;
+- loading a week into ``PlanColumns``;
+- reslicing the loaded week by day and slot with NumPy (when installed)
+  and with the ``array`` fallback.
+
+Usage:
+    python -m benchmarks.production_plan [--items 1000000] [--days 60] [--meals 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from app import create_app, db
+from app.utils import production
+from app.utils.production import PlanColumns, production_plan
+from config import Config
+
+SLOTS = ('breakfast', 'lunch', 'dinner')
+STATUSES = ('PENDING', 'CONFIRMED', 'DELIVERED', 'DELIVERED', 'DELIVERED', 'CANCELLED')
+FIRST_DAY = date(2026, 1, 1)
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def seed(items, days, meals, seed_value=7):
+    """Insert users, meals, orders and items with raw executemany calls."""
+    rng = random.Random(seed_value)
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.execute("INSERT INTO user (id, username, email, created_at) VALUES (1, 'bench', 'bench@example.com', ?)",
+                       (now,))
+    connection.executemany(
+        'INSERT INTO meal (id, name, price, is_available, created_at) VALUES (?, ?, ?, 1, ?)',
+        [(n, f'Meal {n}', 100.0, now) for n in range(1, meals + 1)]
+    )
+    orders = (items + 1) // 2
+    connection.executemany(
+        'INSERT INTO "order" (id, user_id, status, delivery_address, delivery_date, delivery_time, '
+        'total_amount, created_at) VALUES (?, 1, ?, ?, ?, ?, 0, ?)',
+        ((n, rng.choice(STATUSES), 'address', (FIRST_DAY + timedelta(days=rng.randrange(days))).isoformat(),
+          rng.choice(SLOTS), now) for n in range(1, orders + 1))
+    )
+    connection.executemany(
+        'INSERT INTO order_item (id, order_id, meal_id, quantity) VALUES (?, ?, ?, ?)',
+        ((n, n // 2 + 1, rng.randrange(1, meals + 1), rng.randrange(1, 4))
+         for n in range(items))
+    )
+    connection.commit()
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--meals', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            seed(args.items, args.days, args.meals)
+            print(f'seeded {args.items} items in {time.perf_counter() - started:.1f}s; '
+                  f'numpy {"available" if production.numpy is not None else "not installed"}')
+            day, week_end = FIRST_DAY + timedelta(days=7), FIRST_DAY + timedelta(days=13)
+
+            rows, ms = timed(lambda: production_plan(day))
+            print(f'{"SQL plan, one day":<36}{ms:>9.1f} ms  {len(rows)} rows')
+            rows, ms = timed(lambda: production_plan(day, week_end))
+            print(f'{"SQL plan, one week":<36}{ms:>9.1f} ms  {len(rows)} rows')
+            columns, ms = timed(lambda: PlanColumns.load(day, week_end), repeat=1)
+            print(f'{"PlanColumns.load, one week":<36}{ms:>9.1f} ms  {len(columns)} items')
+
+            slices = [(day + timedelta(days=n), slot) for n in range(7) for slot in SLOTS]
+            backends = [('array', None)]
+            if production.numpy is not None:
+                backends.insert(0, ('numpy', production.numpy))
+            for name, module in backends:
+                production.numpy = module
+                columns = PlanColumns.load(day, week_end)
+                _, ms = timed(lambda: [columns.plan(day=d, slot=s) for d, s in slices])
+                print(f'{f"{len(slices)} day/slot slices, {name}":<36}{ms:>9.1f} ms')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Per-check latency of the rate limit storages.
+
+Times ``limiter.hit()`` against ``memory://`` and the shared ``sqlite://``
+storage, for the fixed window and sliding window counter strategies, from
+one or more processes hitting the same database. Keys are spread over
+``--clients`` clients, as they would be across remote addresses.
+
+Usage:
+    python -m benchmarks.ratelimit_latency [--checks 20000] [--processes 1 4]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+
+import app.utils.ratelimit  # noqa: F401  registers sqlite://
+
+STRATEGIES = {
+    'fixed-window': FixedWindowRateLimiter,
+    'sliding-window-counter': SlidingWindowCounterRateLimiter,
+}
+
+
+def time_checks(uri, strategy, checks, clients, results):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse('1000000/hour')
+    timings = []
+    for n in range(checks):
+        started = time.perf_counter_ns()
+        limiter.hit(item, f'203.0.113.{n % clients}')
+        timings.append(time.perf_counter_ns() - started)
+    results.put(timings)
+
+
+def run(uri, strategy, checks, clients, processes):
+    if processes == 1 or uri.startswith('memory'):
+        results = multiprocessing.Queue()
+        time_checks(uri, strategy, checks, clients, results)
+        return results.get()
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [context.Process(target=time_checks, args=(uri, strategy, checks, clients, results))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    timings = [timing for _ in workers for timing in results.get()]
+    for worker in workers:
+        worker.join()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--checks', type=int, default=20000, help='checks per process')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    print(f"{'storage':<9}{'strategy':<24}{'procs':>6}{'p50 us':>9}{'p99 us':>9}{'mean us':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in ('memory', 'sqlite'):
+            for strategy in STRATEGIES:
+                for processes in args.processes:
+                    if storage == 'memory' and processes > 1:
+                        continue  # not shared between processes
+                    uri = 'memory://' if storage == 'memory' else \
+                        f"sqlite:///{os.path.join(directory, f'{strategy}-{processes}.db')}"
+                    timings = sorted(run(uri, strategy, args.checks, args.clients, processes))
+                    p50 = timings[len(timings) // 2] / 1000
+                    p99 = timings[int(len(timings) * 0.99)] / 1000
+                    mean = statistics.fmean(timings) / 1000
+                    print(f'{storage:<9}{strategy:<24}{processes:>6}{p50:>9.1f}{p99:>9.1f}{mean:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
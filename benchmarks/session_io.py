@@ -0,0 +1,108 @@
+"""Session store I/O for the filesystem and SQLite session backends.
+
+Each client sets a session once and then makes ``--requests`` requests that
+read it. A ``--write-ratio`` share of those requests change the session, as
+adding to a cart would. The benchmark counts store writes and the process's
+read and write system calls from ``/proc/self/io``. The filesystem store
+rewrites the session file on every request. The SQLite store writes only
+changed sessions, plus one expiry touch per session per touch interval.
+
+Usage:
+    python -m benchmarks.session_io [--clients 20] [--requests 200] [--write-ratio 0.1]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import session
+
+from app import create_app
+from config import Config
+
+
+def make_app(backend, directory):
+    settings = {
+        'TESTING': True,
+        'ENV': 'benchmark',  # no HTTPS redirect from Talisman
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        'SESSION_TYPE': backend,
+        'SESSION_FILE_DIR': os.path.join(directory, 'flask_session'),
+        'SESSION_SQLITE_PATH': os.path.join(directory, 'sessions.db'),
+    }
+    app = create_app(type('BenchmarkConfig', (Config,), settings))
+
+    @app.route('/_bench/cart/<int:meal_id>')
+    def add_to_cart(meal_id):
+        session['cart'] = session.get('cart', []) + [meal_id]
+        return 'ok'
+
+    @app.route('/_bench/cart')
+    def cart():
+        return str(len(session.get('cart', [])))
+
+    # Count writes the same way for both stores
+    interface = app.session_interface
+    upsert = interface._upsert_session
+    interface.writes = 0
+
+    def counting_upsert(*args):
+        interface.writes += 1
+        return upsert(*args)
+
+    interface._upsert_session = counting_upsert
+    return app
+
+
+def process_io():
+    counters = {}
+    with open('/proc/self/io') as io:
+        for line in io:
+            name, value = line.split(':')
+            counters[name] = int(value)
+    return counters
+
+
+def run(backend, clients, requests, write_ratio):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(backend, directory)
+        test_clients = [app.test_client() for _ in range(clients)]
+        for client in test_clients:
+            client.get('/_bench/cart/1')
+        writes_before = app.session_interface.writes
+        every = round(1 / write_ratio) if write_ratio else 0
+        before = process_io()
+        started = time.perf_counter()
+        for n in range(requests):
+            for client in test_clients:
+                client.get(f'/_bench/cart/{n}' if every and n % every == 0 else '/_bench/cart')
+        elapsed = time.perf_counter() - started
+        after = process_io()
+    total = clients * requests
+    return {
+        'writes': app.session_interface.writes - writes_before,
+        'syscr': (after['syscr'] - before['syscr']) / total,
+        'syscw': (after['syscw'] - before['syscw']) / total,
+        'wchar': (after['wchar'] - before['wchar']) / total,
+        'us': elapsed / total * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='share of requests changing the session')
+    args = parser.parse_args()
+
+    print(f'{args.clients} clients x {args.requests} requests, {args.write_ratio:.0%} change the session')
+    print(f"{'backend':<12}{'writes':>8}{'reads/req':>11}{'writes/req':>12}{'bytes/req':>11}{'us/req':>9}")
+    for backend in ('filesystem', 'sqlite'):
+        result = run(backend, args.clients, args.requests, args.write_ratio)
+        print(f"{backend:<12}{result['writes']:>8}{result['syscr']:>11.1f}{result['syscw']:>12.2f}"
+              f"{result['wchar']:>11.0f}{result['us']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
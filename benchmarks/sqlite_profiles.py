@@ -0,0 +1,96 @@
+"""Order-placement throughput for each SQLite profile.
+
+Each worker thread places orders the way checkout does: read the meal's
+price, then insert an Order, its OrderItem and a Payment and commit. Every
+profile runs against a fresh database file.
+
+Usage:
+    python -m benchmarks.sqlite_profiles [--workers 8] [--orders 200]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models import User, Meal, Order, OrderItem, Payment
+from app.utils.sqlite import checkpoint
+from config import Config, SQLITE_PROFILES
+
+
+def make_app(path, profile):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLITE_PROFILE': profile,
+        'RATELIMIT_ENABLED': False,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', email='bench@example.com'))
+        db.session.add(Meal(name='Thali', price=120.0))
+        db.session.commit()
+    return app
+
+
+def place_orders(app, count, errors):
+    with app.app_context():
+        for _ in range(count):
+            try:
+                price = db.session.get(Meal, 1).price
+                order = Order(user_id=1, delivery_address='12 MG Road', delivery_date=date.today(),
+                              delivery_time='12:30', total_amount=price * 2)
+                order.items.append(OrderItem(meal_id=1, quantity=2))
+                db.session.add(order)
+                db.session.add(Payment(order=order, amount=order.total_amount, payment_method='upi'))
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                errors.append(1)
+            finally:
+                db.session.remove()
+
+
+def run(profile, workers, orders):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'), profile)
+        errors = []
+        threads = [threading.Thread(target=place_orders, args=(app, orders, errors))
+                   for _ in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            placed = Order.query.count()
+            with db.engine.connect() as connection:
+                wal_pages = checkpoint(connection)['log'] if profile != 'compat' else 0
+            db.engine.dispose()
+    return placed, len(errors), elapsed, wal_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=200, help='orders per worker')
+    parser.add_argument('--profile', action='append', choices=sorted(SQLITE_PROFILES),
+                        help='profile to run (repeatable); all by default')
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers x {args.orders} orders')
+    print(f"{'profile':<12}{'orders':>8}{'errors':>8}{'seconds':>10}{'orders/s':>10}{'wal pages':>11}")
+    for profile in args.profile or sorted(SQLITE_PROFILES):
+        placed, errors, elapsed, wal_pages = run(profile, args.workers, args.orders)
+        print(f'{profile:<12}{placed:>8}{errors:>8}{elapsed:>10.2f}{placed / elapsed:>10.0f}{wal_pages:>11}')
+
+
+if __name__ == '__main__':
+    main()
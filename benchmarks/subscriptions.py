@@ -0,0 +1,93 @@
+"""Daily order materialization time for a large subscription book.
+
+Seeds ``--subscriptions`` subscriptions over ``--customers`` customers.
+Most are Mon-Fri and the rest use random weekdays. ``--paused`` of them
+have a pause covering the benchmark day. The benchmark then times
+``materialize_orders`` for that day, once to create the orders and once
+more to check that a re-run creates nothing.
+
+Usage:
+    python -m benchmarks.subscriptions [--subscriptions 100000] [--customers 50000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from app import create_app, db
+from app.utils.subscriptions import materialize_orders
+from config import Config
+
+SLOTS = ('breakfast', 'lunch', 'dinner')
+DAY = date(2026, 11, 2)  # a Monday
+
+
+def make_app(path):
+    config = type('BenchmarkConfig', (Config,), {
+        'TESTING': True,
+        'ENV': 'benchmark',
+        'RATELIMIT_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    return create_app(config)
+
+
+def seed(subscriptions, customers, paused, seed_value=3):
+    """Insert customers, meals, subscriptions and pauses with raw executemany calls."""
+    rng = random.Random(seed_value)
+    connection = db.session.connection().connection.driver_connection
+    now = datetime.utcnow().isoformat(sep=' ')
+    connection.executemany(
+        'INSERT INTO user (id, username, email, created_at) VALUES (?, ?, ?, ?)',
+        ((n, f'user{n}', f'user{n}@example.com', now) for n in range(1, customers + 1))
+    )
+    connection.executemany(
+        'INSERT INTO meal (id, name, price, is_available, created_at) VALUES (?, ?, ?, ?, ?)',
+        ((n, f'Meal {n}', 60 + n, n % 20 != 0, now) for n in range(1, 101))
+    )
+    connection.executemany(
+        'INSERT INTO subscription (id, user_id, meal_id, quantity, weekdays, delivery_time, delivery_address, '
+        'delivery_zone, starts_on, ends_on, is_active, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((n, rng.randrange(1, customers + 1), rng.randrange(1, 101), rng.randrange(1, 3),
+          0b0011111 if rng.random() < 0.8 else rng.randrange(1, 128), rng.choice(SLOTS),
+          f'{rng.randrange(1, 500)}, Koramangala', f'zone {rng.randrange(40)}',
+          (DAY - timedelta(days=rng.randrange(1, 365))).isoformat(), None, rng.random() < 0.95, now)
+         for n in range(1, subscriptions + 1))
+    )
+    connection.executemany(
+        'INSERT INTO subscription_pause (subscription_id, starts_on, ends_on) VALUES (?, ?, ?)',
+        ((n, (DAY - timedelta(days=2)).isoformat(), (DAY + timedelta(days=5)).isoformat())
+         for n in rng.sample(range(1, subscriptions + 1), int(subscriptions * paused)))
+    )
+    connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscriptions', type=int, default=100000)
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--paused', type=float, default=0.05, help='share of subscriptions paused that day')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            seed(args.subscriptions, args.customers, args.paused)
+            started = time.perf_counter()
+            created = materialize_orders(DAY)
+            first = time.perf_counter() - started
+            started = time.perf_counter()
+            again = materialize_orders(DAY)
+            rerun = time.perf_counter() - started
+            print(f'{args.subscriptions} subscriptions, {args.paused:.0%} paused')
+            print(f'created {created} orders in {first * 1000:.0f} ms '
+                  f'({created / first:,.0f} orders/s); re-run created {again} in {rerun * 1000:.0f} ms')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,53 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, '.env'))
 
+# SQLite performance profiles, selected with SQLITE_PROFILE
+SQLITE_PROFILES = {
+    # SQLite's own defaults: rollback journal and an fsync on every commit
+    'compat': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': 0,
+        'SQLITE_CACHE_SIZE': -2000,  # negative means KiB
+        'SQLITE_TEMP_STORE': 'DEFAULT',
+        'SQLITE_BUSY_TIMEOUT': 5000,  # milliseconds
+        'SQLITE_WAL_AUTOCHECKPOINT': 1000,  # pages
+        'SQLITE_JOURNAL_SIZE_LIMIT': -1,  # bytes; -1 leaves the journal unbounded
+        'SQLITE_POOL_SIZE': 5,
+        'SQLITE_MAX_OVERFLOW': 10,
+        'SQLITE_POOL_TIMEOUT': 30,  # seconds to wait for a pooled connection
+    },
+    # WAL so readers never wait for the writer, still fsyncing every commit
+    'durable': {
+        'SQLITE_JOURNAL_MODE': 'WAL',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': 64 * 1024 * 1024,
+        'SQLITE_CACHE_SIZE': -16000,
+        'SQLITE_TEMP_STORE': 'MEMORY',
+        'SQLITE_BUSY_TIMEOUT': 10000,
+        'SQLITE_WAL_AUTOCHECKPOINT': 1000,
+        'SQLITE_JOURNAL_SIZE_LIMIT': 64 * 1024 * 1024,
+        'SQLITE_POOL_SIZE': 10,
+        'SQLITE_MAX_OVERFLOW': 10,
+        'SQLITE_POOL_TIMEOUT': 30,
+    },
+    # WAL with synchronous=NORMAL: commits only fsync at checkpoints, so a power
+    # loss can drop the last few transactions but never corrupts the database
+    'throughput': {
+        'SQLITE_JOURNAL_MODE': 'WAL',
+        'SQLITE_SYNCHRONOUS': 'NORMAL',
+        'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+        'SQLITE_CACHE_SIZE': -64000,
+        'SQLITE_TEMP_STORE': 'MEMORY',
+        'SQLITE_BUSY_TIMEOUT': 10000,
+        'SQLITE_WAL_AUTOCHECKPOINT': 4000,  # fewer, larger checkpoints
+        'SQLITE_JOURNAL_SIZE_LIMIT': 64 * 1024 * 1024,
+        'SQLITE_POOL_SIZE': 10,
+        'SQLITE_MAX_OVERFLOW': 20,
+        'SQLITE_POOL_TIMEOUT': 30,
+    },
+}
+
 class Config:
     # Application
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-please-change-in-production'
@@ -19,6 +66,12 @@ class Config:
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'tiffin_orders.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite tuning for both the SQLAlchemy engine and the db_utils pool: a named
+    # profile from SQLITE_PROFILES below. Any SQLITE_* key set on a config class
+    # overrides the profile's value.
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'throughput')
+    SQLITE_CACHED_STATEMENTS = 256  # prepared statements kept per db_utils connection
+    
     # File Uploads
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'static/uploads')
     MAX_CONTENT_LENGTH = 8 * 1024 * 1024  # 8MB max upload size
@@ -32,24 +85,71 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@tiffintracker.com')
     
+    # Outbound email worker pool
+    EMAIL_WORKERS = 2  # threads, each reusing one SMTP connection per batch
+    EMAIL_QUEUE_SIZE = 1000  # messages; senders block when it is full
+    EMAIL_ENQUEUE_TIMEOUT = 5  # seconds to block before raising EmailQueueFull
+    EMAIL_BATCH_SIZE = 50  # messages sent per SMTP connection
+    EMAIL_MAX_RETRIES = 3
+    EMAIL_RETRY_BACKOFF = 2.0  # seconds, doubled on each retry
+    
     # Admin
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@tiffintracker.com')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
     
-    # Session
-    SESSION_TYPE = 'filesystem'
+    # Rate limiting: counters in a SQLite file shared by every worker process
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or \
+        'sqlite:///' + os.path.join(basedir, 'instance/ratelimit.db')
+    RATELIMIT_STRATEGY = 'sliding-window-counter'
+    
+    # Session: SQLite rows written only when the session changes
+    SESSION_TYPE = 'sqlite'
+    SESSION_SQLITE_PATH = os.environ.get('SESSION_SQLITE_PATH') or \
+        os.path.join(basedir, 'instance/sessions.db')
+    SESSION_SQLITE_TOUCH_INTERVAL = 300  # seconds between expiry refreshes of an unchanged session
+    SESSION_SQLITE_GC_EVERY = 100  # writes between batch deletions of expired sessions
+    SESSION_SQLITE_GC_BATCH = 500
+    PERMANENT_SESSION_LIFETIME = timedelta(minutes=30)
     
     # Security
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     REMEMBER_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     
+    # Dispatch: rider batches per slot and zone
+    DISPATCH_RIDER_CAPACITY = 20  # meals one rider carries
+    DISPATCH_MAX_STOPS = 12  # orders in one run
+    
+    # Bulk order import
+    ORDER_IMPORT_CHUNK_SIZE = 500  # orders per transaction
+    
     # Pagination
     ITEMS_PER_PAGE = 10
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 200
+    
+    # Menu catalog cache
+    CATALOG_CACHE_TTL = 300  # seconds; edits to meals invalidate it immediately
+    
+    # Identity cache for Flask-Login's user loader
+    IDENTITY_CACHE_TTL = 30  # seconds; account and role edits evict immediately
+    IDENTITY_CACHE_SIZE = 1024
+    
+    # Activity tracking: flush buffered last_seen times this often or at this many users
+    ACTIVITY_FLUSH_INTERVAL = 60  # seconds
+    ACTIVITY_FLUSH_SIZE = 500
+    ACTIVITY_FLUSH_AT_EXIT = True  # write what is still buffered when the process exits
+    
+    # Export
+    EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip when streaming exports
     
     # Security
     SECURITY_PASSWORD_SALT = os.environ.get('SECURITY_PASSWORD_SALT', 'dev-salt-please-change')
     SECURITY_PASSWORD_HASH = 'bcrypt'
+    BCRYPT_LOG_ROUNDS = 12  # cost of new hashes; weaker ones are upgraded at login
+    PASSWORD_HASH_EXECUTOR = 'thread'  # or 'process'
+    PASSWORD_HASH_WORKERS = 4  # hashes computed at once; further logins queue
+    PASSWORD_HASH_TIMEOUT = 30  # seconds to wait for a queued hash
     SECURITY_CONFIRMABLE = True
     SECURITY_RECOVERABLE = True
     SECURITY_TRACKABLE = True
@@ -88,6 +188,10 @@ class TestingConfig(Config):
     MAIL_SUPPRESS_SEND = True
     SECRET_KEY = 'test-secret-key'
     LOGIN_DISABLED = True  # Disable login_required decorators for testing
+    BCRYPT_LOG_ROUNDS = 4  # the minimum, to keep tests fast
+    RATELIMIT_STORAGE_URI = 'memory://'
+    SESSION_SQLITE_PATH = ':memory:'
+    ACTIVITY_FLUSH_AT_EXIT = False  # test databases are gone by then
 
 
 class ProductionConfig(Config):
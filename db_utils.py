@@ -1,37 +1,287 @@
 """Database utility functions for the Tiffin Tracker application.
 
 This module provides helper functions for database operations including user management,
-order management, and authentication decorators. It uses SQLite as the database backend.
+order management, and authentication decorators. It uses SQLite as the database backend,
+through a shared pool of tuned connections (see :class:`ConnectionPool`).
 """
 
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from flask import Flask, g, session, redirect, url_for, flash, Response
+from flask import Flask, current_app, g, has_app_context, session, redirect, url_for, flash, Response
+from sqlalchemy.engine import make_url
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from app.utils.sqlite import pragma_statements, resolve_settings
+from config import Config
+
 # Type aliases
 SQLiteRow = sqlite3.Row
 SQLiteCursor = sqlite3.Cursor
 SQLiteConnection = sqlite3.Connection
 
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """A thread-safe pool of tuned SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed out one holder at a
+    time, so the page cache, memory map and each connection's prepared-statement
+    cache survive from one request to the next. Every new connection gets the
+    PRAGMAs of the default SQLite profile (see ``config.SQLITE_PROFILES``)
+    applied once.
+
+    Args:
+        path: Path to the database file, or ``':memory:'``.
+        size: Maximum number of open connections.
+        timeout: Seconds to wait for a free connection before raising
+            :class:`PoolTimeout`.
+        cached_statements: Prepared statements kept per connection.
+        **pragmas: Overrides for the profile's settings, named without the
+            ``SQLITE_`` prefix, e.g. ``journal_mode='WAL'`` or ``cache_size=-2000``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 5,
+        timeout: float = 30,
+        cached_statements: int = 256,
+        **pragmas: Any
+    ) -> None:
+        if size < 1:
+            raise ValueError('Pool size must be at least 1.')
+        settings = resolve_settings({})
+        for name, value in pragmas.items():
+            key = f'SQLITE_{name.upper()}'
+            if key not in settings:
+                raise TypeError(f"Unknown pool setting '{name}'.")
+            settings[key] = value
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = int(cached_statements)
+        self.pragmas = pragma_statements(settings)
+        self._idle: List[SQLiteConnection] = []
+        self._open = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        self._stats = {'created': 0, 'acquired': 0, 'reused': 0, 'waited': 0, 'timeouts': 0}
+
+    def _connect(self) -> SQLiteConnection:
+        path, uri = self.path, False
+        if path == ':memory:':
+            # Pooled connections must share one in-memory database
+            path, uri = f'file:db_utils_pool_{id(self)}?mode=memory&cache=shared', True
+        conn = sqlite3.connect(
+            path,
+            uri=uri,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            # Connections move between request threads, one holder at a time
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self, timeout: Optional[float] = None) -> SQLiteConnection:
+        """Check a connection out of the pool.
+
+        Args:
+            timeout: Seconds to wait when every connection is in use; defaults
+                to the pool's timeout.
+
+        Returns:
+            SQLiteConnection: A connection with row factory and PRAGMAs set.
+
+        Raises:
+            PoolTimeout: If no connection became free in time.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Connection pool is closed.')
+            waited = False
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'No connection available within {self.timeout}s.')
+                if not waited:
+                    self._stats['waited'] += 1
+                    waited = True
+                self._lock.wait(remaining)
+            self._stats['acquired'] += 1
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+            # Reserve the slot before connecting outside the lock
+            self._open += 1
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def release(self, conn: SQLiteConnection) -> None:
+        """Return a connection to the pool, rolling back any open transaction.
+
+        Args:
+            conn: A connection previously returned by :meth:`acquire`.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connections are dropped instead of being handed out again
+            conn.close()
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            return
+        with self._lock:
+            if self._closed:
+                self._open -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[SQLiteConnection]:
+        """Context manager that acquires a connection and always releases it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool counters.
+
+        Returns:
+            Dict[str, int]: ``size``, ``open``, ``idle`` and ``in_use``
+            connections, plus running totals of connections ``created``,
+            checkouts ``acquired``, checkouts served by an idle connection
+            (``reused``), checkouts that had to wait (``waited``) and
+            ``timeouts``.
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                **self._stats
+            }
+
+    def close(self) -> None:
+        """Close idle connections; connections in use close when released."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+            self._lock.notify_all()
+
+
+_pools: Dict[Tuple[Any, ...], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def database_path(uri: str) -> str:
+    """Return the SQLite file path named by a SQLAlchemy database URI.
+
+    Args:
+        uri: A URI such as ``sqlite:////srv/tiffin_orders.db``.
+
+    Returns:
+        str: The database path, or ``':memory:'`` for in-memory URIs.
+
+    Raises:
+        ValueError: If the URI does not use the SQLite dialect.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite':
+        raise ValueError(f"db_utils only supports SQLite, not '{url.get_backend_name()}'.")
+    return url.database or ':memory:'
+
+
+def get_pool() -> ConnectionPool:
+    """Get the shared pool for the configured database.
+
+    Settings come from the current Flask app's config when there is one and
+    from :class:`config.Config` otherwise, resolved through ``SQLITE_PROFILE``
+    like the SQLAlchemy engine's. One pool is kept per database path and
+    settings, so every app context and thread shares it.
+
+    Returns:
+        ConnectionPool: The pool for the configured database.
+    """
+    source = current_app.config if has_app_context() else vars(Config)
+    settings = resolve_settings(source)
+    settings['SQLITE_CACHED_STATEMENTS'] = source.get('SQLITE_CACHED_STATEMENTS', 256)
+    settings['SQLALCHEMY_DATABASE_URI'] = source.get('SQLALCHEMY_DATABASE_URI')
+    key = tuple(sorted(settings.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                database_path(settings.pop('SQLALCHEMY_DATABASE_URI')),
+                size=settings.pop('SQLITE_POOL_SIZE'),
+                timeout=settings.pop('SQLITE_POOL_TIMEOUT'),
+                cached_statements=settings.pop('SQLITE_CACHED_STATEMENTS'),
+                # max_overflow only applies to SQLAlchemy's pool
+                **{name[len('SQLITE_'):].lower(): value for name, value in settings.items()
+                   if name != 'SQLITE_MAX_OVERFLOW'}
+            )
+    return pool
+
+
+def pool_stats() -> Dict[str, int]:
+    """Return statistics for the configured pool (see :meth:`ConnectionPool.stats`)."""
+    return get_pool().stats()
+
+
+def dispose_pools() -> None:
+    """Close and forget every pool, e.g. after forking or between tests."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
 def get_db() -> SQLiteConnection:
-    """Get a database connection with row factory.
+    """Get a pooled database connection with row factory.
     
-    This function uses Flask's application context to store the database connection
-    so it can be reused within the same request.
+    The connection is checked out of the shared :class:`ConnectionPool` and
+    stored in Flask's application context so it is reused within the same
+    request; :func:`close_db` hands it back.
     
     Returns:
         SQLiteConnection: A connection to the SQLite database with row factory set.
     """
     if 'db' not in g:
-        g.db = sqlite3.connect('tiffin_orders.db')
-        g.db.row_factory = sqlite3.Row
+        g.db_pool = get_pool()
+        g.db = g.db_pool.acquire()
     return g.db
 
 def close_db(e: Optional[Exception] = None) -> None:
-    """Close the database connection if it exists.
+    """Return the database connection to the pool if one was checked out.
     
     This function is typically registered as a teardown_appcontext handler.
     
@@ -39,8 +289,9 @@ def close_db(e: Optional[Exception] = None) -> None:
         e: Optional exception that was raised during request handling, if any.
     """
     db = g.pop('db', None)
+    pool = g.pop('db_pool', None)
     if db is not None:
-        db.close()
+        pool.release(db)
 
 def query_db(
     query: str, 
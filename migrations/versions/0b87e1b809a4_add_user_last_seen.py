@@ -0,0 +1,27 @@
+"""Add user.last_seen for write-behind activity tracking
+
+Revision ID: 0b87e1b809a4
+Revises: 535306258ac3
+Create Date: 2026-10-17 04:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b87e1b809a4'
+down_revision = '535306258ac3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+    if 'last_seen' not in columns:
+        op.add_column('user', sa.Column('last_seen', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('last_seen')
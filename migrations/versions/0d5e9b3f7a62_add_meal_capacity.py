@@ -0,0 +1,36 @@
+"""Add meal_capacity for per-meal, per-date and per-slot portion limits
+
+Revision ID: 0d5e9b3f7a62
+Revises: f2a8c4e61b90
+Create Date: 2026-10-17 10:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d5e9b3f7a62'
+down_revision = 'f2a8c4e61b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may already have it
+    if not sa.inspect(op.get_bind()).has_table('meal_capacity'):
+        op.create_table(
+            'meal_capacity',
+            sa.Column('meal_id', sa.Integer(), nullable=False),
+            sa.Column('delivery_date', sa.Date(), nullable=False),
+            sa.Column('delivery_time', sa.String(length=50), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('remaining', sa.Integer(), nullable=False),
+            sa.CheckConstraint('remaining >= 0', name='ck_meal_capacity_remaining'),
+            sa.ForeignKeyConstraint(['meal_id'], ['meal.id']),
+            sa.PrimaryKeyConstraint('meal_id', 'delivery_date', 'delivery_time')
+        )
+
+
+def downgrade():
+    op.drop_table('meal_capacity')
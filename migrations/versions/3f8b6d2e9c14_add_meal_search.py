@@ -0,0 +1,83 @@
+"""Add the meal_search FTS5 index and the triggers that maintain it
+
+Revision ID: 3f8b6d2e9c14
+Revises: 7c3e1f9a2b58
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8b6d2e9c14'
+down_revision = '7c3e1f9a2b58'
+branch_labels = None
+depends_on = None
+
+# The categories column for the meal row aliased ``meal``
+_CATEGORIES = """coalesce(meal.category, '') || ' ' || coalesce((
+        SELECT group_concat(meal_category.name, ' ') FROM meal_categories
+        JOIN meal_category ON meal_category.id = meal_categories.category_id
+        WHERE meal_categories.meal_id = meal.id), '')"""
+
+# Index rows for available meals; unavailable ones are never searched
+_ROW = f"""SELECT meal.id, meal.name, coalesce(meal.description, ''), {_CATEGORIES}
+        FROM meal WHERE meal.is_available"""
+
+_REFRESH_CATEGORIES = f"""UPDATE meal_search SET categories = (
+        SELECT {_CATEGORIES} FROM meal WHERE meal.id = meal_search.rowid)"""
+
+CREATE_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS meal_search USING fts5("
+    "name, description, categories, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_meal_insert AFTER INSERT ON meal BEGIN
+        INSERT INTO meal_search (rowid, name, description, categories) {_ROW} AND meal.id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_meal_update
+    AFTER UPDATE OF name, description, category, is_available ON meal BEGIN
+        DELETE FROM meal_search WHERE rowid = OLD.id;
+        INSERT INTO meal_search (rowid, name, description, categories) {_ROW} AND meal.id = NEW.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS meal_search_meal_delete AFTER DELETE ON meal BEGIN
+        DELETE FROM meal_search WHERE rowid = OLD.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_categories_insert AFTER INSERT ON meal_categories BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid = NEW.meal_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_categories_delete AFTER DELETE ON meal_categories BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid = OLD.meal_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS meal_search_category_rename AFTER UPDATE OF name ON meal_category BEGIN
+        {_REFRESH_CATEGORIES} WHERE rowid IN (
+            SELECT meal_id FROM meal_categories WHERE category_id = NEW.id);
+    END""",
+)
+
+REBUILD_STATEMENTS = (
+    'DELETE FROM meal_search',
+    f'INSERT INTO meal_search (rowid, name, description, categories) {_ROW}',
+    "INSERT INTO meal_search (meal_search) VALUES ('optimize')",
+)
+
+TRIGGERS = (
+    'meal_search_meal_insert', 'meal_search_meal_update', 'meal_search_meal_delete',
+    'meal_search_categories_insert', 'meal_search_categories_delete', 'meal_search_category_rename',
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    # IF NOT EXISTS throughout: db.create_all() may have built the index already
+    for statement in CREATE_STATEMENTS + REBUILD_STATEMENTS:
+        bind.exec_driver_sql(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for trigger in TRIGGERS:
+        bind.exec_driver_sql(f'DROP TRIGGER IF EXISTS {trigger}')
+    bind.exec_driver_sql('DROP TABLE IF EXISTS meal_search')
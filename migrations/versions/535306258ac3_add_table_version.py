@@ -0,0 +1,33 @@
+"""Add table_version change counters for API conditional GETs
+
+Revision ID: 535306258ac3
+Revises: 5cc9a155103b
+Create Date: 2026-10-17 04:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '535306258ac3'
+down_revision = '5cc9a155103b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may already have the table
+    if sa.inspect(op.get_bind()).has_table('table_version'):
+        return
+    op.create_table(
+        'table_version',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,50 @@
+"""Add indexes for the order, user and menu hot paths
+
+Databases created before this revision were built with ``db.create_all()``
+and have no secondary indexes. Fresh databases get the same indexes from the
+model ``__table_args__``, so every index is created with ``if_not_exists``
+and this revision is safe to run on either.
+
+Revision ID: 5cc9a155103b
+Revises:
+Create Date: 2026-10-17 03:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5cc9a155103b'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # API keyset pagination and admin "newest first" listings
+    ('ix_order_created_at_id', 'order', ['created_at', 'id']),
+    ('ix_order_user_id_created_at_id', 'order', ['user_id', 'created_at', 'id']),
+    ('ix_user_created_at_id', 'user', ['created_at', 'id']),
+    ('ix_meal_created_at_id', 'meal', ['created_at', 'id']),
+    # Admin status filters and per-day kitchen/dispatch views
+    ('ix_order_status_created_at', 'order', ['status', 'created_at']),
+    ('ix_order_delivery_date_status', 'order', ['delivery_date', 'status']),
+    # Foreign keys followed by eager loads, exports and reports
+    ('ix_order_item_order_id', 'order_item', ['order_id']),
+    ('ix_order_item_meal_id', 'order_item', ['meal_id']),
+    ('ix_payment_order_id', 'payment', ['order_id']),
+    ('ix_meal_review_meal_id', 'meal_review', ['meal_id']),
+    # main.index and main.menu
+    ('ix_meal_is_available_category', 'meal', ['is_available', 'category']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
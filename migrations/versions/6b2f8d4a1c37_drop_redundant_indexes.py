@@ -0,0 +1,35 @@
+"""Drop indexes made redundant by the production plan's covering indexes
+
+Each of these is a leading prefix of a covering index, which answers the
+same lookups, so it only costs writes and space.
+
+Revision ID: 6b2f8d4a1c37
+Revises: 9a4c7e1b2d63
+Create Date: 2026-10-17 16:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2f8d4a1c37'
+down_revision = '9a4c7e1b2d63'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Prefix of ix_order_delivery_date_status_time
+    ('ix_order_delivery_date_status', 'order', ['delivery_date', 'status']),
+    # Prefix of ix_order_item_order_id_meal_id_quantity
+    ('ix_order_item_order_id', 'order_item', ['order_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.create_index(name, table, columns, if_not_exists=True)
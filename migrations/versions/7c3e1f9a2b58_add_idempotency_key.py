@@ -0,0 +1,43 @@
+"""Add idempotency_key for replaying retried order placements
+
+Revision ID: 7c3e1f9a2b58
+Revises: 0d5e9b3f7a62
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e1f9a2b58'
+down_revision = '0d5e9b3f7a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may already have it
+    if not sa.inspect(op.get_bind()).has_table('idempotency_key'):
+        op.create_table(
+            'idempotency_key',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('key', sa.String(length=64), nullable=False),
+            sa.Column('fingerprint', sa.String(length=64), nullable=False),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('location', sa.String(length=500), nullable=True),
+            sa.Column('content_type', sa.String(length=100), nullable=True),
+            sa.Column('body', sa.LargeBinary(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'key', name='ux_idempotency_key_user_id_key')
+        )
+        op.create_index('ix_idempotency_key_expires_at', 'idempotency_key', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_key_expires_at', table_name='idempotency_key')
+    op.drop_table('idempotency_key')
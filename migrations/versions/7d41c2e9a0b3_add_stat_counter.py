@@ -0,0 +1,36 @@
+"""Add stat_counter for incrementally maintained dashboard totals
+
+Existing databases start with empty counters; run ``flask stats rebuild``
+once after upgrading to fill them from the current rows.
+
+Revision ID: 7d41c2e9a0b3
+Revises: 0b87e1b809a4
+Create Date: 2026-10-17 06:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d41c2e9a0b3'
+down_revision = '0b87e1b809a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may already have the table
+    if sa.inspect(op.get_bind()).has_table('stat_counter'):
+        return
+    op.create_table(
+        'stat_counter',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('stat_counter')
@@ -0,0 +1,32 @@
+"""Add indexes for category browsing
+
+Revision ID: 9a4c7e1b2d63
+Revises: 3f8b6d2e9c14
+Create Date: 2026-10-17 13:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c7e1b2d63'
+down_revision = '3f8b6d2e9c14'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Catalog snapshot: category -> meal ids, answered from the index alone
+    ('ix_meal_categories_category_id_meal_id', 'meal_categories', ['category_id', 'meal_id']),
+    # MealCategory.get_active_categories()
+    ('ix_meal_category_is_active_display_order', 'meal_category', ['is_active', 'display_order']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
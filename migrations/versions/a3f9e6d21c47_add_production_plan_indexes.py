@@ -0,0 +1,36 @@
+"""Add covering indexes for the kitchen production plan
+
+The plan groups order items by delivery date, slot and meal for a date
+range. With these indexes both sides of the order -> order_item join are
+answered from the index without reading table rows.
+
+Revision ID: a3f9e6d21c47
+Revises: 7d41c2e9a0b3
+Create Date: 2026-10-17 07:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9e6d21c47'
+down_revision = '7d41c2e9a0b3'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_order_delivery_date_status_time', 'order', ['delivery_date', 'status', 'delivery_time']),
+    ('ix_order_item_order_id_meal_id_quantity', 'order_item', ['order_id', 'meal_id', 'quantity']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,44 @@
+"""Add delivery_area zones and order.delivery_zone for dispatch batching
+
+Load the area table with ``flask dispatch load-areas`` and then run
+``flask dispatch rezone`` to zone orders placed before this revision.
+
+Revision ID: c81d5a7f3e20
+Revises: a3f9e6d21c47
+Create Date: 2026-10-17 07:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81d5a7f3e20'
+down_revision = 'a3f9e6d21c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases built with db.create_all() may already have these
+    if not inspector.has_table('delivery_area'):
+        op.create_table(
+            'delivery_area',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('pincode', sa.String(length=10), nullable=True),
+            sa.Column('locality', sa.String(length=100), nullable=True),
+            sa.Column('zone', sa.String(length=50), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_delivery_area_pincode', 'delivery_area', ['pincode'])
+        op.create_index('ix_delivery_area_locality', 'delivery_area', ['locality'])
+    columns = {column['name'] for column in inspector.get_columns('order')}
+    if 'delivery_zone' not in columns:
+        op.add_column('order', sa.Column('delivery_zone', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('delivery_zone')
+    op.drop_table('delivery_area')
@@ -0,0 +1,32 @@
+"""Add version counters to order and payment for optimistic concurrency
+
+Existing rows start at version 1.
+
+Revision ID: e4b7d2c9a815
+Revises: c81d5a7f3e20
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7d2c9a815'
+down_revision = 'c81d5a7f3e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in ('order', 'payment'):
+        # Databases built with db.create_all() may already have the column
+        if 'version' not in {column['name'] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in ('payment', 'order'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,70 @@
+"""Add subscriptions, pauses and order.subscription_id for standing orders
+
+Revision ID: f2a8c4e61b90
+Revises: e4b7d2c9a815
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a8c4e61b90'
+down_revision = 'e4b7d2c9a815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases built with db.create_all() may already have these
+    if not inspector.has_table('subscription'):
+        op.create_table(
+            'subscription',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('meal_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('weekdays', sa.Integer(), nullable=False),
+            sa.Column('delivery_time', sa.String(length=50), nullable=False),
+            sa.Column('delivery_address', sa.Text(), nullable=False),
+            sa.Column('delivery_zone', sa.String(length=50), nullable=True),
+            sa.Column('starts_on', sa.Date(), nullable=False),
+            sa.Column('ends_on', sa.Date(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['meal_id'], ['meal.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_subscription_user_id', 'subscription', ['user_id'])
+        op.create_index('ix_subscription_active_starts_on', 'subscription', ['is_active', 'starts_on'])
+    if not inspector.has_table('subscription_pause'):
+        op.create_table(
+            'subscription_pause',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('subscription_id', sa.Integer(), nullable=False),
+            sa.Column('starts_on', sa.Date(), nullable=False),
+            sa.Column('ends_on', sa.Date(), nullable=False),
+            sa.ForeignKeyConstraint(['subscription_id'], ['subscription.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_subscription_pause_subscription_id_starts_on', 'subscription_pause',
+                        ['subscription_id', 'starts_on', 'ends_on'])
+    if 'subscription_id' not in {column['name'] for column in inspector.get_columns('order')}:
+        # SQLite cannot add a foreign key in place; batch mode rebuilds the table
+        with op.batch_alter_table('order') as batch_op:
+            batch_op.add_column(sa.Column('subscription_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_order_subscription_id', 'subscription', ['subscription_id'], ['id'])
+    op.create_index('ux_order_subscription_id_delivery_date', 'order', ['subscription_id', 'delivery_date'],
+                    unique=True, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ux_order_subscription_id_delivery_date', table_name='order')
+    # Batch mode rebuilds the table without the column and its foreign key
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('subscription_id')
+    op.drop_table('subscription_pause')
+    op.drop_table('subscription')
@@ -11,13 +11,15 @@ from typing import Generator, Dict, Any
 import pytest
 from flask import Flask, Response
 from flask.testing import FlaskClient, FlaskCliRunner
-from flask_login import LoginManager, login_user
+from flask_login import FlaskLoginClient, LoginManager, login_user
 
 # Add the project root to the Python path to enable absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import the db instance from the app
-from app import db
+from app import create_app, db
+from cachelib import SimpleCache
+from config import TestingConfig
 
 # Initialize login manager
 login_manager = LoginManager()
@@ -66,6 +68,42 @@ def create_test_app(config: Dict[str, Any] = None) -> Flask:
     
     return app
 
+class IntegrationTestConfig(TestingConfig):
+    """Configuration for tests that run the full ``create_app`` factory."""
+    ENV = 'testing'
+    LOGIN_DISABLED = False
+    RATELIMIT_ENABLED = False
+    SESSION_TYPE = 'cachelib'
+    SESSION_CACHELIB = SimpleCache()
+
+
+@pytest.fixture
+def app_settings() -> Dict[str, Any]:
+    """Config overrides for ``file_app``; override or parametrize it in a test module."""
+    return {}
+
+
+@pytest.fixture
+def file_app(tmp_path, app_settings) -> Generator[Flask, None, None]:
+    """A ``create_app`` application on a fresh SQLite file, inside its app context.
+
+    The schema is created before the test and dropped after it. A file
+    rather than ``:memory:`` lets threads open their own connections.
+    Clients are ``FlaskLoginClient``, so ``app.test_client(user=...)`` logs in.
+    """
+    config = type('FileAppConfig', (IntegrationTestConfig,), dict(
+        app_settings, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}"
+    ))
+    app = create_app(config)
+    app.test_client_class = FlaskLoginClient
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
 @pytest.fixture(scope='module')
 def app() -> Generator[Flask, None, None]:
     """Create and configure a new app instance for testing.
@@ -0,0 +1,148 @@
+"""Tests for write-behind user activity tracking."""
+from datetime import datetime
+
+import pytest
+from flask_login import FlaskLoginClient
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models import User
+from app.utils import activity as activity_module
+from app.utils.activity import activity
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app(IntegrationTestConfig)
+    app.config['ACTIVITY_FLUSH_INTERVAL'] = 3600
+    app.config['ACTIVITY_FLUSH_SIZE'] = 3
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(username=f'user{n}', email=f'user{n}@example.com') for n in range(1, 5)
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        activity.flush()
+        db.session.remove()
+        db.drop_all()
+
+
+def stored_last_seen(user_id):
+    return db.session.execute(
+        db.select(User.last_seen).where(User.id == user_id)
+    ).scalar()
+
+
+def test_touch_buffers_without_writing(app):
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+        user = db.session.get(User, 1)
+
+        assert stored_last_seen(1) is None
+        assert user.get_last_seen() == datetime(2024, 1, 15, 9, 0)
+
+
+def test_flushes_when_buffer_is_full(app):
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+        activity.touch(2, datetime(2024, 1, 15, 9, 1))
+        assert stored_last_seen(1) is None
+
+        activity.touch(3, datetime(2024, 1, 15, 9, 2))
+
+        assert [stored_last_seen(n) for n in (1, 2, 3, 4)] == [
+            datetime(2024, 1, 15, 9, 0), datetime(2024, 1, 15, 9, 1),
+            datetime(2024, 1, 15, 9, 2), None
+        ]
+
+
+def test_flushes_when_interval_has_passed(app):
+    app.config['ACTIVITY_FLUSH_INTERVAL'] = 0
+
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+
+        assert stored_last_seen(1) == datetime(2024, 1, 15, 9, 0)
+
+
+def test_flush_is_one_statement_and_never_goes_backwards(app):
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+        activity.flush()
+        activity.touch(1, datetime(2024, 1, 15, 8, 0))  # stale timestamp from another worker
+        activity.touch(2, datetime(2024, 1, 15, 9, 5))
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert activity.flush() == 2
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+        assert stored_last_seen(1) == datetime(2024, 1, 15, 9, 0)
+        assert stored_last_seen(2) == datetime(2024, 1, 15, 9, 5)
+
+
+def test_failed_flush_keeps_the_buffer(app, caplog):
+    def locked(conn, cursor, statement, *args):
+        if statement.startswith('UPDATE'):
+            raise OperationalError(statement, None, Exception('database is locked'))
+
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+        event.listen(db.engine, 'before_cursor_execute', locked)
+        try:
+            assert activity.flush() == 0
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', locked)
+
+        assert 'database is locked' in caplog.text
+        assert stored_last_seen(1) is None
+        assert activity.flush() == 1
+        assert stored_last_seen(1) == datetime(2024, 1, 15, 9, 0)
+
+
+def test_buffer_is_flushed_at_exit(app, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(activity_module.atexit, 'register', lambda *hook: hooks.append(hook))
+    app.config['ACTIVITY_FLUSH_AT_EXIT'] = True
+
+    with app.app_context():
+        activity.touch(1, datetime(2024, 1, 15, 9, 0))
+        activity.touch(2, datetime(2024, 1, 15, 9, 1))
+    assert len(hooks) == 1
+
+    function, state_ref = hooks[0]
+    function(state_ref)
+    with app.app_context():
+        assert stored_last_seen(2) == datetime(2024, 1, 15, 9, 1)
+
+
+def test_requests_do_not_commit(app):
+    with app.app_context():
+        client = app.test_client(user=db.session.get(User, 1))
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        client.get('/api/v1/orders')
+        client.get('/api/v1/orders')
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert not [s for s in statements if s.startswith(('UPDATE', 'INSERT'))]
+    with app.app_context():
+        assert db.session.get(User, 1).get_last_seen() is not None
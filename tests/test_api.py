@@ -0,0 +1,256 @@
+"""Tests for the JSON API blueprint."""
+from datetime import date, datetime
+
+import pytest
+from flask import g
+from flask_login import FlaskLoginClient
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Order, OrderItem, Meal
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    """Create an app with an admin, a customer and a small menu."""
+    app = create_app(IntegrationTestConfig)
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', is_admin=True)
+        admin.set_password('adminpass123')
+        customer = User(username='customer', email='customer@example.com')
+        customer.set_password('custpass123')
+        db.session.add_all([
+            admin,
+            customer,
+            Meal(name='Dal Rice', price=80.0, category='veg'),
+            Meal(name='Chicken Curry', price=150.0, category='non-veg'),
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def add_orders(app, count, user_id=2, created_at=None):
+    """Create ``count`` orders with two items each."""
+    with app.app_context():
+        meals = Meal.query.all()
+        for _ in range(count):
+            order = Order(
+                user_id=user_id,
+                created_at=created_at,
+                delivery_address='12 MG Road',
+                delivery_date=date(2024, 1, 15),
+                delivery_time='12:30',
+                total_amount=sum(meal.price for meal in meals)
+            )
+            for meal in meals:
+                order.items.append(OrderItem(meal=meal, quantity=1))
+            db.session.add(order)
+        db.session.commit()
+
+
+def login(app, user_id):
+    """Return a test client logged in as the given user."""
+    with app.app_context():
+        return app.test_client(user=db.session.get(User, user_id))
+
+
+def count_queries(app, func):
+    """Call ``func`` and return its result and the number of SQL statements it ran."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_get_orders_serializes_items(app):
+    add_orders(app, 1)
+    client = login(app, 2)
+
+    response = client.get('/api/v1/orders')
+
+    assert response.status_code == 200
+    [order] = response.get_json()['orders']
+    assert order['user_id'] == 2
+    assert sorted(item['price'] for item in order['items']) == [80.0, 150.0]
+
+
+def test_get_orders_is_limited_to_own_orders(app):
+    add_orders(app, 2, user_id=1)
+    add_orders(app, 1, user_id=2)
+    client = login(app, 2)
+
+    response = client.get('/api/v1/orders')
+
+    assert [order['user_id'] for order in response.get_json()['orders']] == [2]
+
+
+def test_get_orders_query_count_is_constant(app):
+    client = login(app, 1)
+    client.get('/api/v1/orders')  # loads and caches the user for the rest of the test
+
+    add_orders(app, 2)
+    response, few = count_queries(app, lambda: client.get('/api/v1/orders'))
+    assert len(response.get_json()['orders']) == 2
+
+    add_orders(app, 25)
+    response, many = count_queries(app, lambda: client.get('/api/v1/orders'))
+    assert len(response.get_json()['orders']) == 27
+
+    assert few == many
+
+
+def test_order_to_dict_with_items_query_count_is_constant(app):
+    add_orders(app, 3)
+
+    with app.app_context():
+        payload, queries = count_queries(
+            app, lambda: [order.to_dict() for order in Order.with_items().all()]
+        )
+
+    assert len(payload) == 3
+    assert all(item['meal_name'] for order in payload for item in order['items'])
+    assert queries == 3
+
+
+def test_get_orders_pages_with_cursor(app):
+    # Identical timestamps make the id tie-breaker do the work
+    add_orders(app, 7, created_at=datetime(2024, 1, 10, 9, 0))
+    add_orders(app, 5)
+    client = login(app, 1)
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/v1/orders?limit=5' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        assert len(page['orders']) <= 5
+        seen.extend(order['id'] for order in page['orders'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == list(range(12, 0, -1))
+
+
+def test_get_orders_rejects_invalid_cursor(app):
+    client = login(app, 1)
+
+    response = client.get('/api/v1/orders?cursor=not-a-cursor')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'invalid cursor'}
+
+
+def test_get_meals_clamps_limit(app):
+    app.config['API_MAX_PAGE_SIZE'] = 1
+
+    page = app.test_client().get('/api/v1/meals?limit=100').get_json()
+
+    assert len(page['meals']) == 1
+    assert page['next_cursor'] is not None
+
+
+def test_get_users_is_paginated(app):
+    client = login(app, 1)
+
+    page = client.get('/api/v1/users?limit=1').get_json()
+    rest = client.get(f"/api/v1/users?cursor={page['next_cursor']}").get_json()
+
+    assert [user['id'] for user in page['users'] + rest['users']] == [2, 1]
+    assert rest['next_cursor'] is None
+
+
+def test_get_meals_not_modified(app):
+    client = app.test_client()
+    first = client.get('/api/v1/meals')
+    etag = first.headers['ETag']
+
+    response, queries = count_queries(
+        app, lambda: client.get('/api/v1/meals', headers={'If-None-Match': etag}))
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert queries == 1  # the version lookup only
+
+
+def test_get_meals_etag_changes_with_meals(app):
+    client = app.test_client()
+    etag = client.get('/api/v1/meals').headers['ETag']
+
+    with app.app_context():
+        db.session.get(Meal, 1).price = 85.0
+        db.session.commit()
+
+    response = client.get('/api/v1/meals', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    with app.app_context():
+        Meal.query.filter_by(id=2).update({'is_available': False})
+        db.session.commit()
+
+    assert client.get('/api/v1/meals').headers['ETag'] != response.headers['ETag']
+
+
+def test_get_meals_etag_covers_query_string(app):
+    client = app.test_client()
+
+    assert (client.get('/api/v1/meals?limit=1').headers['ETag']
+            != client.get('/api/v1/meals?limit=2').headers['ETag'])
+
+
+def test_get_orders_etag_is_per_user_and_tracks_orders(app):
+    add_orders(app, 1, user_id=2)
+
+    admin_etag = login(app, 1).get('/api/v1/orders').headers['ETag']
+    # pytest-flask shares one app context, and so Flask-Login's cached user,
+    # across every request in a test
+    g.pop('_login_user', None)
+    customer = login(app, 2)
+    response = customer.get('/api/v1/orders')
+    etag = response.headers['ETag']
+    assert etag != admin_etag
+    assert response.headers['Cache-Control'] == 'no-cache, private'
+
+    response = customer.get('/api/v1/orders', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    add_orders(app, 1, user_id=2)
+    response = customer.get('/api/v1/orders', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()['orders']) == 2
+
+
+def test_get_orders_if_modified_since(app):
+    add_orders(app, 1)
+    client = login(app, 2)
+    last_modified = client.get('/api/v1/orders').headers['Last-Modified']
+
+    response = client.get('/api/v1/orders', headers={'If-Modified-Since': last_modified})
+
+    assert response.status_code == 304
+
+
+def test_error_responses_have_no_etag(app):
+    response = app.test_client().get('/api/v1/meals?cursor=bogus')
+
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
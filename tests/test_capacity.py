@@ -0,0 +1,153 @@
+"""Tests for per-meal daily capacity and reservation at order placement."""
+import threading
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Meal, MealCapacity, Order, OrderItem, OrderStatus, Subscription, User
+from app.utils.capacity import capacity_cli
+from app.utils.order_import import import_orders
+from app.utils.order_status import change_status, transition_orders
+from app.utils.subscriptions import materialize_orders
+
+DAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([User(username='asha', email='asha@example.com'), Meal(name='Thali', price=120.0)])
+    db.session.commit()
+    return file_app
+
+
+def remaining():
+    db.session.expire_all()
+    return db.session.get(MealCapacity, (1, DAY, 'lunch')).remaining
+
+
+def order_form(quantity=1):
+    return {'quantity': quantity, 'delivery_date': DAY.isoformat(), 'delivery_time': 'lunch',
+            'delivery_address': '12 MG Road'}
+
+
+def test_reserve_is_conditional(app):
+    connection = db.session.connection()
+    assert MealCapacity.reserve(connection, 1, DAY, 'lunch', 50)  # no limit set
+    assert MealCapacity.set_capacity(connection, 1, DAY, 'lunch', 3) == 3
+
+    assert MealCapacity.reserve(connection, 1, DAY, 'lunch', 2)
+    assert not MealCapacity.reserve(connection, 1, DAY, 'lunch', 2)
+    assert MealCapacity.reserve(connection, 1, DAY, 'lunch', 1)
+    assert not MealCapacity.reserve(connection, 1, DAY, 'lunch', 1)
+    db.session.commit()
+    assert remaining() == 0
+
+
+def test_set_capacity_keeps_reservations(app):
+    db.session.add_all([
+        Order(user_id=1, delivery_address='x', delivery_date=DAY, delivery_time='lunch', total_amount=0,
+              status=status, items=[OrderItem(meal_id=1, quantity=3)])
+        for status in (OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.CANCELLED)
+    ])
+    db.session.commit()
+    connection = db.session.connection()
+
+    assert MealCapacity.set_capacity(connection, 1, DAY, 'lunch', 10) == 4
+    assert MealCapacity.reserve(connection, 1, DAY, 'lunch', 3)
+    assert MealCapacity.set_capacity(connection, 1, DAY, 'lunch', 8) == 0
+    assert MealCapacity.set_capacity(connection, 1, DAY, 'lunch', 20) == 12
+
+
+def test_order_page_reserves_and_refuses_when_sold_out(app):
+    MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', 3)
+    db.session.commit()
+    client = app.test_client(user=db.session.get(User, 1))
+
+    assert client.post('/order/1', data=order_form(2)).headers['Location'].endswith('/orders')
+    response = client.post('/order/1', data=order_form(2), follow_redirects=False)
+    assert response.headers['Location'].endswith('/order/1')
+    assert db.session.scalar(db.select(db.func.count(Order.id))) == 1
+    assert remaining() == 1
+    assert client.post('/order/1', data=dict(order_form(), delivery_date='19/10/2026')).status_code == 302
+    assert remaining() == 1
+
+
+def test_concurrent_orders_never_oversell(app):
+    capacity, threads, attempts = 30, 8, 8
+    MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', capacity)
+    db.session.commit()
+    user = db.session.get(User, 1)
+    errors = []
+
+    def place():
+        client = app.test_client(user=user)
+        for _ in range(attempts):
+            response = client.post('/order/1', data=order_form())
+            if response.status_code != 302:
+                errors.append(response.status_code)
+
+    workers = [threading.Thread(target=place) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    sold = db.session.scalar(db.select(db.func.sum(OrderItem.quantity)))
+    assert sold == capacity
+    assert remaining() == 0
+
+
+def test_cancelled_and_refunded_orders_give_portions_back(app):
+    MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', 10)
+    db.session.commit()
+    client = app.test_client(user=db.session.get(User, 1))
+    for quantity in (2, 3, 4):
+        client.post('/order/1', data=order_form(quantity))
+    assert remaining() == 1
+
+    assert change_status(1, 'cancelled') == (OrderStatus.CANCELLED, 2)
+    assert remaining() == 3
+    change_status(1, 'refunded')
+    assert remaining() == 3  # already given back when cancelled
+
+    transition_orders(OrderStatus.CONFIRMED, order_ids=[2])
+    transition_orders(OrderStatus.CANCELLED, order_ids=[1, 2, 3])
+    assert remaining() == 10
+    assert MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', 10) == 10
+
+
+def test_subscriptions_and_imports_count_against_the_limit(app):
+    MealCapacity.set_capacity(db.session.connection(), 1, DAY, 'lunch', 10)
+    db.session.add_all([
+        Subscription(user_id=1, meal_id=1, quantity=quantity, delivery_time='lunch', delivery_address='x',
+                     starts_on=DAY)
+        for quantity in (3, 4)
+    ])
+    db.session.commit()
+    assert materialize_orders(DAY) == 2
+    assert remaining() == 3
+
+    line = {'email': 'asha@example.com', 'delivery_address': 'x', 'delivery_date': DAY.isoformat(),
+            'delivery_time': 'lunch', 'meal': 'Thali'}
+    result = import_orders([dict(line, quantity='2'), dict(line, quantity='2'), dict(line, quantity='1'),
+                            dict(line, delivery_time='dinner', quantity='9')])
+    assert result.orders == 3
+    assert result.errors == [(2, 'not imported: sold out for that delivery')]
+    assert remaining() == 0
+
+    # Subscriptions are never refused; an exceeded limit has nothing left to sell
+    db.session.add(Subscription(user_id=1, meal_id=1, quantity=5, delivery_time='lunch', delivery_address='y',
+                                starts_on=DAY))
+    db.session.commit()
+    assert materialize_orders(DAY) == 1
+    assert remaining() == 0
+
+
+def test_cli(app):
+    runner = app.test_cli_runner()
+    output = runner.invoke(capacity_cli, ['set', '1', '2026-10-19', 'lunch', '40']).output
+    assert 'Meal 1 on 2026-10-19 lunch: 40 portions, 40 left to sell.' in output
+    assert 'Thali' in runner.invoke(capacity_cli, ['show', '2026-10-19']).output
+    assert runner.invoke(capacity_cli, ['set', '9', '2026-10-19', 'lunch', '40']).exit_code != 0
@@ -0,0 +1,222 @@
+"""Tests for the in-process menu catalog cache."""
+import pytest
+from sqlalchemy import event, insert
+
+from app import create_app, db
+from app.models import Meal, MealCategory, meal_categories
+from app.utils.catalog import catalog
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app(IntegrationTestConfig)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Meal(name='Dal Rice', price=80.0, category='veg'),
+            Meal(name='Chicken Curry', price=150.0, category='non-veg'),
+            Meal(name='Paneer Tikka', price=120.0, category='veg', is_available=False),
+            MealCategory(name='Vegan'),
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def count_queries(func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_snapshot_is_reused(app):
+    with app.app_context(), app.test_request_context():
+        first = catalog.get()
+
+    with app.app_context(), app.test_request_context():
+        second, queries = count_queries(catalog.get)
+        third, repeat_queries = count_queries(catalog.get)
+
+    assert second is first and third is first
+    assert queries == 1  # the table_version check
+    assert repeat_queries == 0  # checked once per request
+
+
+def test_writes_from_another_process_rebuild(tmp_path):
+    """Each worker has its own cache; table_version tells them apart."""
+    config = type('SharedFileConfig', (IntegrationTestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+    })
+    reader, writer = create_app(config), create_app(config)
+    with writer.app_context():
+        db.create_all()
+        db.session.add_all([Meal(name='Dal Rice', price=80.0, category='veg'), MealCategory(name='Vegan')])
+        db.session.commit()
+
+    client = reader.test_client()
+    response = client.get('/api/v1/meals')
+    etag = response.headers['ETag']
+    assert response.get_json()['meals'][0]['price'] == 80.0
+
+    with writer.app_context():
+        db.session.get(Meal, 1).price = 95.0
+        db.session.commit()
+
+    response = client.get('/api/v1/meals', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['meals'][0]['price'] == 95.0
+
+    # Only a meal_categories row changes here
+    with writer.app_context():
+        meal = db.session.get(Meal, 1)
+        meal.categories.append(db.session.get(MealCategory, 1))
+        db.session.commit()
+
+    assert client.get('/api/v1/meals', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+    assert client.get('/api/v1/meals/browse?category=Vegan').get_json()['meals'][0]['id'] == 1
+
+    for app in (reader, writer):
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def test_available_meals_and_category_slices(app):
+    with app.app_context():
+        assert [meal['name'] for meal in catalog.available()] == ['Dal Rice', 'Chicken Curry']
+        assert [meal['name'] for meal in catalog.category('veg')] == ['Dal Rice']
+        assert catalog.category('dessert') == []
+
+
+def test_insert_update_and_delete_invalidate(app):
+    with app.app_context():
+        snapshot = catalog.get()
+        db.session.add(Meal(name='Veg Biryani', price=110.0, category='veg'))
+        db.session.commit()
+        assert catalog.get() is not snapshot
+        assert len(catalog.category('veg')) == 2
+
+        snapshot = catalog.get()
+        db.session.get(Meal, 1).price = 90.0
+        db.session.commit()
+        assert catalog.get() is not snapshot
+        assert catalog.category('veg')[0]['price'] == 90.0
+
+        snapshot = catalog.get()
+        db.session.delete(db.session.get(Meal, 2))
+        db.session.commit()
+        assert catalog.get() is not snapshot
+        assert catalog.category('non-veg') == []
+
+
+def test_category_changes_invalidate(app):
+    with app.app_context():
+        snapshot = catalog.get()
+        meal = db.session.get(Meal, 1)
+        meal.categories.append(db.session.get(MealCategory, 1))
+        db.session.commit()
+        assert catalog.get() is not snapshot
+
+        snapshot = catalog.get()
+        db.session.execute(insert(meal_categories).values(meal_id=2, category_id=1))
+        db.session.commit()
+        assert catalog.get() is not snapshot
+
+
+def test_bulk_update_invalidates(app):
+    with app.app_context():
+        catalog.get()
+        Meal.query.filter_by(category='veg').update({'is_available': True})
+        db.session.commit()
+
+        assert [meal['name'] for meal in catalog.category('veg')] == ['Dal Rice', 'Paneer Tikka']
+
+
+def test_rollback_invalidates(app):
+    with app.app_context():
+        db.session.get(Meal, 1).is_available = False
+        db.session.flush()
+        assert len(catalog.available()) == 1  # uncommitted view, same session
+
+        db.session.rollback()
+        assert len(catalog.available()) == 2
+
+
+def test_snapshot_expires_after_ttl(app):
+    app.config['CATALOG_CACHE_TTL'] = 0
+
+    with app.app_context():
+        assert catalog.get() is not catalog.get()
+
+
+def test_api_meals_served_from_snapshot(app):
+    client = app.test_client()
+    client.get('/api/v1/meals')
+
+    with app.app_context():
+        response, queries = count_queries(lambda: client.get('/api/v1/meals?limit=2'))
+        cursor = response.get_json()['next_cursor']
+        rest = client.get(f'/api/v1/meals?limit=2&cursor={cursor}').get_json()
+
+    assert queries == 1  # the table_version lookup for the ETag
+    assert [meal['id'] for meal in response.get_json()['meals']] == [3, 2]
+    assert [meal['id'] for meal in rest['meals']] == [1]
+    assert rest['next_cursor'] is None
+
+
+def test_browse_intersects_category_sets(app):
+    with app.app_context():
+        dal_rice = db.session.get(Meal, 1)
+        vegan = db.session.get(MealCategory, 1)
+        vegan.display_order = 1
+        jain = MealCategory(name='Jain', display_order=2)
+        db.session.add_all([
+            Meal(name='Poha', price=60.0, category='veg', is_vegetarian=True, categories=[vegan, jain]),
+            Meal(name='Tofu Bowl', price=140.0, is_vegetarian=True, categories=[vegan]),
+            Meal(name='Sabudana Khichdi', price=90.0, is_available=False, categories=[vegan, jain]),
+            MealCategory(name='Festive', is_active=False, meals=[dal_rice]),
+        ])
+        db.session.commit()
+
+        def names(*categories, **filters):
+            return [meal['name'] for meal in catalog.browse(categories, **filters)]
+
+        assert catalog.categories() == [
+            {'id': 1, 'name': 'Vegan', 'description': None, 'meal_count': 2},
+            {'id': 2, 'name': 'Jain', 'description': None, 'meal_count': 1},
+        ]
+        assert names('vegan') == ['Poha', 'Tofu Bowl']
+        assert names('Vegan', 'Jain') == ['Poha']
+        assert names('vegan', max_price=100) == ['Poha']
+        assert names(max_price=80) == ['Dal Rice', 'Poha']
+        assert names(vegetarian=True) == ['Poha', 'Tofu Bowl']
+        # Legacy category strings still work; inactive and unknown categories match nothing
+        assert names('veg', 'vegan') == ['Poha']
+        assert names('Festive') == names('dessert') == []
+        assert len(names()) == 4
+
+
+def test_browse_endpoints(app):
+    with app.app_context():
+        dal_rice = db.session.get(Meal, 1)
+        dal_rice.categories.append(db.session.get(MealCategory, 1))
+        db.session.commit()
+
+    client = app.test_client()
+    assert client.get('/api/v1/categories').get_json()['categories'][0]['meal_count'] == 1
+    meals = client.get('/api/v1/meals/browse?category=Vegan&max_price=100').get_json()['meals']
+    assert [meal['name'] for meal in meals] == ['Dal Rice']
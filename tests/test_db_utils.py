@@ -0,0 +1,129 @@
+"""Tests for the pooled sqlite3 layer in db_utils."""
+import threading
+
+import pytest
+from flask import Flask
+
+import db_utils
+from db_utils import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    db_utils.dispose_pools()
+    yield
+    db_utils.dispose_pools()
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'orders.db'}"
+    app.config['SQLITE_POOL_SIZE'] = 2
+    app.teardown_appcontext(db_utils.close_db)
+    return app
+
+
+def test_pragmas_are_applied(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'orders.db'), cache_size=-2000, busy_timeout=1234)
+
+    with pool.connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -2000
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 1234
+
+
+def test_connections_are_reused(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'orders.db'), size=2)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert pool.stats() == {
+        'size': 2, 'open': 1, 'idle': 0, 'in_use': 1,
+        'created': 1, 'acquired': 2, 'reused': 1, 'waited': 0, 'timeouts': 0
+    }
+
+
+def test_release_rolls_back_open_transactions(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'orders.db'), size=1)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE t (x)')
+        conn.execute('INSERT INTO t VALUES (1)')
+
+    with pool.connection() as conn:
+        assert conn.execute('SELECT count(*) FROM t').fetchone()[0] == 0
+
+
+def test_exhausted_pool_waits_then_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'orders.db'), size=1)
+    held = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+
+    threading.Timer(0.05, pool.release, args=(held,)).start()
+    assert pool.acquire(timeout=5) is held
+    assert pool.stats()['waited'] == 2
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_pool_is_thread_safe(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'orders.db'), size=3)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE t (x)')
+        conn.commit()
+
+    def work():
+        for n in range(50):
+            with pool.connection() as conn:
+                conn.execute('INSERT INTO t VALUES (?)', (n,))
+                conn.commit()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.stats()
+    assert stats['open'] <= 3
+    assert stats['in_use'] == 0
+    with pool.connection() as conn:
+        assert conn.execute('SELECT count(*) FROM t').fetchone()[0] == 400
+
+
+def test_in_memory_pool_shares_one_database():
+    pool = ConnectionPool(':memory:', size=2)
+    first, second = pool.acquire(), pool.acquire()
+
+    first.execute('CREATE TABLE t (x)')
+    first.commit()
+
+    assert second.execute('SELECT count(*) FROM t').fetchone()[0] == 0
+
+
+def test_database_path_comes_from_uri():
+    assert db_utils.database_path('sqlite:////srv/tiffin.db') == '/srv/tiffin.db'
+    assert db_utils.database_path('sqlite://') == ':memory:'
+    with pytest.raises(ValueError):
+        db_utils.database_path('postgresql://localhost/tiffin')
+
+
+def test_get_db_uses_the_app_pool(flask_app, tmp_path):
+    with flask_app.app_context():
+        conn = db_utils.get_db()
+        assert db_utils.get_db() is conn
+        path = conn.execute('PRAGMA database_list').fetchone()['file']
+        assert path == str(tmp_path / 'orders.db')
+        assert db_utils.pool_stats()['in_use'] == 1
+
+    with flask_app.app_context():
+        assert db_utils.get_db() is conn
+        stats = db_utils.pool_stats()
+
+    assert stats['created'] == 1
+    assert stats['reused'] == 1
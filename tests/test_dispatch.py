@@ -0,0 +1,138 @@
+"""Tests for delivery zoning and rider batch planning."""
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import DeliveryArea, Meal, Order, OrderItem, OrderStatus, Role, User
+from app.models.delivery import address_keys
+from app.utils.dispatch import UNZONED, dispatch_cli, plan_batches
+
+DAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def app_settings():
+    return {'DISPATCH_RIDER_CAPACITY': 5, 'DISPATCH_MAX_STOPS': 3}
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([
+        DeliveryArea(pincode='560034', zone='south'),
+        DeliveryArea(locality='koramangala', zone='south'),
+        DeliveryArea(locality='indiranagar', zone='east'),
+        DeliveryArea(locality='hsr layout', zone='south-east'),
+        User(username='asha', email='asha@example.com'),
+        Meal(name='Thali', price=120.0),
+    ])
+    db.session.commit()
+    return file_app
+
+
+def place(address, quantity=1, slot='lunch', status=OrderStatus.CONFIRMED, day=DAY):
+    order = Order(user_id=1, status=status, delivery_address=address, delivery_date=day,
+                  delivery_time=slot, total_amount=0.0, items=[OrderItem(meal_id=1, quantity=quantity)])
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def test_address_keys():
+    pincode, localities = address_keys('Flat 4, 80 Feet Rd, HSR Layout, Bengaluru 560102')
+
+    assert pincode == '560102'
+    assert localities.index('hsr layout') < localities.index('hsr')
+    assert address_keys('no pin here')[0] is None
+
+
+def test_orders_are_zoned_when_placed(app):
+    assert place('12, 1st Cross, Bengaluru 560034').delivery_zone == 'south'
+    assert place('HSR Layout sector 2').delivery_zone == 'south-east'
+    assert place('Somewhere else').delivery_zone is None
+
+    order = place('100 Feet Rd, Indiranagar')
+    assert order.delivery_zone == 'east'
+    order.delivery_address = 'Koramangala 5th Block'
+    db.session.commit()
+    assert order.delivery_zone == 'south'
+
+
+def test_batches_respect_capacity_and_stops(app):
+    ids = [place(f'{n} Main Rd, Koramangala', quantity=2).id for n in range(4)]
+    big = place('1 Main Rd, Indiranagar', quantity=9).id
+    place('Koramangala', status=OrderStatus.PENDING)
+    place('Koramangala', day=date(2026, 10, 20))
+
+    batches = plan_batches(DAY)
+    assert [(b.zone, sorted(b.order_ids), b.meals) for b in batches] == [
+        ('east', [big], 9),
+        ('south', ids[:2], 4),
+        ('south', ids[2:], 4),
+    ]
+
+
+def test_batches_split_by_slot_and_stop_limit(app):
+    lunch = [place(f'{n} Koramangala').id for n in range(4)]
+    dinner = place('Koramangala', slot='dinner').id
+
+    batches = plan_batches(DAY)
+    assert [(b.delivery_time, len(b.order_ids)) for b in batches] == [('dinner', 1), ('lunch', 3), ('lunch', 1)]
+    assert plan_batches(DAY, slot='dinner')[0].order_ids == [dinner]
+    assert sorted(sum((b.order_ids for b in batches if b.delivery_time == 'lunch'), [])) == lunch
+
+
+def test_unzoned_orders_resolve_in_memory(app):
+    order = place('Somewhere in Indiranagar?')
+    assert order.delivery_zone == 'east'
+    db.session.execute(db.update(Order).values(delivery_zone=None))
+    other = place('Nowhere known')
+
+    zones = {b.zone: b.order_ids for b in plan_batches(DAY)}
+    assert zones == {'east': [order.id], UNZONED: [other.id]}
+
+
+def test_load_areas_and_rezone_commands(app, tmp_path):
+    order = place('Whitefield main road')
+    assert order.delivery_zone is None
+    areas = tmp_path / 'areas.csv'
+    areas.write_text('pincode,locality,zone\n560066,,east\n,Whitefield,east\n')
+
+    runner = app.test_cli_runner()
+    assert 'Loaded 2 delivery areas.' in runner.invoke(dispatch_cli, ['load-areas', str(areas)]).output
+    assert 'Zoned 1 of 1 orders.' in runner.invoke(dispatch_cli, ['rezone']).output
+    db.session.expire_all()
+    assert db.session.get(Order, order.id).delivery_zone == 'east'
+
+
+def test_api_and_admin_views(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    order = place('Koramangala')
+    client = app.test_client(user=manager)
+
+    response = client.get('/api/v1/dispatch/batches?date=2026-10-19')
+    assert response.get_json()['batches'] == [
+        {'delivery_time': 'lunch', 'zone': 'south', 'order_ids': [order.id], 'meals': 1}
+    ]
+    assert client.get('/admin/dispatch?date=2026-10-19').status_code == 200
+
+
+def test_batches_change_when_areas_change(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    order = place('Whitefield main road')
+    client = app.test_client(user=manager)
+    url = '/api/v1/dispatch/batches?date=2026-10-19'
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # The order is zoned in memory from the new area; nothing in order or order_item changed
+    db.session.add(DeliveryArea(locality='whitefield', zone='east'))
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['batches'][0]['zone'] == 'east'
+    assert db.session.get(Order, order.id).delivery_zone is None
@@ -0,0 +1,201 @@
+"""Tests for the pooled outbound email worker, against a local SMTP server."""
+import socket
+import threading
+import time
+
+import pytest
+from flask_mail import Message
+
+from app import create_app, db
+from app.models import User
+from app.utils.email import EmailQueueFull, email_queue, send_email
+from tests.conftest import IntegrationTestConfig
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+
+class RecordingHandler:
+    """Collects delivered messages; answers 451 to the first ``fail`` of them."""
+
+    def __init__(self, fail=0, code='451 Try again later'):
+        self.fail = fail
+        self.code = code
+        self.messages = []
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            if self.fail:
+                self.fail -= 1
+                return self.code
+            self.messages.append(envelope)
+            if not any(seen is session for seen in self.sessions):
+                self.sessions.append(session)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def make_app(smtp, **settings):
+    config = type('EmailConfig', (IntegrationTestConfig,), {
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp.port,
+        'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': '',
+        'MAIL_SUPPRESS_SEND': False,
+        'EMAIL_RETRY_BACKOFF': 0.01,
+        **settings
+    })
+    return create_app(config)
+
+
+def message(number):
+    return Message(f'Order {number}', sender='kitchen@example.com',
+                   recipients=[f'customer{number}@example.com'], body='Your tiffin is on its way.')
+
+
+def test_burst_is_sent_over_few_connections(smtp):
+    app = make_app(smtp, EMAIL_WORKERS=2, EMAIL_BATCH_SIZE=50)
+
+    with app.app_context():
+        for number in range(40):
+            email_queue.send(message(number))
+        assert email_queue.wait(10)
+        stats = email_queue.stats()
+        email_queue.shutdown()
+
+    assert len(smtp.handler.messages) == 40
+    assert stats['sent'] == 40
+    assert stats['workers'] == 2
+    assert stats['connections'] == stats['batches'] < 40
+    assert len(smtp.handler.sessions) == stats['connections']
+
+
+def test_transient_failures_are_retried(smtp):
+    smtp.handler.fail = 2
+    app = make_app(smtp, EMAIL_WORKERS=1)
+
+    with app.app_context():
+        email_queue.send(message(1))
+        assert email_queue.wait(10)
+        stats = email_queue.stats()
+        email_queue.shutdown()
+
+    assert len(smtp.handler.messages) == 1
+    assert stats['retried'] == 2
+    assert stats['sent'] == 1
+    assert stats['failed'] == 0
+
+
+def test_gives_up_after_max_retries(smtp):
+    smtp.handler.fail = 10
+    app = make_app(smtp, EMAIL_WORKERS=1, EMAIL_MAX_RETRIES=2)
+
+    with app.app_context():
+        email_queue.send(message(1))
+        assert email_queue.wait(10)
+        stats = email_queue.stats()
+        email_queue.shutdown()
+
+    assert smtp.handler.messages == []
+    assert stats['retried'] == 2
+    assert stats['failed'] == 1
+
+
+def test_permanent_failures_are_not_retried(smtp):
+    smtp.handler.fail, smtp.handler.code = 1, '554 Transaction failed'
+    app = make_app(smtp, EMAIL_WORKERS=1)
+
+    with app.app_context():
+        email_queue.send(message(1))
+        email_queue.send(message(2))
+        assert email_queue.wait(10)
+        stats = email_queue.stats()
+        email_queue.shutdown()
+
+    assert [envelope.rcpt_tos for envelope in smtp.handler.messages] == [['customer2@example.com']]
+    assert stats['retried'] == 0
+    assert stats['failed'] == 1
+
+
+def test_unreachable_server_retries_the_whole_batch(smtp):
+    app = make_app(smtp, EMAIL_WORKERS=1, EMAIL_MAX_RETRIES=1, MAIL_PORT=1)
+
+    with app.app_context():
+        email_queue.send(message(1))
+        email_queue.send(message(2))
+        assert email_queue.wait(10)
+        stats = email_queue.stats()
+        email_queue.shutdown()
+
+    assert stats['retried'] == 2
+    assert stats['failed'] == 2
+    assert stats['connections'] == 0
+
+
+def test_full_queue_applies_backpressure(smtp):
+    app = make_app(smtp, EMAIL_WORKERS=1, EMAIL_QUEUE_SIZE=1, EMAIL_ENQUEUE_TIMEOUT=0.05)
+    blocker = threading.Event()
+
+    with app.app_context():
+        # Hold the only worker inside a send so the queue cannot drain
+        original = email_queue._send_batch
+        email_queue._send_batch = lambda state, batch: (blocker.wait(5), original(state, batch))
+        try:
+            email_queue.send(message(1))
+            while email_queue.stats()['queued']:
+                time.sleep(0.01)
+            email_queue.send(message(2))
+            with pytest.raises(EmailQueueFull):
+                email_queue.send(message(3))
+            assert email_queue.stats()['rejected'] == 1
+        finally:
+            blocker.set()
+            assert email_queue.wait(10)
+            del email_queue._send_batch
+            email_queue.shutdown()
+
+    assert len(smtp.handler.messages) == 2
+
+
+def test_reset_request_queues_the_email(smtp):
+    app = make_app(smtp)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='asha', email='asha@example.com'))
+        db.session.commit()
+
+    response = app.test_client().post('/auth/reset_password', data={'email': 'asha@example.com'})
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert email_queue.wait(10)
+        email_queue.shutdown()
+        db.drop_all()
+    assert smtp.handler.messages[0].rcpt_tos == ['asha@example.com']
+
+
+def test_send_email_uses_the_default_sender(smtp):
+    app = make_app(smtp)
+
+    with app.app_context():
+        msg = send_email('Welcome', ['new@example.com'], 'Hello!')
+        assert email_queue.wait(10)
+        email_queue.shutdown()
+
+    assert msg.sender == app.config['MAIL_DEFAULT_SENDER']
+    assert smtp.handler.messages[0].mail_from == app.config['MAIL_DEFAULT_SENDER']
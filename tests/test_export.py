@@ -0,0 +1,112 @@
+"""Tests for the streaming admin order export."""
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from flask_login import FlaskLoginClient
+
+from app import create_app, db
+from app.models import User, Order, OrderItem, Meal, Payment, PaymentStatus
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    """Create an app with orders that have zero, one and two items."""
+    app = create_app(IntegrationTestConfig)
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', is_admin=True)
+        customer = User(username='customer', email='customer@example.com')
+        dal = Meal(name='Dal Rice', price=80.0)
+        curry = Meal(name='Chicken Curry', price=150.0)
+        db.session.add_all([admin, customer, dal, curry])
+
+        for meals in ([dal, curry], [], [curry], [dal]):
+            order = Order(
+                customer=customer,
+                delivery_address='12 MG Road',
+                delivery_date=date(2024, 1, 15),
+                delivery_time='12:30',
+                total_amount=sum(meal.price for meal in meals)
+            )
+            for meal in meals:
+                order.items.append(OrderItem(meal=meal, quantity=2))
+            db.session.add(order)
+        db.session.flush()
+
+        db.session.add_all([
+            Payment(order_id=1, amount=230.0, payment_method='upi',
+                    status=PaymentStatus.FAILED),
+            Payment(order_id=1, amount=230.0, payment_method='upi',
+                    status=PaymentStatus.COMPLETED, transaction_id='txn-1'),
+            Payment(order_id=3, amount=150.0, payment_method='card',
+                    status=PaymentStatus.COMPLETED, transaction_id='txn-3'),
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def admin_client(app):
+    with app.app_context():
+        return app.test_client(user=db.session.get(User, 1))
+
+
+def test_export_ndjson(admin_client):
+    response = admin_client.get('/admin/orders/export?format=ndjson')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+    orders = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [order['id'] for order in orders] == [1, 2, 3, 4]
+    assert [len(order['items']) for order in orders] == [2, 0, 1, 1]
+    assert [len(order['payments']) for order in orders] == [2, 0, 1, 0]
+    assert orders[0]['email'] == 'customer@example.com'
+    assert orders[2]['items'][0] == {
+        'id': 3, 'meal_id': 2, 'meal_name': 'Chicken Curry',
+        'quantity': 2, 'unit_price': 150.0, 'total_price': 300.0
+    }
+    assert orders[2]['payments'][0]['transaction_id'] == 'txn-3'
+
+
+def test_export_csv(admin_client):
+    response = admin_client.get('/admin/orders/export?format=csv')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['order_id'] for row in rows] == ['1', '1', '2', '3', '4']
+    assert rows[0]['amount_paid'] == '230.0'
+    assert rows[0]['payment_status'] == 'completed'
+    assert rows[2]['item_id'] == ''
+    assert rows[3]['line_total'] == '300.0'
+    assert rows[4]['amount_paid'] == '0'
+
+
+def test_export_rejects_unknown_format(admin_client):
+    response = admin_client.get('/admin/orders/export?format=xlsx')
+
+    assert response.status_code == 400
+
+
+def test_export_requires_admin(app):
+    with app.app_context():
+        client = app.test_client(user=db.session.get(User, 2))
+
+    response = client.get('/admin/orders/export')
+
+    assert response.status_code == 302
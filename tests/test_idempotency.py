@@ -0,0 +1,125 @@
+"""Tests for idempotency keys on order placement."""
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import IdempotencyKey, Meal, Order, User
+from app.utils.idempotency import fingerprint, idempotency, idempotency_cli
+
+FORM = {'quantity': 2, 'delivery_date': date(2026, 10, 19).isoformat(), 'delivery_time': 'lunch',
+        'delivery_address': '12 MG Road'}
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([User(username='asha', email='asha@example.com'), Meal(name='Thali', price=120.0)])
+    db.session.commit()
+    return file_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client(user=db.session.get(User, 1))
+
+
+def orders():
+    return db.session.scalar(db.select(db.func.count(Order.id)))
+
+
+def test_retry_replays_the_first_response(client):
+    first = client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'a1'})
+    again = client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'a1'})
+
+    assert orders() == 1
+    assert (again.status_code, again.headers['Location']) == (first.status_code, first.headers['Location'])
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+
+
+def test_form_token(client):
+    client.post('/order/1', data=dict(FORM, idempotency_key='f1', csrf_token='x'))
+    client.post('/order/1', data=dict(FORM, idempotency_key='f1', csrf_token='y'))
+    assert orders() == 1
+
+    assert client.post('/order/1', data=dict(FORM, quantity=3, idempotency_key='f1')).status_code == 422
+    client.post('/order/1', data=FORM)
+    client.post('/order/1', data=FORM)
+    assert orders() == 3
+
+
+@pytest.mark.parametrize('failures, replayed', [(1, True), (2, False)])
+def test_failure_to_store_the_response_is_not_an_error(app, client, caplog, failures, replayed):
+    def locked(conn, cursor, statement, *args):
+        if statement.startswith('UPDATE idempotency_key') and attempts:
+            attempts.pop()
+            raise OperationalError(statement, None, Exception('database is locked'))
+
+    attempts = [None] * failures
+    event.listen(db.engine, 'before_cursor_execute', locked)
+    try:
+        first = client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'c1'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', locked)
+
+    assert first.status_code == 302 and orders() == 1
+    assert 'database is locked' in caplog.text
+    again = client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'c1'})
+    if replayed:
+        # The marker without the body still answers the retry
+        assert (again.status_code, again.headers['Location']) == (302, first.headers['Location'])
+    else:
+        assert again.status_code == 409
+    assert orders() == 1
+
+
+def test_running_and_released_claims(app, client):
+    with app.test_request_context('/order/1', method='POST', data=FORM):
+        signed = fingerprint()
+    assert idempotency.claim(1, 'r1', signed) is None
+
+    response = client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'r1'})
+    assert (response.status_code, response.headers['Retry-After']) == (409, '1')
+    assert orders() == 0
+
+    idempotency.release(1, 'r1')
+    assert client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'r1'}).status_code == 302
+    assert orders() == 1
+
+
+def test_concurrent_duplicates_place_one_order(app):
+    user = db.session.get(User, 1)
+    statuses = []
+
+    def submit():
+        response = app.test_client(user=user).post('/order/1', data=FORM, headers={'Idempotency-Key': 'c1'})
+        statuses.append(response.status_code)
+
+    workers = [threading.Thread(target=submit) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert orders() == 1
+    assert set(statuses) <= {302, 409} and 302 in statuses
+
+
+def test_expired_keys_are_purged(app, client):
+    client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'e1'})
+    client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'e2'})
+    db.session.execute(db.update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+    # An expired key no longer replays
+    client.post('/order/1', data=FORM, headers={'Idempotency-Key': 'e1'})
+    assert orders() == 3
+    assert idempotency.purge(batch=10) == 1
+
+    db.session.execute(db.update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    assert 'Deleted 1 expired idempotency keys.' in app.test_cli_runner().invoke(idempotency_cli, ['purge']).output
+    assert db.session.scalar(db.select(db.func.count(IdempotencyKey.id))) == 0
@@ -0,0 +1,135 @@
+"""Tests for the cached Flask-Login identity loader."""
+import dataclasses
+import importlib
+
+import pytest
+from flask_login import FlaskLoginClient, login_user
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Role
+from app.models.user import load_user
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app(IntegrationTestConfig)
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        db.create_all()
+        staff = Role(name='admin')
+        db.session.add_all([
+            User(username='customer', email='customer@example.com'),
+            User(username='manager', email='manager@example.com', roles=[staff]),
+            Role(name='kitchen'),
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def count_queries(func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_identity_is_cached_and_immutable(app):
+    with app.app_context():
+        first = load_user('1')
+        second, queries = count_queries(lambda: load_user('1'))
+
+        assert second is first
+        assert queries == 0
+        assert first.username == 'customer'
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            first.username = 'someone-else'
+
+
+def test_permissions_come_from_flag_and_roles(app):
+    with app.app_context():
+        customer, manager = load_user('1'), load_user('2')
+
+        assert not customer.has_permission('admin')
+        assert manager.has_permission('admin')
+        assert manager.is_admin
+        assert manager.roles == frozenset({'admin'})
+        assert load_user('99') is None
+
+
+def test_user_update_evicts(app):
+    with app.app_context():
+        identity = load_user('1')
+        db.session.get(User, 1).first_name = 'Asha'
+        db.session.commit()
+
+        assert load_user('1') is not identity
+        assert load_user('1').first_name == 'Asha'
+
+
+def test_role_changes_evict(app):
+    with app.app_context():
+        load_user('1')
+        customer = db.session.get(User, 1)
+        customer.roles.append(Role.query.filter_by(name='admin').one())
+        db.session.commit()
+        assert load_user('1').has_permission('admin')
+
+        db.session.get(Role, 1).name = 'ops'
+        db.session.commit()
+        assert not load_user('2').has_permission('admin')
+
+
+def test_cache_is_bounded(app):
+    app.config['IDENTITY_CACHE_SIZE'] = 1
+
+    with app.app_context():
+        first = load_user('1')
+        load_user('2')
+
+        assert load_user('1') is not first
+
+
+def test_entries_expire(app):
+    app.config['IDENTITY_CACHE_TTL'] = 0
+
+    with app.app_context():
+        assert load_user('1') is not load_user('1')
+
+
+@pytest.mark.parametrize('module', ['app.routes.admin', 'app.routes.auth', 'app.routes.api'])
+def test_admin_required_does_not_query(app, module):
+    view = importlib.import_module(module).admin_required(lambda: 'ok')
+
+    with app.test_request_context():
+        login_user(load_user('2'))
+        result, queries = count_queries(view)
+
+    assert result == 'ok'
+    assert queries == 0
+
+
+def test_profile_update_writes_the_user_row(app):
+    with app.app_context():
+        client = app.test_client(user=db.session.get(User, 1))
+
+    response = client.post('/profile', data={'first_name': 'Asha', 'last_name': 'Rao'})
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(User, 1).get_full_name() == 'Asha Rao'
+        assert load_user('1').get_full_name() == 'Asha Rao'
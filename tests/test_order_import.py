@@ -0,0 +1,125 @@
+"""Tests for bulk order import."""
+import io
+import json
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import DeliveryArea, Meal, Order, OrderItem, OrderStatus, Payment, Role, StatCounter, User
+from app.utils.order_import import import_orders, orders_cli, read_rows
+
+HEADER = 'email,delivery_address,delivery_date,delivery_time,meal,quantity,unit_price,order_ref\n'
+
+
+@pytest.fixture
+def app_settings():
+    return {'ORDER_IMPORT_CHUNK_SIZE': 2}
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([
+        DeliveryArea(locality='koramangala', zone='south'),
+        User(username='asha', email='asha@example.com'),
+        User(username='ravi', email='ravi@example.com'),
+        Meal(name='Thali', price=120.0),
+        Meal(name='Dosa', price=60.0),
+        Meal(name='Biryani', price=200.0, is_available=False),
+    ])
+    db.session.commit()
+    return file_app
+
+
+def rows(text):
+    return read_rows(io.StringIO(HEADER + text), 'csv')
+
+
+def test_rows_become_orders_items_and_payments(app):
+    result = import_orders(rows(
+        'asha@example.com,Koramangala 5th Block,2026-10-19,lunch,Thali,2,120,A\n'
+        'asha@example.com,Koramangala 5th Block,2026-10-19,lunch,2,1,,A\n'
+        'RAVI@example.com,Indiranagar,2026-10-19,dinner,dosa,3,,\n'
+        'ravi@example.com,Indiranagar,2026-10-20,dinner,Thali,1,,\n'
+    ))
+
+    assert (result.rows, result.orders, result.items, result.errors) == (4, 3, 4, [])
+    first = db.session.scalars(db.select(Order).order_by(Order.id)).first()
+    assert first.total_amount == 300.0
+    assert first.delivery_zone == 'south'
+    assert first.status == OrderStatus.PENDING
+    assert sorted((item.meal_id, item.quantity) for item in first.items) == [(1, 2), (2, 1)]
+    assert db.session.scalar(db.select(db.func.count(OrderItem.id))) == 4
+    payments = db.session.scalars(db.select(Payment).order_by(Payment.order_id)).all()
+    assert [(p.amount, p.payment_method) for p in payments] == [(300.0, 'invoice'), (180.0, 'invoice'),
+                                                                (120.0, 'invoice')]
+    assert StatCounter.dashboard()['orders_by_status'][OrderStatus.PENDING] == 3
+    assert result.rows_per_second > 0
+
+
+def test_invalid_rows_are_reported_and_skipped(app):
+    result = import_orders(rows(
+        'nobody@example.com,Somewhere,2026-10-19,lunch,Thali,1,,\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Pizza,1,,\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Biryani,1,,\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Thali,0,,\n'
+        'asha@example.com,Somewhere,19/10/2026,lunch,Thali,1,,\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Thali,1,99.00,\n'
+        'asha@example.com,,2026-10-19,lunch,Thali,1,,\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Thali,1,,B\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Dosa,x,,B\n'
+        'asha@example.com,Somewhere,2026-10-19,lunch,Dosa,1,60,\n'
+    ))
+
+    assert result.orders == 1
+    assert [(error.row, error.message) for error in result.errors] == [
+        (1, 'unknown customer nobody@example.com'),
+        (2, 'unknown meal Pizza'),
+        (3, 'meal Biryani is not available'),
+        (4, 'quantity must be at least 1'),
+        (5, 'delivery_date must be YYYY-MM-DD'),
+        (6, 'unit_price 99.00 does not match the current price 120.00'),
+        (7, 'missing delivery_address'),
+        (8, 'skipped with the rest of order_ref B'),
+        (9, 'quantity must be a whole number'),
+    ]
+    assert db.session.scalar(db.select(db.func.count(Order.id))) == 1
+
+
+def test_cli_reads_json(app, tmp_path):
+    path = tmp_path / 'orders.json'
+    path.write_text(json.dumps({'orders': [
+        {'email': 'asha@example.com', 'delivery_address': 'Koramangala', 'delivery_date': '2026-10-19',
+         'delivery_time': 'lunch', 'meal': 1, 'quantity': 2, 'payment_method': 'upi'},
+        {'email': 'asha@example.com', 'delivery_address': 'Koramangala', 'delivery_date': '2026-10-19',
+         'delivery_time': 'lunch', 'meal': 'Nope', 'quantity': 1},
+    ]}))
+
+    result = app.test_cli_runner().invoke(orders_cli, ['import', str(path)])
+    assert 'row 2: unknown meal Nope' in result.output
+    assert 'Imported 1 orders (1 items) from 2 rows' in result.output
+    payment = db.session.scalars(db.select(Payment)).one()
+    assert (payment.amount, payment.payment_method) == (240.0, 'upi')
+    assert db.session.scalars(db.select(Order)).one().delivery_date == date(2026, 10, 19)
+
+
+def test_admin_upload(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    client = app.test_client(user=manager)
+    data = (HEADER + 'ravi@example.com,Indiranagar,2026-10-19,dinner,Dosa,1,,\n').encode()
+
+    response = client.post('/admin/orders/import', data={'file': (io.BytesIO(data), 'orders.csv')},
+                           content_type='multipart/form-data')
+    report = response.get_json()
+    assert (report['rows'], report['orders'], report['items'], report['errors']) == (1, 1, 1, [])
+    assert client.post('/admin/orders/import', data={}).status_code == 400
+    response = client.post('/admin/orders/import', data={'file': (io.BytesIO(b'[1, 2]'), 'orders.json')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    latin1 = (HEADER + 'ravi@example.com,Indiranagar,2026-10-19,dinner,Crème brûlée,1,,\n').encode('latin-1')
+    response = client.post('/admin/orders/import', data={'file': (io.BytesIO(latin1), 'orders.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['error']
@@ -0,0 +1,133 @@
+"""Tests for bulk order status transitions."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import DeliveryArea, Meal, Order, OrderItem, OrderStatus, Role, StatCounter, User
+from app.utils.order_status import CONFLICT, NOT_ALLOWED, NOT_FOUND, UNCHANGED, UPDATED, transition_orders
+
+DAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([
+        DeliveryArea(locality='koramangala', zone='south'),
+        DeliveryArea(locality='indiranagar', zone='east'),
+        User(username='asha', email='asha@example.com'),
+        Meal(name='Thali', price=120.0),
+    ])
+    db.session.commit()
+    return file_app
+
+
+def place(status=OrderStatus.CONFIRMED, address='Koramangala', slot='lunch', day=DAY, amount=120.0):
+    order = Order(user_id=1, status=status, delivery_address=address, delivery_date=day, delivery_time=slot,
+                  total_amount=amount, items=[OrderItem(meal_id=1, quantity=1)])
+    db.session.add(order)
+    db.session.commit()
+    return order.id
+
+
+def statuses():
+    return dict(db.session.execute(db.select(Order.id, Order.status)).all())
+
+
+def test_transition_by_ids_reports_each_order(app):
+    confirmed = place()
+    pending = place(OrderStatus.PENDING)
+    already = place(OrderStatus.OUT_FOR_DELIVERY)
+
+    results = transition_orders(OrderStatus.OUT_FOR_DELIVERY, order_ids=[confirmed, pending, already, 999])
+    assert [(r.order_id, r.outcome) for r in results] == [
+        (confirmed, UPDATED), (pending, NOT_ALLOWED), (already, UNCHANGED), (999, NOT_FOUND)
+    ]
+    assert results[1].previous == results[1].status == OrderStatus.PENDING
+    assert statuses() == {confirmed: OrderStatus.OUT_FOR_DELIVERY, pending: OrderStatus.PENDING,
+                          already: OrderStatus.OUT_FOR_DELIVERY}
+
+
+def test_transition_by_filter(app):
+    south_lunch = place()
+    east_lunch = place(address='Indiranagar')
+    south_dinner = place(slot='dinner')
+    other_day = place(day=date(2026, 10, 20))
+
+    results = transition_orders(OrderStatus.OUT_FOR_DELIVERY, day=DAY, slot='lunch', zone='south')
+    assert [r.order_id for r in results] == [south_lunch]
+    assert [r.order_id for r in transition_orders(OrderStatus.IN_PROGRESS, day=DAY)] == [
+        south_lunch, east_lunch, south_dinner
+    ]
+    assert statuses()[other_day] == OrderStatus.CONFIRMED
+    with pytest.raises(ValueError):
+        transition_orders(OrderStatus.CANCELLED)
+
+
+def test_order_changed_after_the_read_is_a_conflict(app):
+    raced, other = place(), place()
+    pending = [raced]
+
+    def cancel_first(conn, cursor, statement, *args):
+        # Another writer cancels the order between the read and the UPDATE
+        if statement.startswith('UPDATE "order"') and pending:
+            cursor.connection.execute(
+                'UPDATE "order" SET status = \'CANCELLED\', version = version + 1 WHERE id = ?', (pending.pop(),))
+
+    event.listen(db.engine, 'before_cursor_execute', cancel_first)
+    try:
+        results = transition_orders(OrderStatus.OUT_FOR_DELIVERY, order_ids=[raced, other])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', cancel_first)
+
+    assert [(r.order_id, r.outcome) for r in results] == [(raced, CONFLICT), (other, UPDATED)]
+    assert statuses() == {raced: OrderStatus.CANCELLED, other: OrderStatus.OUT_FOR_DELIVERY}
+    counted = StatCounter.dashboard(today=datetime.utcnow().date())['orders_by_status']
+    assert counted[OrderStatus.OUT_FOR_DELIVERY] == 1
+    assert counted[OrderStatus.CONFIRMED] == 1  # the raced order, as the raw cancel skipped the counters
+
+
+def test_counters_follow_bulk_transitions(app):
+    ids = [place(amount=100.0), place(amount=50.0), place(OrderStatus.PENDING, amount=10.0)]
+
+    transition_orders(OrderStatus.CANCELLED, order_ids=ids)
+    transition_orders(OrderStatus.REFUNDED, order_ids=ids[:1])
+    dashboard = StatCounter.dashboard(today=datetime.utcnow().date())
+    assert dashboard['orders_by_status'][OrderStatus.CANCELLED] == 2
+    assert dashboard['orders_by_status'][OrderStatus.REFUNDED] == 1
+    assert dashboard['orders_by_status'][OrderStatus.CONFIRMED] == 0
+    assert dashboard['revenue_by_day'][0][1:] == (0, 0.0)
+
+
+def test_api_transitions_and_validates(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    order_id = place()
+    client = app.test_client(user=manager)
+
+    response = client.post('/api/v1/orders/status', json={'status': 'out_for_delivery', 'date': '2026-10-19'})
+    assert response.get_json() == {
+        'status': 'out_for_delivery',
+        'updated': 1,
+        'results': [{'id': order_id, 'previous': 'confirmed', 'status': 'out_for_delivery', 'outcome': 'updated'}],
+    }
+    assert client.post('/api/v1/orders/status', json={'status': 'shipped', 'order_ids': [1]}).status_code == 400
+    assert client.post('/api/v1/orders/status', json={'status': 'delivered'}).status_code == 400
+    assert client.post('/api/v1/orders/status', json={'status': 'delivered', 'order_ids': '1'}).status_code == 400
+    assert client.post('/api/v1/orders/status', json={'status': 'delivered', 'date': '19/10'}).status_code == 400
+
+
+def test_admin_sends_a_dispatch_batch(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    ids = [place(), place()]
+    client = app.test_client(user=manager)
+
+    response = client.post('/admin/dispatch/send', data={'order_id': ids, 'date': '2026-10-19'})
+    assert response.status_code == 302
+    assert set(statuses().values()) == {OrderStatus.OUT_FOR_DELIVERY}
+    page = client.get('/admin/dispatch?date=2026-10-19').get_data(as_text=True)
+    assert 'No confirmed orders' in page and '2 orders out for delivery.' in page
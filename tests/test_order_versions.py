@@ -0,0 +1,146 @@
+"""Tests for order and payment versioning and the status state machines."""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db
+from app.models import (
+    InvalidTransition, Meal, Order, OrderItem, OrderStatus, Payment, PaymentStatus, Role, StatCounter, User
+)
+from app.utils.order_status import CONFLICT, UPDATED, change_status, transition_orders
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([User(username='asha', email='asha@example.com'), Meal(name='Thali', price=120.0)])
+    db.session.commit()
+    return file_app
+
+
+def place(status=OrderStatus.PENDING):
+    order = Order(user_id=1, status=status, delivery_address='Koramangala', delivery_date=date(2026, 10, 19),
+                  delivery_time='lunch', total_amount=120.0, items=[OrderItem(meal_id=1, quantity=1)])
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def test_model_enforces_order_transitions(app):
+    order = place()
+    assert order.version == 1
+
+    with pytest.raises(InvalidTransition, match='from pending to delivered'):
+        order.status = OrderStatus.DELIVERED
+    with pytest.raises(InvalidTransition, match='unknown status'):
+        order.status = 'shipped'
+    with pytest.raises(InvalidTransition, match='unknown status'):
+        order.status = ['confirmed']
+    order.status = 'confirmed'
+    assert order.status == OrderStatus.CONFIRMED
+    order.status = 'OUT_FOR_DELIVERY'
+    db.session.commit()
+    assert (order.status, order.version) == (OrderStatus.OUT_FOR_DELIVERY, 2)
+
+
+def test_model_enforces_payment_transitions(app):
+    payment = Payment(order_id=place().id, amount=120.0, payment_method='upi')
+    db.session.add(payment)
+    db.session.commit()
+
+    with pytest.raises(InvalidTransition):
+        payment.status = PaymentStatus.REFUNDED
+    payment.status = PaymentStatus.FAILED
+    payment.status = PaymentStatus.PENDING
+    payment.status = PaymentStatus.COMPLETED
+    db.session.commit()
+    assert payment.version == 2
+    payment.status = PaymentStatus.PARTIALLY_REFUNDED
+    with pytest.raises(InvalidTransition):
+        payment.status = PaymentStatus.CANCELLED
+
+
+def test_stale_orm_write_is_refused(app):
+    order = place()
+    # Another writer moves the row on; this session still holds version 1
+    db.session.execute(db.update(Order).where(Order.id == order.id).values(version=Order.version + 1)
+                       .execution_options(synchronize_session=False))
+
+    order.delivery_time = 'dinner'
+    with pytest.raises(StaleDataError):
+        db.session.commit()
+    db.session.rollback()
+    assert db.session.get(Order, order.id).delivery_time == 'lunch'
+
+
+def test_change_status_is_conditional(app):
+    order_id = place().id
+
+    assert change_status(order_id, 'confirmed', version=1) == (OrderStatus.CONFIRMED, 2)
+    with pytest.raises(StaleDataError):
+        change_status(order_id, 'cancelled', version=1)
+    with pytest.raises(InvalidTransition):
+        change_status(order_id, 'delivered')
+    assert change_status(order_id, 'confirmed') == (OrderStatus.CONFIRMED, 2)
+    assert change_status(999, 'confirmed') is None
+    assert StatCounter.dashboard()['orders_by_status'][OrderStatus.CONFIRMED] == 1
+
+    transition_orders(OrderStatus.CANCELLED, order_ids=[order_id])
+    assert db.session.get(Order, order_id).version == 3
+
+
+def test_bulk_transition_checks_versions(app):
+    seen, edited, raced = (place(OrderStatus.CONFIRMED).id for _ in range(3))
+    db.session.execute(db.update(Order).where(Order.id == edited).values(version=Order.version + 1)
+                       .execution_options(synchronize_session=False))
+    db.session.commit()
+    pending = [raced]
+
+    def edit_first(conn, cursor, statement, *args):
+        # Another admin edits an order between the read and the UPDATE, keeping its status
+        if statement.startswith('UPDATE "order"') and pending:
+            cursor.connection.execute('UPDATE "order" SET version = version + 1 WHERE id = ?', (pending.pop(),))
+
+    event.listen(db.engine, 'before_cursor_execute', edit_first)
+    try:
+        results = transition_orders(OrderStatus.CANCELLED, order_ids=[seen, edited, raced],
+                                    versions={seen: 1, edited: 1})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', edit_first)
+
+    assert [(r.order_id, r.outcome) for r in results] == [(seen, UPDATED), (edited, CONFLICT), (raced, CONFLICT)]
+    assert results[1].previous == results[1].status == OrderStatus.CONFIRMED
+    rows = db.session.execute(db.select(Order.status, Order.version).order_by(Order.id)).all()
+    assert rows == [(OrderStatus.CANCELLED, 2), (OrderStatus.CONFIRMED, 2), (OrderStatus.CONFIRMED, 2)]
+    assert StatCounter.dashboard()['orders_by_status'][OrderStatus.CANCELLED] == 1
+
+
+def test_api_reports_conflicts(app):
+    manager = User(username='manager', email='manager@example.com', roles=[Role(name='admin')])
+    db.session.add(manager)
+    db.session.commit()
+    order_id = place().id
+    client = app.test_client(user=manager)
+    url = f'/api/v1/orders/{order_id}/status'
+
+    response = client.post(url, json={'status': 'confirmed', 'version': 1})
+    assert response.get_json() == {'id': order_id, 'status': 'confirmed', 'version': 2}
+    response = client.post(url, json={'status': 'cancelled', 'version': 1})
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'conflict'
+    response = client.post(url, json={'status': 'delivered'})
+    assert (response.status_code, response.get_json()['error']) == (409, 'invalid transition')
+    assert client.post(url, json={'status': 'cancelled', 'version': '2'}).status_code == 400
+    assert client.post(url, json={'status': ['x']}).status_code == 400
+    assert client.post('/api/v1/orders/status', json={'status': {'x': 1}, 'order_ids': [order_id]}).status_code == 400
+    assert client.post('/api/v1/orders/999/status', json={'status': 'confirmed'}).status_code == 404
+    assert client.get('/api/v1/orders').get_json()['orders'][0]['version'] == 2
+
+    bulk = {'status': 'cancelled', 'order_ids': [order_id]}
+    response = client.post('/api/v1/orders/status', json=dict(bulk, versions={str(order_id): 1}))
+    assert response.get_json()['results'][0]['outcome'] == 'conflict'
+    assert client.post('/api/v1/orders/status', json=dict(bulk, versions=[1])).status_code == 400
+    assert client.post('/api/v1/orders/status', json=dict(bulk, versions={'x': 1})).status_code == 400
+    response = client.post('/api/v1/orders/status', json=dict(bulk, versions={str(order_id): 2}))
+    assert response.get_json()['updated'] == 1
@@ -0,0 +1,131 @@
+"""Tests for off-request password hashing and rehash on login."""
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models import User
+from app.utils import passwords as password_module
+from app.utils.passwords import bcrypt_rounds, passwords
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app(IntegrationTestConfig)
+    app.config['BCRYPT_LOG_ROUNDS'] = 5
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='asha', email='asha@example.com'))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        passwords.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+def stored_hash():
+    return db.session.execute(db.select(User.password_hash)).scalar()
+
+
+def login(app, password):
+    return app.test_client().post('/auth/login', data={'email': 'asha@example.com', 'password': password})
+
+
+def test_hashes_run_on_the_executor(app, monkeypatch):
+    threads = []
+    real_hash = password_module._hash
+
+    def recording_hash(*args):
+        threads.append(threading.current_thread())
+        return real_hash(*args)
+
+    monkeypatch.setattr(password_module, '_hash', recording_hash)
+    with app.app_context():
+        password_hash = passwords.hash('s3cret')
+
+    assert bcrypt_rounds(password_hash) == 5
+    assert threads and threads[0] is not threading.current_thread()
+
+
+def test_set_and_check_password(app):
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.set_password('s3cret')
+
+        assert user.password_hash.startswith('$2b$05$')
+        assert user.check_password('s3cret')
+        assert not user.check_password('wrong')
+
+
+def test_login_upgrades_werkzeug_hashes(app):
+    with app.app_context():
+        db.session.get(User, 1).password_hash = generate_password_hash('s3cret')
+        db.session.commit()
+
+    assert login(app, 's3cret').status_code == 302
+
+    with app.app_context():
+        assert bcrypt_rounds(stored_hash()) == 5
+        assert db.session.get(User, 1).check_password('s3cret')
+
+
+def test_login_upgrades_low_cost_hashes(app):
+    with app.app_context():
+        app.config['BCRYPT_LOG_ROUNDS'] = 4
+        db.session.get(User, 1).set_password('s3cret')
+        db.session.commit()
+        app.config['BCRYPT_LOG_ROUNDS'] = 5
+
+    assert login(app, 's3cret').status_code == 302
+
+    with app.app_context():
+        assert bcrypt_rounds(stored_hash()) == 5
+
+
+def test_failed_check_keeps_the_hash(app):
+    legacy_hash = generate_password_hash('s3cret')
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.password_hash = legacy_hash
+
+        assert not user.check_password('wrong')
+        assert user.password_hash == legacy_hash
+
+
+def test_current_hashes_are_not_rewritten(app):
+    with app.app_context():
+        db.session.get(User, 1).set_password('s3cret')
+        db.session.commit()
+        current = stored_hash()
+
+    assert login(app, 's3cret').status_code == 302
+
+    with app.app_context():
+        assert stored_hash() == current
+
+
+def test_missing_hash_never_matches(app):
+    with app.app_context():
+        assert passwords.verify(None, 's3cret') == (False, False)
+        assert not db.session.get(User, 1).check_password('s3cret')
+
+
+def test_process_executor(app):
+    app.config['PASSWORD_HASH_EXECUTOR'] = 'process'
+    app.config['PASSWORD_HASH_WORKERS'] = 1
+
+    with app.app_context():
+        password_hash = passwords.hash('s3cret')
+        assert passwords.verify(password_hash, 's3cret') == (True, False)
+
+
+def test_unknown_executor_is_rejected():
+    config = type('BadConfig', (IntegrationTestConfig,), {'PASSWORD_HASH_EXECUTOR': 'fiber'})
+    with pytest.raises(ValueError):
+        create_app(config)
@@ -0,0 +1,99 @@
+"""Tests for the kitchen production plan."""
+from datetime import date
+
+import pytest
+from flask import g
+
+from app import db
+from app.models import Meal, Order, OrderItem, OrderStatus, Role, User
+from app.utils import production
+from app.utils.production import PlanColumns, PlanRow, production_plan
+
+MONDAY, TUESDAY = date(2026, 10, 19), date(2026, 10, 20)
+
+
+@pytest.fixture
+def app(file_app):
+    user = User(username='asha', email='asha@example.com')
+    thali, biryani = Meal(name='Thali', price=120.0), Meal(name='Biryani', price=180.0)
+
+    def order(day, slot, status, *items):
+        return Order(customer=user, status=status, delivery_address='12 MG Road', delivery_date=day,
+                     delivery_time=slot, total_amount=0.0,
+                     items=[OrderItem(meal=meal, quantity=quantity) for meal, quantity in items])
+
+    db.session.add_all([
+        User(username='chef', email='chef@example.com', roles=[Role(name='admin')]),
+        order(MONDAY, 'lunch', OrderStatus.PENDING, (thali, 2), (biryani, 1)),
+        order(MONDAY, 'lunch', OrderStatus.CONFIRMED, (thali, 3)),
+        order(MONDAY, 'dinner', OrderStatus.DELIVERED, (biryani, 4)),
+        order(MONDAY, 'lunch', OrderStatus.CANCELLED, (thali, 10)),
+        order(MONDAY, 'lunch', OrderStatus.REFUNDED, (biryani, 10)),
+        order(TUESDAY, 'lunch', OrderStatus.CONFIRMED, (thali, 1)),
+        order(date(2026, 10, 25), 'lunch', OrderStatus.CONFIRMED, (thali, 7)),
+    ])
+    db.session.commit()
+    return file_app
+
+
+EXPECTED = [
+    PlanRow(MONDAY, 'dinner', 2, 'Biryani', 4),
+    PlanRow(MONDAY, 'lunch', 2, 'Biryani', 1),
+    PlanRow(MONDAY, 'lunch', 1, 'Thali', 5),
+    PlanRow(TUESDAY, 'lunch', 1, 'Thali', 1),
+]
+
+
+def test_plan_groups_cooked_orders(app):
+    assert production_plan(MONDAY, TUESDAY) == EXPECTED
+
+
+def test_plan_for_one_day_and_slot(app):
+    assert production_plan(MONDAY, slot='lunch') == EXPECTED[1:3]
+
+
+def test_columns_match_the_sql_plan(app, monkeypatch):
+    monkeypatch.setattr(production, 'numpy', None)
+    columns = PlanColumns.load(MONDAY, TUESDAY)
+
+    assert len(columns) == 5
+    assert columns.plan() == EXPECTED
+    assert columns.plan(day=MONDAY, slot='lunch') == production_plan(MONDAY, slot='lunch')
+    assert columns.plan(meal_ids=[2]) == EXPECTED[:2]
+    assert columns.plan(slot='breakfast') == []
+
+
+def test_numpy_columns_match_the_sql_plan(app):
+    pytest.importorskip('numpy')
+    columns = PlanColumns.load(MONDAY, TUESDAY)
+
+    assert columns.plan() == EXPECTED
+    assert columns.plan(day=TUESDAY) == EXPECTED[3:]
+    assert columns.plan(meal_ids=[2]) == EXPECTED[:2]
+
+
+def test_api_and_admin_views(app):
+    chef = User.query.filter_by(username='chef').one()
+    client = app.test_client(user=chef)
+
+    response = client.get('/api/v1/kitchen/plan?date=2026-10-19&days=2')
+    assert response.status_code == 200
+    assert [row['quantity'] for row in response.get_json()['plan']] == [4, 1, 5, 1]
+    assert client.get('/api/v1/kitchen/plan?date=monday').status_code == 400
+
+    response = client.get('/admin/production?date=2026-10-19')
+    assert response.status_code == 200
+    assert b'Thali' in response.data
+
+    # Lunch cards for both days, sliced from one load
+    response = client.get('/admin/production?date=2026-10-19&days=2&slot=lunch')
+    assert b'Tuesday, 2026-10-20' in response.data
+    assert b'dinner' not in response.data
+    assert b'Biryani' in response.data
+
+
+def test_api_requires_admin(app):
+    g.pop('_login_user', None)
+    customer = User.query.filter_by(username='asha').one()
+
+    assert app.test_client(user=customer).get('/api/v1/kitchen/plan').status_code == 403
@@ -0,0 +1,124 @@
+"""Query plan checks for the hot queries in the main, admin and API routes.
+
+The schema is built without secondary indexes, the index migrations are applied
+on top, and every query is run through ``EXPLAIN QUERY PLAN``. A query fails
+if SQLite would scan a whole table or sort the result in a temporary b-tree.
+"""
+import importlib.util
+import os
+from datetime import date, datetime
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text, tuple_
+
+from app import create_app, db
+from app.models import (User, Order, OrderStatus, OrderItem, Payment, Meal,
+                        MealCategory, TableVersion, meal_categories)
+from app.models.meal import MealReview
+from tests.conftest import IntegrationTestConfig
+
+VERSIONS = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'versions')
+MIGRATION = os.path.join(VERSIONS, '5cc9a155103b_add_hot_path_indexes.py')
+# Drops the hot path indexes that covering indexes made redundant
+REDUNDANT = os.path.join(VERSIONS, '6b2f8d4a1c37_drop_redundant_indexes.py')
+
+
+def load_migration(path=MIGRATION):
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='module')
+def app():
+    """Create the schema as an old create_all() database and migrate it."""
+    app = create_app(IntegrationTestConfig)
+    migration = load_migration()
+
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            for name, _, _ in migration.INDEXES:
+                connection.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            with Operations.context(MigrationContext.configure(connection)):
+                migration.upgrade()
+                load_migration(REDUNDANT).upgrade()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+CURSOR = (datetime(2024, 1, 15, 12, 0), 42)
+
+HOT_QUERIES = {
+    # app/routes/main.py
+    'main.index': lambda: Meal.query.filter_by(is_available=True),
+    'main.menu': lambda: Meal.query.filter_by(is_available=True).filter_by(category='veg'),
+    # app/utils/catalog.py snapshot rebuild
+    'MealCategory.get_active_categories': lambda: MealCategory.query.filter_by(is_active=True)
+        .order_by(MealCategory.display_order),
+    'catalog category links': lambda: db.session.query(meal_categories.c.category_id, meal_categories.c.meal_id)
+        .filter(meal_categories.c.category_id.in_([1, 2, 3])),
+    'main.orders': lambda: Order.query.filter_by(user_id=1).order_by(Order.created_at.desc()),
+    # app/routes/admin.py
+    'admin.dashboard recent orders': lambda: Order.query.order_by(Order.created_at.desc()).limit(5),
+    'admin.dashboard recent users': lambda: User.query.order_by(User.created_at.desc()).limit(5),
+    'admin.orders': lambda: Order.query.order_by(Order.created_at.desc()).limit(10).offset(20),
+    'admin.users': lambda: User.query.order_by(User.created_at.desc()).limit(10).offset(20),
+    'admin orders by status': lambda: Order.query.filter_by(status=OrderStatus.PENDING)
+        .order_by(Order.created_at.desc()),
+    'orders for a delivery date': lambda: Order.query.filter(
+        Order.delivery_date == date(2024, 1, 15), Order.status != OrderStatus.CANCELLED),
+    # app/routes/api/__init__.py
+    'api.get_orders': lambda: Order.query.filter(tuple_(Order.created_at, Order.id) < CURSOR)
+        .order_by(Order.created_at.desc(), Order.id.desc()).limit(51),
+    'api.get_orders customer': lambda: Order.query.filter_by(user_id=1)
+        .filter(tuple_(Order.created_at, Order.id) < CURSOR)
+        .order_by(Order.created_at.desc(), Order.id.desc()).limit(51),
+    'api.get_users': lambda: User.query.filter(tuple_(User.created_at, User.id) < CURSOR)
+        .order_by(User.created_at.desc(), User.id.desc()).limit(51),
+    'api conditional GET versions': lambda: TableVersion.query.filter(
+        TableVersion.table_name.in_(['order', 'order_item', 'meal'])),
+    'api.get_meals': lambda: Meal.query.filter(tuple_(Meal.created_at, Meal.id) < CURSOR)
+        .order_by(Meal.created_at.desc(), Meal.id.desc()).limit(51),
+    # Relationship loads and the order export
+    'Order.with_items items': lambda: OrderItem.query.filter(OrderItem.order_id.in_([1, 2, 3])),
+    'Order.with_items meals': lambda: Meal.query.filter(Meal.id.in_([1, 2, 3])),
+    'Meal.order_items': lambda: OrderItem.query.filter_by(meal_id=1),
+    'Meal.reviews': lambda: MealReview.query.filter_by(meal_id=1),
+    'Order.payments': lambda: Payment.query.filter_by(order_id=1),
+    'export items': lambda: OrderItem.query.order_by(OrderItem.order_id, OrderItem.meal_id, OrderItem.quantity,
+                                                     OrderItem.id),
+    'export payments': lambda: Payment.query.order_by(Payment.order_id, Payment.id),
+}
+
+
+def query_plan(query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row.detail for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(app, name):
+    with app.app_context():
+        plan = query_plan(HOT_QUERIES[name]())
+
+    full_scans = [step for step in plan
+                  if step.startswith('SCAN') and 'INDEX' not in step]
+    sorts = [step for step in plan if 'TEMP B-TREE' in step]
+    assert not full_scans and not sorts, f'{name}: {plan}'
+
+
+def test_migration_matches_model_indexes():
+    declared = {index.name for table in db.metadata.tables.values()
+                for index in table.indexes}
+
+    redundant = {name for name, _, _ in load_migration(REDUNDANT).INDEXES}
+
+    assert {name for name, _, _ in load_migration().INDEXES} - redundant <= declared
+    assert not redundant & declared
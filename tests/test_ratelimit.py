@@ -0,0 +1,115 @@
+"""Tests for the SQLite rate limit storage shared across worker processes."""
+import multiprocessing
+import time
+
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+
+from app import create_app, db, limiter
+from app.utils.ratelimit import SQLiteStorage
+from tests.conftest import IntegrationTestConfig
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'ratelimit.db'}"
+
+
+def hit_limit(uri, attempts, results):
+    storage = storage_from_string(uri)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    item = parse('100/minute')
+    results.put(sum(limiter.hit(item, 'shared-client') for _ in range(attempts)))
+
+
+def test_scheme_is_registered(uri):
+    assert isinstance(storage_from_string(uri), SQLiteStorage)
+
+
+def test_memory_database_is_rejected():
+    with pytest.raises(Exception, match='file shared by all workers'):
+        storage_from_string('sqlite:///:memory:')
+
+
+def test_increments_and_expiry(uri):
+    storage = storage_from_string(uri)
+
+    assert storage.incr('k', expiry=60) == 1
+    assert storage.incr('k', expiry=60, amount=2) == 3
+    assert storage.get('k') == 3
+    assert 55 < storage.get_expiry('k') - time.time() <= 60
+
+    storage.incr('gone', expiry=0)
+    assert storage.get('gone') == 0
+    # An expired key starts a fresh window
+    assert storage.incr('gone', expiry=60) == 1
+
+
+def test_fixed_window_limit(uri):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    item = parse('3/minute')
+
+    assert [limiter.hit(item, 'client') for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(item, 'other-client')
+
+
+def test_sliding_window_limit(uri):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse('3/minute')
+
+    assert [limiter.hit(item, 'client') for _ in range(4)] == [True, True, True, False]
+    stats = limiter.get_window_stats(item, 'client')
+    assert stats.remaining == 0
+
+    limiter.clear(item, 'client')
+    assert limiter.hit(item, 'client')
+
+
+def test_expired_counters_are_deleted_in_batches(uri):
+    storage = SQLiteStorage(uri, expire_interval=0, expire_batch=2)
+    storage._connection().executemany(
+        'INSERT INTO rate_limit VALUES (?, 1, ?)', [(f'old-{n}', time.time() - 1) for n in range(5)]
+    )
+    count = 'SELECT count(*) FROM rate_limit'
+
+    storage.incr('fresh', expiry=60)
+    assert storage._connection().execute(count).fetchone()[0] == 4  # 2 of 5 expired deleted
+
+    storage.incr('fresh', expiry=60)
+    storage.incr('fresh', expiry=60)
+    assert storage._connection().execute(count).fetchone()[0] == 1
+
+
+def test_limit_is_shared_across_processes(uri):
+    storage_from_string(uri)  # create the schema before the workers race for it
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [context.Process(target=hit_limit, args=(uri, 40, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    allowed = sum(results.get(timeout=60) for _ in workers)
+    for worker in workers:
+        worker.join(60)
+
+    assert allowed == 100
+
+
+def test_app_uses_sqlite_storage(uri):
+    config = type('RateLimitConfig', (IntegrationTestConfig,), {
+        'RATELIMIT_ENABLED': True,
+        'RATELIMIT_STORAGE_URI': uri,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        assert isinstance(limiter.storage, SQLiteStorage)
+
+    client = app.test_client()
+    statuses = [client.get('/api/v1/meals').status_code for _ in range(51)]
+
+    assert statuses[:50] == [200] * 50
+    assert statuses[50] == 429
+    with app.app_context():
+        db.drop_all()
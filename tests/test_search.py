@@ -0,0 +1,81 @@
+"""Tests for the FTS5 meal search index."""
+import pytest
+
+from app import db
+from app.models import Meal, MealCategory
+from app.utils.search import match_expression, search_cli, search_meals
+
+
+@pytest.fixture
+def app(file_app):
+    vegan = MealCategory(name='Vegan')
+    db.session.add_all([
+        Meal(name='Paneer Tikka', description='Char-grilled cottage cheese', price=180.0, category='veg'),
+        Meal(name='Chole Bhature', description='Chickpeas with fried bread, no paneer', price=120.0,
+             category='veg'),
+        Meal(name='Tofu Bowl', description='Crème of coconut and greens', price=150.0, categories=[vegan]),
+        Meal(name='Paneer Butter Masala', price=200.0, is_available=False),
+    ])
+    db.session.commit()
+    return file_app
+
+
+def names(query):
+    return [meal['name'] for meal in search_meals(query)]
+
+
+def test_match_expression():
+    assert match_expression('Paneer "tikka" OR') == '"paneer"* "tikka"* "or"*'
+    assert match_expression('-*()') == ''
+
+
+def test_prefix_matches_ranked_by_field(app):
+    # A name hit outranks a description hit; unavailable meals are left out
+    assert names('pan') == ['Paneer Tikka', 'Chole Bhature']
+    assert names('pan tik') == ['Paneer Tikka']
+    assert names('creme') == ['Tofu Bowl']
+    assert names('') == []
+
+
+def test_triggers_follow_meal_and_category_changes(app):
+    tofu = db.session.scalars(db.select(Meal).filter_by(name='Tofu Bowl')).one()
+    assert names('vega') == ['Tofu Bowl']
+
+    tofu.name = 'Tofu Rice Bowl'
+    tofu.categories.append(MealCategory(name='Jain'))
+    db.session.commit()
+    assert names('rice') == names('jain') == ['Tofu Rice Bowl']
+
+    db.session.scalars(db.select(MealCategory).filter_by(name='Vegan')).one().name = 'Plant Based'
+    db.session.commit()
+    assert names('vegan') == [] and names('plant') == ['Tofu Rice Bowl']
+
+    tofu.categories = []
+    db.session.commit()
+    assert names('plant') == []
+
+    db.session.delete(tofu)
+    db.session.commit()
+    assert names('tofu') == []
+
+    db.session.scalars(db.select(Meal).filter_by(name='Paneer Butter Masala')).one().is_available = True
+    db.session.commit()
+    assert names('butter') == ['Paneer Butter Masala']
+    assert db.session.execute(db.text('SELECT count(*) FROM meal_search')).scalar() == 3
+
+
+def test_search_endpoint(app):
+    client = app.test_client()
+    response = client.get('/api/v1/meals/search?q=chick')
+    assert response.get_json()['meals'] == [db.session.get(Meal, 2).to_dict()]
+    assert client.get('/api/v1/meals/search').status_code == 400
+
+
+def test_rebuild(app):
+    db.session.execute(db.text('DELETE FROM meal_search'))
+    db.session.commit()
+    assert names('paneer') == []
+
+    output = app.test_cli_runner().invoke(search_cli, ['rebuild']).output
+    assert output == 'Indexed 3 meals.\n'
+    assert names('paneer') == ['Paneer Tikka', 'Chole Bhature']
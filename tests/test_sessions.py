@@ -0,0 +1,128 @@
+"""Tests for the SQLite session store that writes only changed sessions."""
+import time
+
+import pytest
+from flask import session
+
+from app import create_app
+from app.utils.sessions import SQLiteSessionInterface
+from tests.conftest import IntegrationTestConfig
+
+
+def make_app(path, **settings):
+    config = type('SessionConfig', (IntegrationTestConfig,), {
+        'SESSION_TYPE': 'sqlite',
+        'SESSION_SQLITE_PATH': str(path),
+        **settings,
+    })
+    app = create_app(config)
+
+    @app.route('/_session/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return 'ok'
+
+    @app.route('/_session/get')
+    def get_value():
+        return session.get('value', '')
+
+    @app.route('/_session/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path / 'sessions.db')
+
+
+def rows(interface, sql='SELECT count(*) FROM sessions'):
+    return interface._connection().execute(sql).fetchone()[0]
+
+
+def test_sqlite_type_installs_interface(app):
+    assert isinstance(app.session_interface, SQLiteSessionInterface)
+
+
+def test_unchanged_session_is_not_rewritten(app):
+    client = app.test_client()
+    client.get('/_session/set/dal')
+    for _ in range(5):
+        assert client.get('/_session/get').get_data(as_text=True) == 'dal'
+
+    stats = app.session_interface.stats()
+    assert stats['writes'] == 1
+    assert stats['touches'] == 0
+    assert stats['skipped'] == 5
+
+
+def test_assigning_the_same_value_is_not_a_write(app):
+    client = app.test_client()
+    client.get('/_session/set/dal')
+    client.get('/_session/set/dal')
+    client.get('/_session/set/rice')
+
+    assert app.session_interface.stats()['writes'] == 2
+    assert client.get('/_session/get').get_data(as_text=True) == 'rice'
+
+
+def test_expiry_is_touched_after_interval(tmp_path):
+    app = make_app(tmp_path / 'sessions.db', SESSION_SQLITE_TOUCH_INTERVAL=0)
+    interface = app.session_interface
+    client = app.test_client()
+    client.get('/_session/set/dal')
+    client.get('/_session/get')
+    before = rows(interface, 'SELECT expiry FROM sessions')
+    writes = interface.stats()['writes']
+    time.sleep(0.01)
+    client.get('/_session/get')
+
+    assert interface.stats()['touches'] >= 1
+    assert interface.stats()['writes'] == writes
+    assert rows(interface, 'SELECT expiry FROM sessions') > before
+
+
+def test_cleared_session_is_deleted(app):
+    client = app.test_client()
+    client.get('/_session/set/dal')
+    client.get('/_session/clear')
+
+    assert rows(app.session_interface) == 0
+    assert client.get('/_session/get').get_data(as_text=True) == ''
+
+
+def test_expired_session_is_not_loaded(app):
+    client = app.test_client()
+    client.get('/_session/set/dal')
+    app.session_interface._connection().execute('UPDATE sessions SET expiry = ?', (time.time() - 1,))
+
+    assert client.get('/_session/get').get_data(as_text=True) == ''
+
+
+def test_expired_sessions_are_collected_in_batches(tmp_path):
+    app = make_app(tmp_path / 'sessions.db', SESSION_SQLITE_GC_EVERY=2, SESSION_SQLITE_GC_BATCH=3)
+    interface = app.session_interface
+    interface._connection().executemany(
+        'INSERT INTO sessions VALUES (?, ?, ?)', [(f'old-{n}', b'\x80', time.time() - 1) for n in range(5)]
+    )
+    client = app.test_client()
+
+    client.get('/_session/set/a')
+    assert rows(interface) == 6  # first write, no collection yet
+    client.get('/_session/set/b')
+    assert rows(interface) == 3  # 3 of 5 expired deleted
+    client.get('/_session/set/c')
+    client.get('/_session/set/d')
+    assert rows(interface) == 1
+    assert interface.stats()['collected'] == 5
+
+
+def test_memory_path_for_testing():
+    app = make_app(':memory:')
+    client = app.test_client()
+    client.get('/_session/set/dal')
+
+    assert client.get('/_session/get').get_data(as_text=True) == 'dal'
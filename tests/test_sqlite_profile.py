@@ -0,0 +1,83 @@
+"""Tests for the SQLite performance profiles applied to the engine."""
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from tests.conftest import IntegrationTestConfig
+
+
+def make_app(tmp_path, **settings):
+    config = type('ProfileConfig', (IntegrationTestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'orders.db'}",
+        **settings
+    })
+    return create_app(config)
+
+
+def pragma(name):
+    with db.engine.connect() as connection:
+        return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+
+@pytest.mark.parametrize('profile, journal_mode, synchronous, cache_size', [
+    ('compat', 'delete', 2, -2000),
+    ('durable', 'wal', 2, -16000),
+    ('throughput', 'wal', 1, -64000),
+])
+def test_profiles_apply_pragmas(tmp_path, profile, journal_mode, synchronous, cache_size):
+    app = make_app(tmp_path, SQLITE_PROFILE=profile)
+
+    with app.app_context():
+        assert pragma('journal_mode') == journal_mode
+        assert pragma('synchronous') == synchronous
+        assert pragma('cache_size') == cache_size
+        db.engine.dispose()
+
+
+def test_every_pooled_connection_is_tuned(tmp_path):
+    app = make_app(tmp_path, SQLITE_PROFILE='throughput')
+
+    with app.app_context():
+        assert db.engine.pool.size() == 10
+        first, second = db.engine.connect(), db.engine.connect()
+        for connection in (first, second):
+            assert connection.execute(text('PRAGMA wal_autocheckpoint')).scalar() == 4000
+            assert connection.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+            connection.close()
+        db.engine.dispose()
+
+
+def test_config_keys_override_the_profile(tmp_path):
+    app = make_app(tmp_path, SQLITE_PROFILE='throughput', SQLITE_SYNCHRONOUS='FULL',
+                   SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 3})
+
+    with app.app_context():
+        assert pragma('synchronous') == 2
+        assert db.engine.pool.size() == 3
+        db.engine.dispose()
+
+
+def test_unknown_profile_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='SQLITE_PROFILE'):
+        make_app(tmp_path, SQLITE_PROFILE='turbo')
+
+
+def test_in_memory_database_keeps_a_static_pool():
+    app = create_app(IntegrationTestConfig)
+
+    with app.app_context():
+        assert type(db.engine.pool).__name__ == 'StaticPool'
+        assert pragma('cache_size') == -64000
+
+
+def test_checkpoint_command(tmp_path):
+    app = make_app(tmp_path, SQLITE_PROFILE='throughput')
+    with app.app_context():
+        db.create_all()
+
+    result = app.test_cli_runner().invoke(args=['sqlite', 'checkpoint', '--mode', 'truncate'])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith('busy=0 log=0')
+    with app.app_context():
+        db.engine.dispose()
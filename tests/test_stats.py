@@ -0,0 +1,137 @@
+"""Tests for the flush-maintained admin dashboard counters."""
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.models import Meal, Order, OrderStatus, StatCounter, User
+from app.utils.stats import stats_cli
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.fixture
+def app(file_app):
+    return file_app
+
+
+def make_order(user, status=OrderStatus.PENDING, total=100.0, created_at=datetime(2026, 10, 17, 12)):
+    return Order(customer=user, status=status, delivery_address='12 MG Road', delivery_date=TODAY,
+                 delivery_time='lunch', total_amount=total, created_at=created_at)
+
+
+def counters():
+    return {row.name: (row.count, row.amount) for row in StatCounter.query}
+
+
+def nonzero(stats):
+    return {name: value for name, value in stats.items() if value != (0, 0.0)}
+
+
+def rebuilt():
+    StatCounter.rebuild()
+    return counters()
+
+
+def test_inserts_are_counted(app):
+    user = User(username='asha', email='asha@example.com')
+    db.session.add_all([
+        user,
+        Meal(name='Thali', price=120.0),
+        Meal(name='Biryani', price=180.0, is_available=False),
+        make_order(user, total=100.0),
+        make_order(user, status=OrderStatus.CONFIRMED, total=50.0),
+        make_order(user, status=OrderStatus.CANCELLED, total=75.0),
+    ])
+    db.session.commit()
+
+    stats = StatCounter.dashboard(today=TODAY)
+    assert stats['users'] == 1
+    assert stats['meals'] == 2
+    assert stats['meals_available'] == 1
+    assert stats['orders'] == 3
+    assert stats['orders_by_status'][OrderStatus.PENDING] == 1
+    assert stats['orders_by_status'][OrderStatus.CANCELLED] == 1
+    assert stats['revenue_by_day'][0] == (TODAY, 2, 150.0)
+
+
+def test_status_and_amount_changes_move_counters(app):
+    user = User(username='asha', email='asha@example.com')
+    order = make_order(user, status=OrderStatus.OUT_FOR_DELIVERY, total=100.0)
+    db.session.add(order)
+    db.session.commit()
+
+    order = db.session.get(Order, order.id)
+    order.status = OrderStatus.DELIVERED
+    order.total_amount = 120.0
+    db.session.commit()
+    # Assigning to an expired attribute still subtracts the old value
+    order.status = OrderStatus.REFUNDED
+    db.session.commit()
+
+    stats = counters()
+    assert stats['orders:out_for_delivery'][0] == 0
+    assert stats['orders:delivered'][0] == 0
+    assert stats['orders:refunded'][0] == 1
+    assert stats['revenue:2026-10-17'] == (0, 0.0)
+    assert nonzero(stats) == rebuilt()
+
+
+def test_deletes_are_counted(app):
+    user = User(username='asha', email='asha@example.com')
+    meal = Meal(name='Thali', price=120.0)
+    order = make_order(user, total=100.0)
+    db.session.add_all([user, meal, order])
+    db.session.commit()
+
+    db.session.delete(order)
+    db.session.delete(meal)
+    db.session.commit()
+
+    stats = counters()
+    assert stats['orders:pending'][0] == 0
+    assert stats['meals'][0] == 0
+    assert stats['meals:available'][0] == 0
+    assert stats['revenue:2026-10-17'] == (0, 0.0)
+    assert stats['users'][0] == 1
+
+
+def test_meal_availability_toggle(app):
+    meal = Meal(name='Thali', price=120.0)
+    db.session.add(meal)
+    db.session.commit()
+
+    meal.is_available = False
+    db.session.commit()
+    assert counters()['meals:available'][0] == 0
+    meal.is_available = True
+    db.session.commit()
+    assert counters()['meals:available'][0] == 1
+
+
+def test_rolled_back_changes_are_not_counted(app):
+    db.session.add(User(username='asha', email='asha@example.com'))
+    db.session.flush()
+    db.session.rollback()
+
+    assert StatCounter.dashboard()['users'] == 0
+
+
+def test_rebuild_and_check_commands(app):
+    user = User(username='asha', email='asha@example.com')
+    db.session.add_all([user, make_order(user, total=100.0)])
+    db.session.commit()
+    expected = counters()
+    # Simulate drift from bulk SQL that bypassed the flush
+    db.session.execute(db.delete(StatCounter))
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(stats_cli, ['check'])
+    assert result.exit_code == 1
+    assert 'orders:pending' in result.output
+
+    result = runner.invoke(stats_cli, ['rebuild'])
+    assert result.exit_code == 0
+    assert counters() == expected
+    assert runner.invoke(stats_cli, ['check']).output.strip() == 'All counters match.'
@@ -0,0 +1,85 @@
+"""Tests for subscriptions and daily order materialization."""
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import (
+    DeliveryArea, Meal, Order, OrderStatus, StatCounter, Subscription, SubscriptionPause, User
+)
+from app.models.subscription import weekdays_mask
+from app.utils.subscriptions import materialize_orders, subscriptions_cli
+
+MONDAY = date(2026, 10, 19)
+SATURDAY = date(2026, 10, 24)
+
+
+@pytest.fixture
+def app(file_app):
+    db.session.add_all([
+        DeliveryArea(locality='koramangala', zone='south'),
+        User(username='asha', email='asha@example.com'),
+        Meal(name='Thali', price=120.0),
+        Meal(name='Biryani', price=200.0, is_available=False),
+    ])
+    db.session.commit()
+    return file_app
+
+
+def subscribe(**fields):
+    values = dict(user_id=1, meal_id=1, quantity=2, delivery_time='lunch',
+                  delivery_address='Koramangala 5th Block', starts_on=date(2026, 10, 1))
+    values.update(fields)
+    subscription = Subscription(**values)
+    db.session.add(subscription)
+    db.session.commit()
+    return subscription
+
+
+def test_weekdays():
+    assert weekdays_mask(['Mon', 'wednesday', 'sun']) == 0b1000101
+    assert Subscription(weekdays=weekdays_mask(['sat'])).weekday_names == ['sat']
+
+
+def test_materialize_creates_due_orders_once(app):
+    due = subscribe()
+    weekend = subscribe(weekdays=weekdays_mask(['sat', 'sun']))
+    paused = subscribe(weekdays=0b1111111, pauses=[SubscriptionPause(starts_on=date(2026, 10, 17), ends_on=MONDAY)])
+    subscribe(ends_on=date(2026, 10, 18))
+    subscribe(starts_on=date(2026, 10, 20))
+    subscribe(is_active=False)
+    subscribe(meal_id=2)
+    assert due.delivery_zone == 'south'
+
+    assert materialize_orders(MONDAY) == 1
+    assert materialize_orders(MONDAY) == 0
+    order = db.session.scalars(db.select(Order)).one()
+    assert (order.subscription_id, order.delivery_date, order.status) == (due.id, MONDAY, OrderStatus.CONFIRMED)
+    assert (order.total_amount, order.delivery_zone, order.version) == (240.0, 'south', 1)
+    assert [(item.meal_id, item.quantity) for item in order.items] == [(1, 2)]
+
+    assert materialize_orders(SATURDAY) == 2
+    assert {o.subscription_id for o in db.session.scalars(db.select(Order).filter_by(delivery_date=SATURDAY))} \
+        == {weekend.id, paused.id}
+
+
+def test_materialized_orders_are_counted(app):
+    subscribe()
+    subscribe(quantity=1)
+    materialize_orders(MONDAY)
+
+    counted = StatCounter.dashboard()
+    assert counted['orders_by_status'][OrderStatus.CONFIRMED] == 2
+    assert counted['revenue_by_day'][0][1:] == (2, 360.0)
+
+
+def test_cli_materializes_a_range(app):
+    subscribe(weekdays=weekdays_mask(['mon', 'tue']))
+
+    runner = app.test_cli_runner()
+    output = runner.invoke(subscriptions_cli, ['materialize', '--date', '2026-10-19', '--days', '3']).output
+    assert output.splitlines() == [
+        '2026-10-19: created 1 orders.',
+        '2026-10-20: created 1 orders.',
+        '2026-10-21: created 0 orders.',
+    ]